@@ -1,43 +1,162 @@
 import os
-import schedule
-import time
+import threading
 import uvicorn
 import multiprocessing
-from datetime import datetime
-from src.scrapers.reddit_scraper import RedditScraper
-from src.analysis.sentiment_analyzer import SentimentAnalyzer
+from datetime import datetime, timedelta
+from src.scrapers.collector import Collector
+from src.analysis.inference_service import get_inference_service
 from src.analysis.summary_sender import SummarySender
+from src.analysis.rolling_aggregates import RollingAggregates
+from src.pipeline.stage import Stage
+from src.pipeline.scheduler import JobScheduler
+from src.pipeline.streaming import stream_analyze
+from src.pipeline.metrics import get_registry
+
+_collector = None
+
+def get_collector():
+    """The long-lived multi-source collector, so its per-source counters span runs"""
+    global _collector
+    if _collector is None:
+        _collector = Collector()
+    return _collector
+
+def report_collection(collector):
+    """Print the per-source collection counters"""
+    for name, counters in collector.get_metrics().items():
+        print(f"Source {name}: {counters['items']} items in {counters['runs']} runs "
+              f"({counters['items_per_second']:.1f} items/s), {counters['errors']} errors")
+
+def scrape(hours_ago=1):
+    """Collect items from every configured source, returning the saved file or None"""
+    print(f"Starting data collection at {datetime.now()}")
+    collector = get_collector()
+    try:
+        items_df = collector.collect(hours_ago=hours_ago)
+        if items_df.empty:
+            collector.commit()
+            print("No new items collected in this run")
+            return None
+        
+        items_file = collector.save_items(items_df)
+        collector.commit(items_saved=True)
+        print(f"Collected {len(items_df)} items and saved to {items_file}")
+        return items_file
+    except Exception:
+        collector.discard()
+        raise
+    finally:
+        report_collection(collector)
+
+def analyze(items_file):
+    """Analyze a collected file, fold it into the aggregates and save the results"""
+    # Analyze items with the long-lived model
+    service = get_inference_service()
+    analyzed_df = service.analyze_tweets(items_file)  # We'll keep the same method name for compatibility
+    save_results(service, analyzed_df)
+    get_collector().record_analysis(analyzed_df)
+
+def tokenize(items_file):
+    """Tokenize a collected file into the token store, then pass it on to be analyzed"""
+    try:
+        start_time = datetime.now()
+        count = get_inference_service().pretokenize(items_file)
+        print(f"Tokenized {count} texts for the model in {(datetime.now() - start_time).total_seconds():.2f}s")
+    except Exception as e:
+        # Analysis tokenizes whatever is missing, so the file still goes on
+        print(f"Error tokenizing {items_file}: {str(e)}")
+    return items_file
+
+def stream_scrape_and_analyze(hours_ago=1):
+    """Analyze items while they are still being collected, then save the results"""
+    print(f"Starting streaming collection and analysis at {datetime.now()}")
+    collector = get_collector()
+    service = get_inference_service()
+    try:
+        # Shared, so a failed analysis also stops the collection it is consuming
+        stop = threading.Event()
+        items_df, analyzed_df, stats = stream_analyze(collector.stream(hours_ago, stop=stop),
+                                                      service.analyze_frame, stop=stop)
+        if items_df.empty:
+            collector.commit()
+            print("No new items collected in this run")
+            return
+        
+        save_results(service, analyzed_df)
+        
+        # Only mark items collected once their analysis is saved
+        collector.commit()
+        collector.record_analysis(analyzed_df)
+        print(f"Streamed {stats['items']} items in {stats['batches']} batches: "
+              f"collection {stats['producer_seconds']:.2f}s, inference {stats['analyze_seconds']:.2f}s, "
+              f"total {stats['total_seconds']:.2f}s")
+    except Exception:
+        collector.discard()
+        raise
+    finally:
+        report_collection(collector)
+
+def save_results(service, analyzed_df):
+    with get_registry().timed('aggregate', items=len(analyzed_df)):
+        summary = service.analyzer.generate_summary(analyzed_df)
+        
+        # Fold the run into the rolling aggregates before indexing it,
+        # so readers keyed on the index version see both together
+        RollingAggregates().fold(analyzed_df)
+    
+    # Save results
+    service.analyzer.save_analysis(analyzed_df, summary)
+    print(f"Successfully completed analysis at {datetime.now()}")
+    
+    metrics = service.get_metrics()
+    print(f"Inference latency: cold start {metrics['cold_start']['total_seconds']:.2f}s, "
+          f"steady-state p50 {metrics['steady_state']['p50_seconds']:.2f}s "
+          f"over {metrics['total_requests']} runs")
+    if metrics['cache']:
+        cache = metrics['cache']
+        print(f"Sentiment cache: {cache['hits']} hits, {cache['misses']} misses "
+              f"({cache['hit_rate']:.1%} hit rate), {cache['entries']} entries, "
+              f"{cache['evictions']} evicted")
+    if metrics['tokens']:
+        tokens = metrics['tokens']
+        print(f"Token store: {tokens['hits']} hits, {tokens['misses']} tokenized "
+              f"({tokens['hit_rate']:.1%} hit rate), {tokens['rows']} texts stored")
+    if metrics['prefilter']:
+        prefilter = metrics['prefilter']
+        agreement = f"{prefilter['agreement']:.1%}" if prefilter['agreement'] is not None else "n/a"
+        print(f"Pre-filter: {prefilter['skip_fraction']:.1%} of {prefilter['items']} items skipped the model "
+              f"({prefilter['routed']}), {agreement} agreement on {prefilter['audited']} audited")
 
 def run_scraper_and_analyzer():
     """Run the scraping and analysis process"""
-    print(f"Starting data collection and analysis at {datetime.now()}")
-    
     try:
-        # Collect Reddit posts and comments
-        scraper = RedditScraper()
-        posts_file = scraper.collect_posts(hours_ago=1)
-        
+        if os.getenv('PIPELINE_STREAMING', 'false').lower() == 'true':
+            return stream_scrape_and_analyze(hours_ago=1)
+        posts_file = scrape(hours_ago=1)
         if posts_file:
-            # Analyze posts
-            analyzer = SentimentAnalyzer()
-            analyzed_df = analyzer.analyze_tweets(posts_file)  # We'll keep the same method name for compatibility
-            summary = analyzer.generate_summary(analyzed_df)
-            
-            # Save results
-            analyzer.save_analysis(analyzed_df, summary)
-            print(f"Successfully completed analysis at {datetime.now()}")
-        else:
-            print("No Reddit posts collected in this run")
-            
+            analyze(posts_file)
     except Exception as e:
         print(f"Error in scraper/analyzer process: {str(e)}")
 
+def _report_delivery(future):
+    try:
+        results = future.result()
+    except Exception as e:
+        print(f"Error delivering daily summary: {str(e)}")
+        return
+    failed = [sink for sink, success in results.items() if not success]
+    print(f"Daily summary delivered to {len(results) - len(failed)}/{len(results)} sinks"
+          + (f" (failed: {', '.join(failed)})" if failed else ""))
+
 def send_daily_summary():
     """Generate and send daily summary"""
     print(f"Generating daily summary at {datetime.now()}")
     try:
         sender = SummarySender()
-        sender.send_email_summary()
+        
+        # Deliveries run on the dispatcher's background thread so the scheduler keeps ticking
+        delivery = sender.send_daily_summary(wait=False)
+        delivery.add_done_callback(_report_delivery)
     except Exception as e:
         print(f"Error sending daily summary: {str(e)}")
 
@@ -45,20 +164,46 @@ def run_api_server():
     """Run the FastAPI server"""
     uvicorn.run("src.api.main:app", host="0.0.0.0", port=8080, reload=True)
 
-def schedule_jobs():
-    """Schedule periodic jobs"""
-    # Run scraper and analyzer every hour
-    schedule.every(1).hours.do(run_scraper_and_analyzer)
+def build_scheduler():
+    """
+    Wire scrape -> tokenize -> analyze and report into queue-connected stages,
+    so scraping hour N+1 overlaps inference for hour N and the report never
+    waits on either
+    """
+    analyze_stage = Stage('analyze', analyze)
+    # Tokenizing hour N+1 overlaps inference for hour N
+    tokenize_stage = Stage('tokenize', tokenize, next_stage=analyze_stage)
+    # Missed hourly runs are caught up by widening the first-run collection window
+    if os.getenv('PIPELINE_STREAMING', 'false').lower() == 'true':
+        # Collection and inference already overlap within a streaming run
+        scrape_stage = Stage('scrape', lambda run: stream_scrape_and_analyze(hours_ago=1 + run['missed']))
+    else:
+        scrape_stage = Stage('scrape', lambda run: scrape(hours_ago=1 + run['missed']), next_stage=tokenize_stage)
+    report_stage = Stage('report', lambda run: send_daily_summary())
     
-    # Send daily summary at midnight UTC
-    schedule.every().day.at("00:00").do(send_daily_summary)
+    scheduler = JobScheduler(stages=[scrape_stage, tokenize_stage, analyze_stage, report_stage])
     
-    # Run initial collection
-    run_scraper_and_analyzer()
+    # Run scraper and analyzer every hour, starting immediately
+    scheduler.add_job('scrape', scrape_stage, interval=timedelta(hours=1), run_on_start=True)
     
-    while True:
-        schedule.run_pending()
-        time.sleep(60)
+    # Send daily summary at midnight
+    scheduler.add_job('daily_summary', report_stage, at='00:00')
+    return scheduler
+
+def schedule_jobs():
+    """Schedule periodic jobs"""
+    # Load the sentiment model once for all scheduled runs
+    get_inference_service().start()
+    
+    scheduler = build_scheduler()
+    try:
+        scheduler.run_forever()
+    finally:
+        scheduler.stop(wait=False)
+        metrics = scheduler.get_metrics()
+        for name, stage in metrics['stages'].items():
+            print(f"Stage {name}: {stage['processed']} runs, {stage['failed']} failed"
+                  + (f", p50 {stage['p50_seconds']:.2f}s" if 'p50_seconds' in stage else ""))
 
 if __name__ == "__main__":
     # Create necessary directories
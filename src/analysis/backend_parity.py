@@ -0,0 +1,82 @@
+import os
+import json
+import time
+import argparse
+import numpy as np
+from .sentiment_analyzer import SentimentAnalyzer, SENTIMENT_LABELS
+from .model_backends import BACKENDS
+from ..storage.columnar_store import read_frame
+
+# Representative posts and comments the backends are compared on
+PARITY_SAMPLES_PATH = os.path.join(os.path.dirname(__file__), 'parity_samples.txt')
+
+def load_samples(path=None):
+    """Sample texts from a one-per-line text file, or the text column of a collected data file"""
+    path = path or PARITY_SAMPLES_PATH
+    if path.endswith('.txt'):
+        with open(path) as f:
+            return [line.strip() for line in f if line.strip()]
+    return read_frame(path, columns=['text'])['text'].dropna().astype(str).tolist()
+
+def score_backend(backend, texts, batch_size=None):
+    analyzer = SentimentAnalyzer(batch_size=batch_size, use_cache=False, pool_workers=0, backend=backend,
+                                 use_token_store=False)
+    analyzer._score_texts(texts[:4])
+    start_time = time.perf_counter()
+    scores = analyzer._score_texts(texts)
+    return scores, time.perf_counter() - start_time
+
+def check_parity(backends, texts, batch_size=None):
+    """Compare each backend's scores with torch-fp32 on the same texts"""
+    reference, reference_seconds = score_backend('torch-fp32', texts, batch_size)
+    reference_labels = reference.argmax(axis=1)
+    
+    results = {'torch-fp32': {'seconds': reference_seconds, 'label_agreement': 1.0,
+                              'max_abs_diff': 0.0, 'mean_abs_diff': 0.0}}
+    for backend in backends:
+        if backend == 'torch-fp32':
+            continue
+        scores, seconds = score_backend(backend, texts, batch_size)
+        diff = np.abs(scores - reference)
+        disagreements = np.flatnonzero(scores.argmax(axis=1) != reference_labels)
+        results[backend] = {
+            'seconds': seconds,
+            'speedup': reference_seconds / seconds if seconds else None,
+            'label_agreement': float(1 - len(disagreements) / len(texts)),
+            'max_abs_diff': float(diff.max()),
+            'mean_abs_diff': float(diff.mean()),
+            'disagreements': [
+                {
+                    'text': texts[i],
+                    'fp32': SENTIMENT_LABELS[reference_labels[i]],
+                    backend: SENTIMENT_LABELS[scores[i].argmax()]
+                }
+                for i in disagreements[:10]
+            ]
+        }
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check quantized and ONNX backends against the fp32 model")
+    parser.add_argument('--backends', nargs='+', default=BACKENDS, choices=BACKENDS)
+    parser.add_argument('--samples', help="Text file (one per line) or collected data file; defaults to the stored sample set")
+    parser.add_argument('--min-agreement', type=float, default=0.95, help="Fail below this label agreement")
+    parser.add_argument('--output', help="Also write the results as JSON to this path")
+    args = parser.parse_args()
+    
+    texts = load_samples(args.samples)
+    results = check_parity(args.backends, texts)
+    
+    failed = []
+    for backend, result in results.items():
+        print(f"{backend:>20}: {result['label_agreement']:.1%} label agreement, "
+              f"max |diff| {result['max_abs_diff']:.2e}, {result['seconds']:.2f}s for {len(texts)} texts")
+        if result['label_agreement'] < args.min_agreement:
+            failed.append(backend)
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'samples': len(texts), 'results': results}, f, indent=2)
+    
+    if failed:
+        raise SystemExit(f"Below {args.min_agreement:.0%} label agreement with fp32: {', '.join(failed)}")
@@ -0,0 +1,103 @@
+import os
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+# The analyzer loaded in each worker process
+_worker_analyzer = None
+
+def _init_worker(threads, worker_ids, pin_cores, batch_size, max_length, backend):
+    global _worker_analyzer
+    
+    # Pin the intra-op thread count before torch starts its thread pools
+    os.environ['OMP_NUM_THREADS'] = str(threads)
+    os.environ['MKL_NUM_THREADS'] = str(threads)
+    import torch
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+    
+    # Give each worker its own block of cores so workers do not contend
+    with worker_ids.get_lock():
+        worker_id = worker_ids.value
+        worker_ids.value += 1
+    if pin_cores and hasattr(os, 'sched_setaffinity'):
+        cores = sorted(os.sched_getaffinity(0))
+        block = cores[worker_id * threads:(worker_id + 1) * threads]
+        if len(block) == threads:
+            os.sched_setaffinity(0, block)
+    
+    from .sentiment_analyzer import SentimentAnalyzer
+    _worker_analyzer = SentimentAnalyzer(batch_size=batch_size, max_length=max_length, use_cache=False,
+                                         pool_workers=0, backend=backend, use_token_store=False)
+
+def _score_shard(token_ids):
+    return _worker_analyzer._score_tokens(token_ids)
+
+class InferencePool:
+    """
+    Shards scoring across worker processes, each with its own model and a
+    fixed number of torch threads, for CPU-only hosts with many cores
+    """
+
+    def __init__(self, workers=None, threads_per_worker=None, batch_size=32, max_length=128, pin_cores=None,
+                 backend=None):
+        cpu_count = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+        self.workers = workers or int(os.getenv('INFERENCE_POOL_WORKERS', '0')) or max(1, cpu_count // 4)
+        self.threads_per_worker = (threads_per_worker or int(os.getenv('INFERENCE_POOL_THREADS', '0'))
+                                   or max(1, cpu_count // self.workers))
+        self.batch_size = batch_size
+        if pin_cores is None:
+            pin_cores = os.getenv('INFERENCE_POOL_PIN_CORES', 'true').lower() == 'true'
+        
+        # Build the quantized or exported model once here, before the workers load it
+        from .model_backends import prepare_backend
+        from .sentiment_analyzer import MODEL_NAME
+        prepare_backend(backend or os.getenv('SENTIMENT_BACKEND', 'torch-fp32'), MODEL_NAME)
+        
+        # Forking after torch has started threads can deadlock, so workers are spawned by default
+        context = multiprocessing.get_context(os.getenv('INFERENCE_POOL_START_METHOD', 'spawn'))
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(
+                self.threads_per_worker,
+                context.Value('i', 0),
+                pin_cores and self.workers * self.threads_per_worker <= cpu_count,
+                batch_size,
+                max_length,
+                backend
+            )
+        )
+
+    def score_tokens(self, token_ids, batch_size=None):
+        """
+        Score tokenized texts across the workers, returning an (n, 3)
+        probability array in input order. Workers receive token ids, so
+        tokenization stays with the caller's token store.
+        """
+        batch_size = batch_size or self.batch_size
+        if not token_ids:
+            return np.zeros((0, 3), dtype=np.float32)
+        
+        # Shards of similar length keep padding low; several per worker keep the load even
+        order = np.argsort([len(ids) for ids in token_ids], kind='stable')
+        shard_size = max(batch_size, math.ceil(len(token_ids) / (self.workers * 4)))
+        shards = [order[start:start + shard_size] for start in range(0, len(token_ids), shard_size)]
+        
+        futures = [self._executor.submit(_score_shard, [token_ids[i] for i in shard]) for shard in shards]
+        probabilities = np.zeros((len(token_ids), 3), dtype=np.float32)
+        for shard, future in zip(shards, futures):
+            probabilities[shard] = future.result()
+        return probabilities
+
+    def warm_up(self, token_ids):
+        """Load the model in every worker and run it once"""
+        list(self._executor.map(_score_shard, [token_ids] * self.workers))
+
+    def close(self):
+        self._executor.shutdown(wait=True)
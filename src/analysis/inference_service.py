@@ -0,0 +1,155 @@
+import threading
+import time
+from collections import deque
+import numpy as np
+from .sentiment_analyzer import SentimentAnalyzer, SENTIMENT_LABELS
+from ..storage.columnar_store import read_frame
+
+# Short mixed-length inputs used to warm up the model after loading
+WARMUP_TEXTS = [
+    "BONK is pumping today!",
+    "Not sure about this dip, might sell my $BONK",
+    "Daily discussion thread",
+    "Solana ecosystem update: new partnerships announced and volume is up across the board"
+]
+
+class InferenceService:
+    """Keeps a single SentimentAnalyzer loaded for the lifetime of the process"""
+
+    def __init__(self, batch_size=None, history_size=1000):
+        self.batch_size = batch_size
+        self.analyzer = None
+        self._load_lock = threading.Lock()
+        self._inference_lock = threading.Lock()
+
+        # Latency metrics
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self.first_request_seconds = None
+        self.request_count = 0
+        self.item_count = 0
+        self.request_latencies = deque(maxlen=history_size)
+
+    @property
+    def is_loaded(self):
+        return self.analyzer is not None
+
+    def start(self):
+        """Load and warm up the model if it is not loaded yet"""
+        with self._load_lock:
+            if self.analyzer is not None:
+                return self
+
+            start_time = time.perf_counter()
+            analyzer = SentimentAnalyzer(batch_size=self.batch_size)
+            self.load_seconds = time.perf_counter() - start_time
+
+            start_time = time.perf_counter()
+            if analyzer.pool is not None:
+                analyzer.pool.warm_up(analyzer.tokenize(WARMUP_TEXTS))
+            else:
+                analyzer._score_texts(WARMUP_TEXTS)
+            self.warmup_seconds = time.perf_counter() - start_time
+
+            self.analyzer = analyzer
+            print(f"Sentiment model loaded in {self.load_seconds:.2f}s (warm-up {self.warmup_seconds:.2f}s)")
+            return self
+
+    def analyze_batch(self, texts):
+        """Score a list of texts, returning an (n, 3) probability array"""
+        self.start()
+        start_time = time.perf_counter()
+        with self._inference_lock:
+            scores = self.analyzer.analyze_batch(texts)
+        self._record_request(time.perf_counter() - start_time, len(texts))
+        return scores
+
+    def analyze_texts(self, texts):
+        """Score a list of texts, returning one result dict per text"""
+        scores = self.analyze_batch(texts)
+        return [
+            {
+                'sentiment': SENTIMENT_LABELS[row.argmax()],
+                'confidence': float(row.max()),
+                'scores': {label: float(score) for label, score in zip(SENTIMENT_LABELS, row)}
+            }
+            for row in scores
+        ]
+
+    def analyze_tweets(self, input_path):
+        """Analyze a collected data file with the shared model"""
+        return self.analyze_frame(read_frame(input_path))
+
+    def analyze_frame(self, df):
+        """Analyze collected items already in memory with the shared model"""
+        self.start()
+        start_time = time.perf_counter()
+        with self._inference_lock:
+            analyzed_df = self.analyzer.analyze_frame(df)
+        self._record_request(time.perf_counter() - start_time, len(analyzed_df))
+        return analyzed_df
+
+    def pretokenize(self, input_path):
+        """
+        Tokenize the texts of a collected data file that will reach the model into
+        the token store ahead of inference; returns how many were tokenized
+        """
+        self.start()
+        if self.analyzer.tokens is None:
+            return 0
+        # Pre-filtered and cached texts never reach the model, so they are not tokenized
+        texts = self.analyzer.texts_to_score(read_frame(input_path, columns=['text'])['text'].tolist())
+        self.analyzer.tokens.encode(texts)
+        return len(texts)
+
+    def _record_request(self, seconds, n_items):
+        if self.first_request_seconds is None:
+            self.first_request_seconds = seconds
+        self.request_count += 1
+        self.item_count += n_items
+        self.request_latencies.append((seconds, n_items))
+
+    def get_metrics(self):
+        """Cold-start versus steady-state latency for this process"""
+        cold_start = None
+        if self.load_seconds is not None:
+            cold_start = self.load_seconds + self.warmup_seconds
+
+        steady = {}
+        if self.request_latencies:
+            latencies = np.array([seconds for seconds, _ in self.request_latencies])
+            items = sum(n for _, n in self.request_latencies)
+            steady = {
+                'requests': len(latencies),
+                'mean_seconds': float(latencies.mean()),
+                'p50_seconds': float(np.percentile(latencies, 50)),
+                'p95_seconds': float(np.percentile(latencies, 95)),
+                'seconds_per_item': float(latencies.sum() / items) if items else None
+            }
+
+        return {
+            'loaded': self.is_loaded,
+            'cold_start': {
+                'load_seconds': self.load_seconds,
+                'warmup_seconds': self.warmup_seconds,
+                'total_seconds': cold_start
+            },
+            'first_request_seconds': self.first_request_seconds,
+            'steady_state': steady,
+            'total_requests': self.request_count,
+            'total_items': self.item_count,
+            'cache': self.analyzer.cache.stats() if self.is_loaded and self.analyzer.cache else None,
+            'prefilter': self.analyzer.prefilter.stats() if self.is_loaded and self.analyzer.prefilter else None,
+            'tokens': self.analyzer.tokens.stats() if self.is_loaded and self.analyzer.tokens else None
+        }
+
+_service = None
+_service_lock = threading.Lock()
+
+def get_inference_service():
+    """Return the process-wide inference service, creating it on first use"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = InferenceService()
+        return _service
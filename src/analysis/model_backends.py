@@ -0,0 +1,175 @@
+import os
+import inspect
+import numpy as np
+import torch
+from transformers import AutoConfig, AutoModelForSequenceClassification, AutoTokenizer
+from ..storage.file_lock import file_lock
+
+BACKENDS = ['torch-fp32', 'torch-dynamic-int8', 'onnxruntime']
+
+def model_cache_dir(model_name):
+    """On-disk directory for exported and quantized copies of a model"""
+    root = os.getenv('SENTIMENT_MODEL_CACHE_DIR', 'data/models')
+    return os.path.join(root, model_name.replace('/', '__'))
+
+def _softmax(logits):
+    exp = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+class TorchBackend:
+    """Runs a PyTorch sequence classification model"""
+
+    def __init__(self, model, device):
+        self.model = model.to(device).eval()
+        self.device = device
+
+    def predict(self, batch):
+        batch = {k: torch.as_tensor(v).to(self.device) for k, v in batch.items()}
+        with torch.no_grad():
+            outputs = self.model(**batch)
+            return torch.nn.functional.softmax(outputs.logits, dim=-1).cpu().numpy()
+
+class OnnxRuntimeBackend:
+    """Runs an exported ONNX copy of the model on the ONNX Runtime CPU provider"""
+
+    def __init__(self, path):
+        try:
+            import onnxruntime
+        except ImportError:
+            raise ImportError("The onnxruntime backend needs the onnxruntime package: pip install onnxruntime")
+        
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        threads = int(os.getenv('OMP_NUM_THREADS', '0'))
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+        self.input_names = [model_input.name for model_input in self.session.get_inputs()]
+
+    def predict(self, batch):
+        feed = {name: batch[name].astype(np.int64) for name in self.input_names}
+        logits = self.session.run(None, feed)[0]
+        return _softmax(logits).astype(np.float32)
+
+def _quantize_dynamic(model):
+    return torch.ao.quantization.quantize_dynamic(model.eval(), {torch.nn.Linear}, dtype=torch.qint8)
+
+def _artifact_lock(path):
+    """Lock held while a cached artifact is built, so concurrent workers build it once"""
+    return file_lock(f"{path}.lock")
+
+def _dynamic_linears(model):
+    return [
+        (name, module) for name, module in model.named_modules()
+        if isinstance(module, torch.ao.nn.quantized.dynamic.Linear)
+    ]
+
+def _save_int8(quantized, path):
+    # Quantized tensors are stored as their int8 values plus scale and zero point, so the
+    # file holds plain tensors only: pickling a quantized state_dict looks its qscheme up
+    # by name across sys.modules, which fails on transformers' lazy optional modules
+    state = {
+        name: tensor.detach().clone()
+        for name, tensor in {**dict(quantized.named_parameters()), **dict(quantized.named_buffers())}.items()
+    }
+    for name, module in _dynamic_linears(quantized):
+        weight, bias = module._weight_bias()
+        state[f'{name}.int8_weight'] = weight.int_repr()
+        state[f'{name}.int8_scale'] = torch.tensor(weight.q_scale(), dtype=torch.float64)
+        state[f'{name}.int8_zero_point'] = torch.tensor(weight.q_zero_point())
+        if bias is not None:
+            state[f'{name}.int8_bias'] = bias
+    
+    # Written under a per-process name, so a reader never sees a partial file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    torch.save(state, tmp_path)
+    os.replace(tmp_path, path)
+
+def _load_int8(quantized, path):
+    state = torch.load(path)
+    for name, module in _dynamic_linears(quantized):
+        int8_weight = state.pop(f'{name}.int8_weight')
+        scale = state.pop(f'{name}.int8_scale').item()
+        zero_point = state.pop(f'{name}.int8_zero_point').item()
+        # The stored values lie on the quantization grid, so re-quantizing them is exact
+        weight = torch.quantize_per_tensor((int8_weight.float() - zero_point) * scale, scale, zero_point,
+                                           torch.qint8)
+        module.set_weight_bias(weight, state.pop(f'{name}.int8_bias', None))
+    
+    # The remaining entries are the unquantized parameters and buffers
+    tensors = {**dict(quantized.named_parameters()), **dict(quantized.named_buffers())}
+    with torch.no_grad():
+        for name, value in state.items():
+            tensors[name].copy_(value)
+    return quantized
+
+def build_dynamic_int8(model_name):
+    """Dynamically quantize the model's Linear layers to int8 once and return the cached weights file"""
+    path = os.path.join(model_cache_dir(model_name), 'dynamic_int8.pt')
+    with _artifact_lock(path):
+        if not os.path.exists(path):
+            _save_int8(_quantize_dynamic(AutoModelForSequenceClassification.from_pretrained(model_name)), path)
+            print(f"Quantized {model_name} to dynamic int8 at {path}")
+    return path
+
+def _load_dynamic_int8(model_name):
+    path = build_dynamic_int8(model_name)
+    # Rebuild the quantized structure from the config alone; the fp32 weights are not needed
+    config = AutoConfig.from_pretrained(model_name)
+    return _load_int8(_quantize_dynamic(AutoModelForSequenceClassification.from_config(config)), path)
+
+def export_onnx(model_name, tokenizer=None):
+    """Export the model to ONNX once and return the cached file"""
+    path = os.path.join(model_cache_dir(model_name), 'model.onnx')
+    with _artifact_lock(path):
+        if os.path.exists(path):
+            return path
+        
+        if tokenizer is None:
+            tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+        sample = tokenizer(["BONK export sample", "a longer sample sentence for the export"],
+                           padding=True, return_tensors='pt')
+        input_names = [name for name in ['input_ids', 'attention_mask'] if name in sample]
+        dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+        dynamic_axes['logits'] = {0: 'batch'}
+        
+        # Newer torch defaults to the dynamo exporter; the tracing exporter handles this model as is
+        export_options = {'dynamo': False} if 'dynamo' in inspect.signature(torch.onnx.export).parameters else {}
+        
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            tmp_path,
+            input_names=input_names,
+            output_names=['logits'],
+            dynamic_axes=dynamic_axes,
+            opset_version=17,
+            **export_options
+        )
+        os.replace(tmp_path, path)
+        print(f"Exported {model_name} to ONNX at {path}")
+        return path
+
+def prepare_backend(name, model_name, tokenizer=None):
+    """
+    Build the cached artifact a backend loads (the int8 weights or the ONNX
+    export) without loading it, so pool workers started afterwards only read it
+    """
+    if name == 'torch-dynamic-int8':
+        build_dynamic_int8(model_name)
+    elif name == 'onnxruntime':
+        export_onnx(model_name, tokenizer)
+
+def load_backend(name, model_name, tokenizer):
+    """Load the named inference backend for model_name"""
+    if name == 'torch-fp32':
+        device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+        return TorchBackend(AutoModelForSequenceClassification.from_pretrained(model_name), device)
+    if name == 'torch-dynamic-int8':
+        # Quantized kernels are CPU-only
+        return TorchBackend(_load_dynamic_int8(model_name), torch.device('cpu'))
+    if name == 'onnxruntime':
+        return OnnxRuntimeBackend(export_onnx(model_name, tokenizer))
+    raise ValueError(f"Unknown sentiment backend {name!r}, expected one of {BACKENDS}")
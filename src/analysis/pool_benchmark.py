@@ -0,0 +1,97 @@
+import os
+import json
+import time
+import random
+import argparse
+import torch
+from transformers import AutoTokenizer
+from .sentiment_analyzer import SentimentAnalyzer, MODEL_NAME
+from .inference_pool import InferencePool
+from .inference_service import WARMUP_TEXTS
+from .token_store import tokenize_texts
+
+# Vocabulary for synthetic posts of realistic, varied length
+BENCHMARK_WORDS = (
+    "bonk solana price pump dip hodl moon community dev update volume chart support resistance "
+    "breakout ATH listing exchange whale wallet airdrop burn memecoin rally bearish bullish"
+).split()
+
+def benchmark_texts(n, seed=0):
+    rng = random.Random(seed)
+    return [' '.join(rng.choices(BENCHMARK_WORDS, k=rng.randint(3, 90))) for _ in range(n)]
+
+def candidate_layouts(cpu_count):
+    """(workers, threads per worker) pairs that fit on the host; workers=0 is the in-process model"""
+    layouts = [(0, cpu_count)]
+    workers = 1
+    while workers <= cpu_count:
+        threads = 1
+        while workers * threads <= cpu_count:
+            layouts.append((workers, threads))
+            threads *= 2
+        workers *= 2
+    return layouts
+
+def run_layout(workers, threads, token_ids, warmup_ids, batch_size, repeats):
+    """Time inference alone; texts are tokenized once up front for every layout"""
+    if workers == 0:
+        torch.set_num_threads(threads)
+        analyzer = SentimentAnalyzer(batch_size=batch_size, use_cache=False, pool_workers=0, use_token_store=False)
+        score = analyzer._score_tokens
+        close = lambda: None
+    else:
+        pool = InferencePool(workers=workers, threads_per_worker=threads, batch_size=batch_size)
+        pool.warm_up(warmup_ids)
+        score = pool.score_tokens
+        close = pool.close
+    
+    try:
+        score(warmup_ids)
+        timings = []
+        for _ in range(repeats):
+            start_time = time.perf_counter()
+            score(token_ids)
+            timings.append(time.perf_counter() - start_time)
+    finally:
+        close()
+    
+    best = min(timings)
+    return {
+        'workers': workers,
+        'threads_per_worker': threads,
+        'best_seconds': best,
+        'items_per_second': len(token_ids) / best
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find the fastest inference workers x threads layout for this host")
+    parser.add_argument('--texts', type=int, default=512, help="Number of synthetic texts per run")
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--output', help="Also write the results as JSON to this path")
+    args = parser.parse_args()
+    
+    cpu_count = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+    token_ids = tokenize_texts(tokenizer, benchmark_texts(args.texts), 128)
+    warmup_ids = tokenize_texts(tokenizer, WARMUP_TEXTS, 128)
+    
+    results = []
+    for workers, threads in candidate_layouts(cpu_count):
+        result = run_layout(workers, threads, token_ids, warmup_ids, args.batch_size, args.repeats)
+        results.append(result)
+        mode = 'in-process' if workers == 0 else f"{workers} workers"
+        print(f"{mode:>12} x {threads:>2} threads: {result['items_per_second']:8.1f} items/s "
+              f"({result['best_seconds']:.2f}s)")
+    
+    best = max(results, key=lambda result: result['items_per_second'])
+    print(f"\nBest layout on {cpu_count} cores: ", end='')
+    if best['workers'] == 0:
+        print(f"in-process model with {best['threads_per_worker']} threads (INFERENCE_POOL_WORKERS=0)")
+    else:
+        print(f"INFERENCE_POOL_WORKERS={best['workers']} INFERENCE_POOL_THREADS={best['threads_per_worker']}")
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'cpu_count': cpu_count, 'texts': args.texts, 'batch_size': args.batch_size,
+                       'results': results, 'best': best}, f, indent=2)
@@ -0,0 +1,153 @@
+import os
+import re
+import math
+import random
+import threading
+import numpy as np
+
+# Score assigned to items with no sentiment-bearing text
+NEUTRAL_SCORES = (0.0, 1.0, 0.0)
+
+URL_PATTERN = re.compile(r'https?://\S+|www\.\S+', re.IGNORECASE)
+# Only the AutoModerator footer and removal notices in their posted form, so a comment
+# that merely quotes "i am a bot" still reaches the model
+BOILERPLATE_PATTERN = re.compile(
+    r'i am a bot,? and this action was performed automatically\W*(please contact the moderators.*)?$|'
+    r'^\[(deleted|removed)\]$|^\W*your (post|comment) has been removed',
+    re.IGNORECASE | re.DOTALL
+)
+WORD_PATTERN = re.compile(r"[a-z][a-z']*|[$][a-z]+", re.IGNORECASE)
+
+# VADER-style valences (-4..4) for common crypto discussion terms
+LEXICON = {
+    'moon': 2.5, 'mooning': 2.5, 'pump': 1.5, 'pumping': 2.0, 'bullish': 2.5, 'rally': 2.0,
+    'breakout': 2.0, 'ath': 2.0, 'gains': 2.0, 'hodl': 1.0, 'love': 3.0, 'great': 3.0,
+    'amazing': 3.0, 'awesome': 3.0, 'good': 1.9, 'nice': 1.8, 'best': 3.0, 'win': 2.5,
+    'congrats': 2.5, 'excited': 2.5, 'strong': 1.5, 'profit': 1.8, 'up': 0.5, 'green': 1.0,
+    'dump': -2.0, 'dumping': -2.5, 'dumped': -2.5, 'bearish': -2.5, 'crash': -3.0, 'rug': -3.0,
+    'rugged': -3.0, 'scam': -3.0, 'scammed': -3.0, 'exploit': -2.5, 'hack': -2.5, 'hacked': -2.8,
+    'loss': -2.0, 'lost': -1.8, 'terrible': -3.0, 'awful': -3.0, 'worst': -3.0, 'hate': -3.0,
+    'trash': -2.5, 'garbage': -2.5, 'bad': -2.5, 'dead': -2.5, 'down': -0.5, 'red': -1.0,
+    'bleeding': -2.0, 'sell': -1.0, 'selling': -1.0, 'fud': -1.5, 'ponzi': -3.0, 'worried': -1.8
+}
+NEGATIONS = {'not', "don't", 'dont', "isn't", 'isnt', "wasn't", 'never', 'no', "can't", 'cant', "won't"}
+
+def _has_text(text):
+    return any(character.isalnum() for character in text)
+
+class PreFilter:
+    """
+    Cheap pre-classification before transformer scoring. Rules short-circuit
+    empty, deleted, boilerplate, link-only and emoji-only items to neutral; an
+    optional lexicon scorer resolves confidently polar items, leaving only the
+    ambiguous rest for the model. A sample of skipped items is also sent to
+    the model to measure how often the shortcut disagrees with it.
+    """
+
+    def __init__(self, lexicon_routing=None, lexicon_threshold=None, audit_rate=None, seed=None):
+        if lexicon_routing is None:
+            lexicon_routing = os.getenv('PREFILTER_LEXICON_ROUTING', 'false').lower() == 'true'
+        self.lexicon_routing = lexicon_routing
+        self.lexicon_threshold = lexicon_threshold or float(os.getenv('PREFILTER_LEXICON_THRESHOLD', '0.6'))
+        self.audit_rate = audit_rate if audit_rate is not None else float(os.getenv('PREFILTER_AUDIT_RATE', '0.05'))
+        self._random = random.Random(seed)
+        self._vader = self._load_vader()
+        
+        self._lock = threading.Lock()
+        self.routed = {'trivial': 0, 'lexicon': 0, 'model': 0}
+        self.audited = {'trivial': 0, 'lexicon': 0}
+        self.agreed = {'trivial': 0, 'lexicon': 0}
+
+    def _load_vader(self):
+        # Prefer the real VADER model when it is installed
+        try:
+            from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+        except ImportError:
+            return None
+        return SentimentIntensityAnalyzer()
+
+    def is_trivial(self, text):
+        """True for text with nothing for the model to score"""
+        text = text.strip()
+        if not text or BOILERPLATE_PATTERN.search(text):
+            return True
+        return not _has_text(URL_PATTERN.sub(' ', text))
+
+    def lexicon_score(self, text):
+        """VADER-style compound score in [-1, 1] and the number of lexicon hits"""
+        if self._vader is not None:
+            scores = self._vader.polarity_scores(text)
+            return scores['compound'], int(scores['compound'] != 0)
+        
+        total, hits, negate = 0.0, 0, 0
+        for word in WORD_PATTERN.findall(text.lower()):
+            if word in NEGATIONS:
+                negate = 3
+                continue
+            valence = LEXICON.get(word.lstrip('$'))
+            if valence is not None:
+                total += -0.74 * valence if negate else valence
+                hits += 1
+            negate = max(0, negate - 1)
+        return total / math.sqrt(total * total + 15), hits
+
+    def _lexicon_probabilities(self, compound):
+        # Put the compound's strength on the winning label and split the rest
+        confidence = 0.5 + abs(compound) / 2
+        rest = (1 - confidence) / 2
+        return (rest, rest, confidence) if compound > 0 else (confidence, rest, rest)
+
+    def route(self, texts, record=True):
+        """
+        Returns (routes, scores): each text's route ('trivial', 'lexicon' or 'model')
+        and an (n, 3) array holding scores for the texts that skip the model.
+        With record=False the routes are not counted in stats().
+        """
+        routes = []
+        scores = np.zeros((len(texts), 3), dtype=np.float32)
+        for i, text in enumerate(texts):
+            if self.is_trivial(text):
+                routes.append('trivial')
+                scores[i] = NEUTRAL_SCORES
+                continue
+            if self.lexicon_routing:
+                compound, hits = self.lexicon_score(text)
+                if hits and abs(compound) >= self.lexicon_threshold:
+                    routes.append('lexicon')
+                    scores[i] = self._lexicon_probabilities(compound)
+                    continue
+            routes.append('model')
+        
+        if record:
+            with self._lock:
+                for route in routes:
+                    self.routed[route] += 1
+        return routes, scores
+
+    def audit_sample(self, routes):
+        """Indices of skipped items to also score with the model"""
+        return [i for i, route in enumerate(routes) if route != 'model' and self._random.random() < self.audit_rate]
+
+    def record_audit(self, routes, shortcut_scores, model_scores):
+        """Compare shortcut labels with model labels for audited items"""
+        with self._lock:
+            for route, shortcut, model in zip(routes, shortcut_scores, model_scores):
+                self.audited[route] += 1
+                self.agreed[route] += int(np.argmax(shortcut) == np.argmax(model))
+
+    def stats(self):
+        with self._lock:
+            total = sum(self.routed.values())
+            skipped = total - self.routed['model']
+            audited = sum(self.audited.values())
+            return {
+                'items': total,
+                'routed': dict(self.routed),
+                'skip_fraction': skipped / total if total else 0.0,
+                'audited': audited,
+                'agreement': sum(self.agreed.values()) / audited if audited else None,
+                'agreement_by_route': {
+                    route: self.agreed[route] / self.audited[route] if self.audited[route] else None
+                    for route in self.audited
+                }
+            }
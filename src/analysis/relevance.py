@@ -0,0 +1,48 @@
+import os
+import re
+
+class RelevanceMatcher:
+    """
+    Shared Bonk relevance check for collection and reporting: whole-word
+    keyword and cashtag matches, scored by the number of mentions
+    """
+
+    def __init__(self, keywords=None, cashtags=None, min_comment_score=None):
+        if keywords is None:
+            keywords = os.getenv('RELEVANCE_KEYWORDS', 'bonk,bonkcoin,bonk inu').split(',')
+        if cashtags is None:
+            cashtags = os.getenv('RELEVANCE_CASHTAGS', 'BONK').split(',')
+        self.keywords = [keyword.strip() for keyword in keywords if keyword.strip()]
+        self.cashtags = [cashtag.strip().lstrip('$') for cashtag in cashtags if cashtag.strip()]
+        self.min_comment_score = (min_comment_score if min_comment_score is not None
+                                  else int(os.getenv('RELEVANCE_MIN_COMMENT_SCORE', '1')))
+        
+        # Longest alternatives first so 'bonk inu' is one mention, not 'bonk' plus text
+        keyword_pattern = '|'.join(re.escape(keyword).replace(r'\ ', r'\s+')
+                                   for keyword in sorted(self.keywords, key=len, reverse=True))
+        cashtag_pattern = '|'.join(re.escape(cashtag) for cashtag in sorted(self.cashtags, key=len, reverse=True))
+        alternatives = []
+        if cashtag_pattern:
+            alternatives.append(rf'\$(?:{cashtag_pattern})\b')
+        if keyword_pattern:
+            alternatives.append(rf'(?<![\w$])(?:{keyword_pattern})(?!\w)')
+        self.pattern = re.compile('|'.join(alternatives) or r'(?!)', re.IGNORECASE)
+
+    def score(self, *texts):
+        """Number of Bonk mentions across the given texts"""
+        return sum(len(self.pattern.findall(text)) for text in texts if isinstance(text, str))
+
+    def matches(self, *texts):
+        return any(self.pattern.search(text) for text in texts if isinstance(text, str))
+
+    def is_relevant_comment(self, text):
+        """Comments are kept only when they mention Bonk themselves"""
+        return self.score(text) >= self.min_comment_score
+
+    def score_series(self, *columns):
+        """Vectorized mention counts over one or more text columns"""
+        scores = None
+        for column in columns:
+            counts = column.fillna('').astype(str).str.count(self.pattern)
+            scores = counts if scores is None else scores + counts
+        return scores
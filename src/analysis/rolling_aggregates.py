@@ -0,0 +1,233 @@
+import os
+import heapq
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+import pandas as pd
+from .themes import THEMES, tag_themes
+
+SENTIMENTS = ['positive', 'neutral', 'negative']
+
+# Summable per-hour, per-subreddit columns
+SUM_COLUMNS = (
+    ['item_count', 'engagement_sum']
+    + [f'{sentiment}_count' for sentiment in SENTIMENTS]
+    + [f'{sentiment}_score_sum' for sentiment in SENTIMENTS]
+    + [f'{sentiment}_engagement' for sentiment in SENTIMENTS]
+    + [f'theme_{theme}' for theme in THEMES]
+)
+
+class RollingAggregates:
+    """Running hourly aggregates and a bounded per-day top-K of items, folded in by each hourly run"""
+
+    def __init__(self, path=None, top_k=10):
+        self.path = path or os.getenv('ROLLING_AGGREGATES_PATH', 'data/rolling_aggregates.sqlite')
+        self.top_k = top_k
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS hourly_aggregates (
+                hour REAL NOT NULL,
+                subreddit TEXT NOT NULL,
+                {', '.join(f'{column} REAL NOT NULL DEFAULT 0' for column in SUM_COLUMNS)},
+                PRIMARY KEY (hour, subreddit)
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS top_items (
+                day TEXT NOT NULL,
+                item_id TEXT NOT NULL,
+                engagement REAL NOT NULL,
+                created_at TEXT,
+                subreddit TEXT,
+                title TEXT,
+                text TEXT,
+                sentiment TEXT,
+                PRIMARY KEY (day, item_id)
+            )
+        """)
+        self._conn.commit()
+
+    def fold(self, analyzed_df):
+        """Add one run's analyzed rows into the running aggregates"""
+        if analyzed_df.empty:
+            return
+
+        created_at = pd.to_datetime(analyzed_df['created_at'], utc=True).dt.tz_localize(None)
+        engagement = analyzed_df['engagement_score'].astype(float) if 'engagement_score' in analyzed_df else 0.0
+        # Communities are subreddits; older results name the column after them
+        channel_column = 'channel' if 'channel' in analyzed_df else 'subreddit'
+        subreddit = analyzed_df[channel_column].fillna('') if channel_column in analyzed_df else ''
+
+        frame = pd.DataFrame({
+            'hour': created_at.dt.floor('h').map(lambda ts: ts.timestamp()),
+            'subreddit': subreddit,
+            'item_count': 1.0,
+            'engagement_sum': engagement
+        }, index=analyzed_df.index)
+        for sentiment in SENTIMENTS:
+            is_sentiment = (analyzed_df['sentiment'] == sentiment).astype(float)
+            frame[f'{sentiment}_count'] = is_sentiment
+            frame[f'{sentiment}_score_sum'] = analyzed_df[f'{sentiment}_score'].astype(float)
+            frame[f'{sentiment}_engagement'] = is_sentiment * frame['engagement_sum']
+        themes = tag_themes(analyzed_df['text'].fillna(''))
+        for theme in THEMES:
+            frame[f'theme_{theme}'] = themes[theme].to_numpy(dtype=float)
+
+        grouped = frame.groupby(['hour', 'subreddit'], as_index=False)[SUM_COLUMNS].sum()
+        upsert = (
+            f"INSERT INTO hourly_aggregates (hour, subreddit, {', '.join(SUM_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * (len(SUM_COLUMNS) + 2))}) "
+            f"ON CONFLICT (hour, subreddit) DO UPDATE SET "
+            + ', '.join(f'{column} = {column} + excluded.{column}' for column in SUM_COLUMNS)
+        )
+
+        candidates = self._top_candidates(analyzed_df, created_at, frame['subreddit'], frame['engagement_sum'])
+
+        with self._lock:
+            self._conn.executemany(upsert, grouped.itertuples(index=False, name=None))
+            for day, day_candidates in candidates.groupby('day'):
+                self._merge_top_items(day, day_candidates)
+            self._conn.commit()
+
+    def apply_engagement_updates(self, updates_df):
+        """
+        Move re-fetched items' engagement from the value folded in earlier
+        (previous_engagement) to their current engagement_score. Item counts,
+        scores and sentiments stay as they were first folded in.
+        """
+        if updates_df.empty:
+            return
+
+        created_at = pd.to_datetime(updates_df['created_at'], utc=True).dt.tz_localize(None)
+        engagement = updates_df['engagement_score'].astype(float)
+        delta = engagement - updates_df['previous_engagement'].astype(float)
+        subreddit = updates_df['channel'].fillna('')
+
+        columns = ['engagement_sum'] + [f'{sentiment}_engagement' for sentiment in SENTIMENTS]
+        frame = pd.DataFrame({
+            'hour': created_at.dt.floor('h').map(lambda ts: ts.timestamp()),
+            'subreddit': subreddit,
+            'engagement_sum': delta
+        }, index=updates_df.index)
+        for sentiment in SENTIMENTS:
+            frame[f'{sentiment}_engagement'] = (updates_df['sentiment'] == sentiment).astype(float) * delta
+
+        grouped = frame.groupby(['hour', 'subreddit'], as_index=False)[columns].sum()
+        update = (
+            f"UPDATE hourly_aggregates SET {', '.join(f'{column} = {column} + ?' for column in columns)} "
+            f"WHERE hour = ? AND subreddit = ?"
+        )
+        candidates = self._top_candidates(updates_df, created_at, subreddit, engagement)
+
+        with self._lock:
+            self._conn.executemany(update, grouped[columns + ['hour', 'subreddit']].itertuples(index=False, name=None))
+            for day, day_candidates in candidates.groupby('day'):
+                self._merge_top_items(day, day_candidates)
+            self._conn.commit()
+
+    @staticmethod
+    def _top_candidates(analyzed_df, created_at, subreddit, engagement):
+        return pd.DataFrame({
+            'day': created_at.dt.strftime('%Y-%m-%d'),
+            'item_id': analyzed_df['tweet_id'].astype(str),
+            'engagement': engagement,
+            'created_at': created_at.dt.strftime('%Y-%m-%dT%H:%M:%S'),
+            'subreddit': subreddit,
+            'title': analyzed_df['title'].fillna('') if 'title' in analyzed_df else '',
+            'text': analyzed_df['text'].fillna(''),
+            'sentiment': analyzed_df['sentiment']
+        })
+
+    def _merge_top_items(self, day, candidates):
+        columns = ['day', 'item_id', 'engagement', 'created_at', 'subreddit', 'title', 'text', 'sentiment']
+        existing = self._conn.execute(
+            f"SELECT {', '.join(columns)} FROM top_items WHERE day = ?", (day,)
+        ).fetchall()
+
+        # Keep the K highest-engagement items of the day, newest copy of each id winning
+        merged = {row[1]: row for row in existing}
+        merged.update({row[1]: row for row in candidates[columns].itertuples(index=False, name=None)})
+        top = heapq.nlargest(self.top_k, merged.values(), key=lambda row: row[2])
+
+        self._conn.execute('DELETE FROM top_items WHERE day = ?', (day,))
+        self._conn.executemany(
+            f"INSERT INTO top_items ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+            top
+        )
+
+    def _hourly(self, start, end):
+        # Buckets are hour-granular; the bucket holding start is included
+        start = pd.Timestamp(start).floor('h')
+        with self._lock:
+            return pd.read_sql_query(
+                'SELECT * FROM hourly_aggregates WHERE hour >= ? AND hour < ?',
+                self._conn,
+                params=(start.timestamp(), pd.Timestamp(end).timestamp())
+            )
+
+    def window(self, hours=24, end=None):
+        """Aggregate totals for the rolling window [end - hours, end)"""
+        end = end or datetime.now()
+        return self.range(end - timedelta(hours=hours), end)
+
+    def range(self, start, end):
+        """Aggregate totals for start <= item hour < end"""
+        hourly = self._hourly(start, end)
+        totals = hourly[SUM_COLUMNS].sum()
+        item_count = float(totals['item_count'])
+        engagement = float(totals['engagement_sum'])
+
+        with self._lock:
+            top_rows = self._conn.execute(
+                'SELECT item_id, engagement, created_at, subreddit, title, text, sentiment FROM top_items '
+                'WHERE day >= ? AND day <= ? AND created_at >= ? AND created_at < ? '
+                'ORDER BY engagement DESC LIMIT ?',
+                (
+                    start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d'),
+                    start.strftime('%Y-%m-%dT%H:%M:%S'), end.strftime('%Y-%m-%dT%H:%M:%S'),
+                    self.top_k
+                )
+            ).fetchall()
+
+        by_subreddit = hourly.groupby('subreddit')['item_count'].sum().sort_values(ascending=False)
+        by_hour_of_day = hourly.groupby(
+            pd.to_datetime(hourly['hour'], unit='s').dt.hour
+        )['item_count'].sum()
+
+        return {
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'item_count': int(item_count),
+            'total_engagement': engagement,
+            'avg_engagement': engagement / item_count if item_count else 0.0,
+            'sentiment_distribution': {
+                sentiment: float(totals[f'{sentiment}_count']) / item_count if item_count else 0.0
+                for sentiment in SENTIMENTS
+            },
+            'mean_scores': {
+                sentiment: float(totals[f'{sentiment}_score_sum']) / item_count if item_count else 0.0
+                for sentiment in SENTIMENTS
+            },
+            'weighted_sentiment': {
+                sentiment: float(totals[f'{sentiment}_engagement']) / engagement if engagement else 0.0
+                for sentiment in SENTIMENTS
+            },
+            'theme_counts': {theme: int(totals[f'theme_{theme}']) for theme in THEMES},
+            'by_subreddit': {name: int(count) for name, count in by_subreddit.items() if name and count},
+            'by_hour_of_day': {int(hour): int(count) for hour, count in by_hour_of_day.items()},
+            'top_items': [
+                {
+                    'id': item_id,
+                    'engagement': item_engagement,
+                    'created_at': item_created_at,
+                    'subreddit': item_subreddit,
+                    'title': title,
+                    'text': text,
+                    'sentiment': sentiment
+                }
+                for item_id, item_engagement, item_created_at, item_subreddit, title, text, sentiment in top_rows
+            ]
+        }
@@ -1,34 +1,245 @@
 import pandas as pd
-import torch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
+import numpy as np
+from transformers import AutoTokenizer
 from datetime import datetime
 import os
+from .sentiment_cache import SentimentCache
+from .prefilter import PreFilter
+from .inference_pool import InferencePool
+from .model_backends import BACKENDS, load_backend
+from .token_store import TokenStore, tokenize_texts
+from ..pipeline.metrics import get_registry
+from ..storage.columnar_store import ColumnarStore, flatten_columns, read_frame
+from ..models.items import normalize_items, engagement_score
+from ..storage.summary_index import SummaryIndex
+
+SENTIMENT_LABELS = ['negative', 'neutral', 'positive']
+
+MODEL_NAME = "finiteautomata/bertweet-base-sentiment-analysis"
+
+# Flat likes/shares/replies columns of analyzed results, newest naming first;
+# results analyzed before items were normalized carry Twitter metric names
+METRIC_COLUMNS = [
+    ('metrics.likes', 'metrics.shares', 'metrics.replies'),
+    ('metrics.like_count', 'metrics.retweet_count', 'metrics.reply_count')
+]
+
+def sentiment_codes(sentiments):
+    """int8 label codes (index into SENTIMENT_LABELS, -1 if unknown) of a sentiment column"""
+    if isinstance(sentiments.dtype, pd.CategoricalDtype) and list(sentiments.cat.categories) == SENTIMENT_LABELS:
+        return sentiments.cat.codes.to_numpy()
+    return pd.Categorical(sentiments, categories=SENTIMENT_LABELS).codes
+
+def result_engagement(analyzed_df):
+    """Engagement of each analyzed row, from its engagement column or flat metric columns"""
+    if 'engagement_score' in analyzed_df.columns:
+        return analyzed_df['engagement_score'].to_numpy(dtype=np.float64)
+    if 'metrics' in analyzed_df.columns:
+        analyzed_df = flatten_columns(analyzed_df[['metrics']])
+    for columns in METRIC_COLUMNS:
+        if all(column in analyzed_df.columns for column in columns):
+            return engagement_score(*(analyzed_df[column].fillna(0).to_numpy(dtype=np.float64) for column in columns))
+    return np.zeros(len(analyzed_df))
+
+def analysis_frame(items, scores):
+    """
+    Typed results for normalized items and their (n, 3) score matrix: float32
+    scores, the label as an int8-coded categorical and flat int64 metrics
+    """
+    codes = scores.argmax(axis=1).astype(np.int8)
+    return pd.DataFrame({
+        'tweet_id': items['id'].values,
+        'source': items['source'].values,
+        'type': items['type'].values,
+        'channel': items['channel'].values,
+        'title': items['title'].values,
+        'text': items['text'].values,
+        'created_at': items['created_at'].values,
+        'sentiment': pd.Categorical.from_codes(codes, categories=SENTIMENT_LABELS),
+        'confidence': scores[np.arange(len(codes)), codes],
+        'negative_score': scores[:, 0],
+        'neutral_score': scores[:, 1],
+        'positive_score': scores[:, 2],
+        'metrics.likes': items['likes'].to_numpy(dtype=np.int64),
+        'metrics.shares': items['shares'].to_numpy(dtype=np.int64),
+        'metrics.replies': items['replies'].to_numpy(dtype=np.int64),
+        'relevance': items['relevance'].values,
+        'engagement_score': items['engagement_score'].to_numpy(dtype=np.float64)
+    })
 
 class SentimentAnalyzer:
-    def __init__(self):
-        self.model_name = "finiteautomata/bertweet-base-sentiment-analysis"
+    def __init__(self, batch_size=None, max_length=128, use_cache=True, pool_workers=None, backend=None,
+                 use_prefilter=None, use_token_store=None, load_model=True):
+        self.model_name = MODEL_NAME
+        self.backend_name = backend or os.getenv('SENTIMENT_BACKEND', 'torch-fp32')
+        if self.backend_name not in BACKENDS:
+            raise ValueError(f"Unknown sentiment backend {self.backend_name!r}, expected one of {BACKENDS}")
+        
+        # Scores from other backends differ slightly, so they are cached separately
+        self.model_id = self.model_name if self.backend_name == 'torch-fp32' else f"{self.model_name}@{self.backend_name}"
+        
+        # Inference settings
+        self.batch_size = batch_size or int(os.getenv('SENTIMENT_BATCH_SIZE', '32'))
+        self.max_length = max_length
+        
+        # Persistent cache of scores for previously seen texts
+        self.cache = SentimentCache() if use_cache else None
+        
+        # Rules (and optionally a lexicon) settle trivial items before the model
+        if use_prefilter is None:
+            use_prefilter = os.getenv('PREFILTER_ENABLED', 'true').lower() == 'true'
+        self.prefilter = PreFilter() if use_prefilter else None
+        
+        self.store = ColumnarStore()
+        self.summary_index = SummaryIndex()
+        
+        # Without the model only summaries and saving work, e.g. for benchmarks on synthetic scores
+        self.tokenizer = self.tokens = self.pool = self.backend = None
+        if not load_model:
+            return
+        
+        # Texts are tokenized once into the token store, which the model reads from
         self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-        self.model = AutoModelForSequenceClassification.from_pretrained(self.model_name)
+        if use_token_store is None:
+            use_token_store = os.getenv('TOKEN_STORE_ENABLED', 'true').lower() == 'true'
+        self.tokens = TokenStore(self.tokenizer, self.model_name, max_length) if use_token_store else None
+        
+        # In pool mode the worker processes hold the models and this process only shards work
+        if pool_workers is None:
+            pool_workers = int(os.getenv('INFERENCE_POOL_WORKERS', '0'))
+        self.pool = None
+        if pool_workers > 0:
+            self.pool = InferencePool(workers=pool_workers, batch_size=self.batch_size, max_length=max_length,
+                                      backend=self.backend_name)
+            return
         
-        # Move model to GPU if available
-        self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-        self.model = self.model.to(self.device)
+        self.backend = load_backend(self.backend_name, self.model_name, self.tokenizer)
+
+    def analyze_batch(self, texts, batch_size=None):
+        """
+        Score a list of texts, returning an (n, 3) float32 array of
+        negative/neutral/positive probabilities in input order.
+
+        Trivial texts (empty, deleted, boilerplate, links or emoji only) are
+        settled by the pre-filter without the model. Texts already in the
+        cache are not re-scored, and repeated texts within the list are only
+        scored once.
+        """
+        texts = ['' if pd.isna(text) else str(text) for text in texts]
+        if self.prefilter is None:
+            return self._cached_scores(texts, batch_size)
+        
+        # Only items the pre-filter cannot settle cheaply reach the model,
+        # plus an audit sample of the rest to measure agreement
+        routes, scores = self.prefilter.route(texts)
+        for route in set(routes):
+            get_registry().inc('bonk_prefilter_items_total', routes.count(route), route=route)
+        audit = self.prefilter.audit_sample(routes)
+        model_indices = [i for i, route in enumerate(routes) if route == 'model']
+        
+        model_scores = self._cached_scores([texts[i] for i in model_indices + audit], batch_size)
+        scores[model_indices] = model_scores[:len(model_indices)]
+        if audit:
+            self.prefilter.record_audit([routes[i] for i in audit], scores[audit], model_scores[len(model_indices):])
+        return scores
+
+    def texts_to_score(self, texts):
+        """
+        The distinct texts analyze_batch would run through the model: routed to
+        it by the pre-filter and not in the score cache. Audit samples are drawn
+        at analysis time and are not included.
+        """
+        texts = ['' if pd.isna(text) else str(text) for text in texts]
+        if self.prefilter is not None:
+            routes, _ = self.prefilter.route(texts, record=False)
+            texts = [text for text, route in zip(texts, routes) if route == 'model']
+        if self.cache is not None:
+            keys = [self.cache.make_key(text, self.model_id, self.max_length) for text in texts]
+            cached = self.cache.contains_many(keys)
+            texts = [text for text, key in zip(texts, keys) if key not in cached]
+        return list(dict.fromkeys(texts))
+
+    def _cached_scores(self, texts, batch_size=None):
+        if self.cache is None:
+            return self._score_texts(texts, batch_size)
+        
+        keys = [self.cache.make_key(text, self.model_id, self.max_length) for text in texts]
+        scores = self.cache.get_many(keys)
+        
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in scores:
+                missing.setdefault(key, text)
+        get_registry().inc('bonk_cache_lookups_total', len(keys) - len(missing), result='hit')
+        get_registry().inc('bonk_cache_lookups_total', len(missing), result='miss')
+        
+        if missing:
+            fresh = dict(zip(missing.keys(), self._score_texts(list(missing.values()), batch_size)))
+            self.cache.put_many(fresh)
+            scores.update(fresh)
+        
+        return np.array([scores[key] for key in keys], dtype=np.float32).reshape(len(texts), len(SENTIMENT_LABELS))
+
+    def tokenize(self, texts):
+        """Input ids of each text as int32 arrays, from the token store when enabled"""
+        with get_registry().timed('tokenize', items=len(texts)):
+            if self.tokens is not None:
+                return self.tokens.encode(texts)
+            return tokenize_texts(self.tokenizer, texts, self.max_length)
+
+    def _score_texts(self, texts, batch_size=None):
+        """Tokenize texts and run the model over them"""
+        return self._score_tokens(self.tokenize(texts), batch_size)
+
+    def _score_tokens(self, token_ids, batch_size=None):
+        """
+        Run the model over tokenized texts with batched inference.
+
+        Texts are sorted by token length and split into batches that are
+        padded only to their own longest member, so short comments are not
+        padded out to max_length.
+        """
+        batch_size = batch_size or self.batch_size
+        if self.pool is not None:
+            with get_registry().timed('forward', items=len(token_ids)):
+                return self.pool.score_tokens(token_ids, batch_size)
+        
+        probabilities = np.zeros((len(token_ids), len(SENTIMENT_LABELS)), dtype=np.float32)
+        if not token_ids:
+            return probabilities
+        
+        lengths = np.array([len(ids) for ids in token_ids])
+        order = np.argsort(lengths, kind='stable')
+        
+        for start in range(0, len(token_ids), batch_size):
+            indices = order[start:start + batch_size]
+            batch = self._pad([token_ids[i] for i in indices])
+            with get_registry().timed('forward', items=len(indices)):
+                probabilities[indices] = self.backend.predict(batch)
+        
+        return probabilities
+
+    def _pad(self, sequences):
+        """Pad token id arrays to a batch of int64 model inputs"""
+        width = max(len(ids) for ids in sequences)
+        input_ids = np.full((len(sequences), width), self.tokenizer.pad_token_id, dtype=np.int64)
+        attention_mask = np.zeros((len(sequences), width), dtype=np.int64)
+        for row, ids in enumerate(sequences):
+            columns = slice(width - len(ids), width) if self.tokenizer.padding_side == 'left' else slice(0, len(ids))
+            input_ids[row, columns] = ids
+            attention_mask[row, columns] = 1
+        
+        batch = {'input_ids': input_ids, 'attention_mask': attention_mask}
+        if 'token_type_ids' in self.tokenizer.model_input_names:
+            batch['token_type_ids'] = np.zeros_like(input_ids)
+        return batch
 
     def analyze_text(self, text):
         """
         Analyze the sentiment of a single text
         """
-        inputs = self.tokenizer(text, return_tensors="pt", truncation=True, max_length=128)
-        inputs = {k: v.to(self.device) for k, v in inputs.items()}
-        
-        with torch.no_grad():
-            outputs = self.model(**inputs)
-            predictions = torch.nn.functional.softmax(outputs.logits, dim=-1)
-            
-        # Convert predictions to sentiment scores
-        scores = predictions[0].cpu().numpy()
-        sentiment_map = {0: 'negative', 1: 'neutral', 2: 'positive'}
-        sentiment = sentiment_map[scores.argmax()]
+        scores = self.analyze_batch([text])[0]
+        sentiment = SENTIMENT_LABELS[scores.argmax()]
         confidence = float(scores.max())
         
         return {
@@ -41,67 +252,53 @@ class SentimentAnalyzer:
             }
         }
 
-    def analyze_tweets(self, csv_path):
-        """
-        Analyze sentiment for all tweets in a CSV file
-        """
-        df = pd.read_csv(csv_path)
-        results = []
-        
-        for _, row in df.iterrows():
-            analysis = self.analyze_text(row['text'])
-            results.append({
-                'tweet_id': row['id'],
-                'text': row['text'],
-                'created_at': row['created_at'],
-                'sentiment': analysis['sentiment'],
-                'confidence': analysis['confidence'],
-                'negative_score': analysis['scores']['negative'],
-                'neutral_score': analysis['scores']['neutral'],
-                'positive_score': analysis['scores']['positive'],
-                'metrics': {
-                    'retweet_count': row['retweet_count'],
-                    'like_count': row['like_count'],
-                    'reply_count': row['reply_count']
-                }
-            })
-        
-        return pd.DataFrame(results)
+    def analyze_tweets(self, input_path):
+        """
+        Analyze sentiment for all tweets in a collected Parquet (or legacy CSV) file
+        """
+        return self.analyze_frame(read_frame(input_path))
+
+    def analyze_frame(self, df):
+        """
+        Analyze sentiment for collected items already in memory. Rows from any
+        source are first normalized to the common item schema.
+
+        Results are typed columns built straight from the score matrix (see
+        analysis_frame).
+        """
+        items = normalize_items(df)
+        return analysis_frame(items, self.analyze_batch(items['text'].tolist()))
 
     def generate_summary(self, analyzed_df):
         """
         Generate a summary of sentiment analysis results
         """
-        total_tweets = len(analyzed_df)
-        sentiment_counts = analyzed_df['sentiment'].value_counts()
-        
-        # Calculate weighted sentiment scores using engagement metrics
-        analyzed_df['engagement_score'] = (
-            analyzed_df['metrics'].apply(lambda x: 
-                x['retweet_count'] * 2 + 
-                x['like_count'] + 
-                x['reply_count'] * 1.5
-            )
-        )
+        codes = sentiment_codes(analyzed_df['sentiment'])
+        known = codes >= 0
         
-        weighted_sentiments = analyzed_df.groupby('sentiment')['engagement_score'].sum()
-        total_engagement = weighted_sentiments.sum()
+        # Label counts and engagement-weighted sums in one pass over the codes
+        counts = np.bincount(codes[known], minlength=len(SENTIMENT_LABELS))
+        weighted = np.bincount(codes[known], weights=result_engagement(analyzed_df)[known],
+                               minlength=len(SENTIMENT_LABELS))
+        total_engagement = weighted.sum()
         
+        labels = ['positive', 'neutral', 'negative']
         summary = {
             'timestamp': datetime.now().isoformat(),
-            'total_tweets': total_tweets,
+            'total_tweets': len(analyzed_df),
             'sentiment_distribution': {
-                'positive': int(sentiment_counts.get('positive', 0)),
-                'neutral': int(sentiment_counts.get('neutral', 0)),
-                'negative': int(sentiment_counts.get('negative', 0))
+                label: int(counts[SENTIMENT_LABELS.index(label)]) for label in labels
             },
             'weighted_sentiment': {
-                'positive': float(weighted_sentiments.get('positive', 0) / total_engagement if total_engagement > 0 else 0),
-                'neutral': float(weighted_sentiments.get('neutral', 0) / total_engagement if total_engagement > 0 else 0),
-                'negative': float(weighted_sentiments.get('negative', 0) / total_engagement if total_engagement > 0 else 0)
+                label: float(weighted[SENTIMENT_LABELS.index(label)] / total_engagement if total_engagement > 0 else 0)
+                for label in labels
             },
             'total_engagement': float(total_engagement)
         }
+        if 'source' in analyzed_df.columns:
+            summary['source_counts'] = {
+                source: int(count) for source, count in analyzed_df['source'].value_counts().items()
+            }
         
         return summary
 
@@ -113,26 +310,29 @@ class SentimentAnalyzer:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M')
             base_filename = f"sentiment_analysis_{timestamp}"
         
-        os.makedirs('data/analyzed', exist_ok=True)
+        # Labels are written as plain strings so a day's files share one schema
+        # with runs saved before labels were coded
+        if isinstance(df['sentiment'].dtype, pd.CategoricalDtype):
+            df = df.assign(sentiment=df['sentiment'].astype(str))
         
-        # Save detailed analysis
-        analysis_path = os.path.join('data/analyzed', f"{base_filename}_detailed.csv")
-        df.to_csv(analysis_path, index=False)
-        
-        # Save summary
-        summary_path = os.path.join('data/analyzed', f"{base_filename}_summary.csv")
-        pd.DataFrame([summary]).to_csv(summary_path, index=False)
+        with get_registry().timed('persist', items=len(df)):
+            # Save detailed analysis
+            analysis_path = self.store.write('analyzed/detailed', df, base_filename)
+            
+            # Save summary
+            summary_path = self.store.write('analyzed/summary', pd.DataFrame([summary]), base_filename)
+            
+            # Index the run so readers can find it without scanning the data directory
+            self.summary_index.add(base_filename, summary, summary_path=summary_path, detailed_path=analysis_path)
         
         return analysis_path, summary_path
 
 if __name__ == "__main__":
     analyzer = SentimentAnalyzer()
-    # Test with the most recent tweet file
-    data_dir = 'data/raw'
-    if os.path.exists(data_dir):
-        files = sorted([f for f in os.listdir(data_dir) if f.endswith('.csv')], reverse=True)
-        if files:
-            latest_file = os.path.join(data_dir, files[0])
-            analyzed_df = analyzer.analyze_tweets(latest_file)
-            summary = analyzer.generate_summary(analyzed_df)
-            analyzer.save_analysis(analyzed_df, summary) 
\ No newline at end of file
+    # Test with the most recent collected file
+    files = analyzer.store.files('raw/items') or analyzer.store.files('raw/reddit')
+    if files:
+        latest_file = files[-1]
+        analyzed_df = analyzer.analyze_tweets(latest_file)
+        summary = analyzer.generate_summary(analyzed_df)
+        analyzer.save_analysis(analyzed_df, summary) 
\ No newline at end of file
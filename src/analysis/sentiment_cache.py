@@ -0,0 +1,133 @@
+import os
+import re
+import sqlite3
+import hashlib
+import threading
+import time
+import unicodedata
+
+# SQLite limits the number of bound parameters per statement
+QUERY_CHUNK_SIZE = 500
+
+def normalize_text(text):
+    """Normalize text so trivially different copies share a cache entry"""
+    text = unicodedata.normalize('NFKC', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+class SentimentCache:
+    """Persistent, size-bounded LRU cache of sentiment scores keyed on text hash"""
+
+    def __init__(self, path=None, max_entries=None):
+        self.path = path or os.getenv('SENTIMENT_CACHE_PATH', 'data/cache/sentiment_cache.sqlite')
+        self.max_entries = max_entries or int(os.getenv('SENTIMENT_CACHE_MAX_ENTRIES', '200000'))
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS sentiment_cache (
+                key TEXT PRIMARY KEY,
+                negative REAL NOT NULL,
+                neutral REAL NOT NULL,
+                positive REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_sentiment_cache_last_used ON sentiment_cache (last_used)')
+        self._conn.commit()
+        self._size = self._conn.execute('SELECT COUNT(*) FROM sentiment_cache').fetchone()[0]
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(text, model_name, max_length):
+        """Hash of normalized text, model name and truncation length"""
+        payload = f"{model_name}\0{max_length}\0{normalize_text(text)}"
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get_many(self, keys):
+        """Look up scores for keys, returning {key: (negative, neutral, positive)} for hits"""
+        unique_keys = list(dict.fromkeys(keys))
+        found = {}
+        with self._lock:
+            for start in range(0, len(unique_keys), QUERY_CHUNK_SIZE):
+                chunk = unique_keys[start:start + QUERY_CHUNK_SIZE]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f'SELECT key, negative, neutral, positive FROM sentiment_cache WHERE key IN ({placeholders})',
+                    chunk
+                ).fetchall()
+                for key, negative, neutral, positive in rows:
+                    found[key] = (negative, neutral, positive)
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    'UPDATE sentiment_cache SET last_used = ? WHERE key = ?',
+                    [(now, key) for key in found]
+                )
+                self._conn.commit()
+
+            hits = sum(1 for key in keys if key in found)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return found
+
+    def contains_many(self, keys):
+        """The subset of keys that have cached scores, without counting hits or touching last_used"""
+        unique_keys = list(dict.fromkeys(keys))
+        found = set()
+        with self._lock:
+            for start in range(0, len(unique_keys), QUERY_CHUNK_SIZE):
+                chunk = unique_keys[start:start + QUERY_CHUNK_SIZE]
+                placeholders = ','.join('?' * len(chunk))
+                found.update(key for (key,) in self._conn.execute(
+                    f'SELECT key FROM sentiment_cache WHERE key IN ({placeholders})', chunk
+                ).fetchall())
+        return found
+
+    def put_many(self, scores):
+        """Store {key: (negative, neutral, positive)} and evict least recently used entries"""
+        if not scores:
+            return
+        now = time.time()
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO sentiment_cache (key, negative, neutral, positive, last_used) VALUES (?, ?, ?, ?, ?)',
+                [(key, float(s[0]), float(s[1]), float(s[2]), now) for key, s in scores.items()]
+            )
+            self._size += self._conn.total_changes - before
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        if self._size <= self.max_entries:
+            return
+        # Trim 10% below the limit so eviction does not run on every insert
+        excess = self._size - int(self.max_entries * 0.9)
+        self._conn.execute(
+            'DELETE FROM sentiment_cache WHERE key IN '
+            '(SELECT key FROM sentiment_cache ORDER BY last_used LIMIT ?)',
+            (excess,)
+        )
+        self._size -= excess
+        self.evictions += excess
+
+    def stats(self):
+        """Hit/miss counters since this cache was opened"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'entries': self._size
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,23 +1,35 @@
 import os
+import html
+import json
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-import json
-from ..integrations.discord_webhook import DiscordWebhook
+from ..integrations.notifier import get_dispatcher
+from ..storage.columnar_store import ColumnarStore, STRUCT_SEPARATOR
+from ..storage.summary_index import SummaryIndex
+from .themes import tag_themes
+from .rolling_aggregates import RollingAggregates
+from .relevance import RelevanceMatcher
+
+SENTIMENTS = ['positive', 'neutral', 'negative']
+
+def _flat_columns(prefix):
+    return [f"{prefix}{STRUCT_SEPARATOR}{sentiment}" for sentiment in SENTIMENTS]
 
 class SummarySender:
     def __init__(self):
-        # Email settings
-        self.smtp_server = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
-        self.smtp_port = int(os.getenv('SMTP_PORT', '587'))
-        self.smtp_username = os.getenv('SMTP_USERNAME')
-        self.smtp_password = os.getenv('SMTP_PASSWORD')
-        self.recipient_emails = os.getenv('RECIPIENT_EMAILS', '').split(',')
+        # Discord and email delivery share the process-wide background dispatcher
+        self.dispatcher = get_dispatcher()
+        self.discord = self.dispatcher.discord
+        self.email = self.dispatcher.email
         
-        # Discord integration
-        self.discord = DiscordWebhook()
+        self.store = ColumnarStore()
+        self.summary_index = SummaryIndex()
+        self.rolling_aggregates = RollingAggregates()
+        self.relevance = RelevanceMatcher()
+        
+        # Rendered daily summaries keyed by (day, data version)
+        self._rendered = {}
 
     def get_top_posts(self, df, n=3):
         """Get top n posts by engagement"""
@@ -27,27 +39,13 @@ class SummarySender:
 
     def summarize_key_topics(self, df):
         """Extract key topics and themes from Bonk-related posts"""
-        # Common themes to look for
-        themes = {
-            'price': ['price', 'ATH', 'support', 'resistance', '$'],
-            'technical': ['trend', 'momentum', 'volume', 'analysis'],
-            'community': ['holder', 'community', 'governance', 'milestone'],
-            'development': ['feature', 'roadmap', 'update', 'partnership'],
-            'market': ['exchange', 'listing', 'trading', 'market']
-        }
-        
-        theme_counts = {k: 0 for k in themes}
         total_posts = len(df)
         
-        for _, row in df.iterrows():
-            content = str(row['content']).lower()
-            for theme, keywords in themes.items():
-                if any(keyword in content for keyword in keywords):
-                    theme_counts[theme] += 1
+        theme_counts = tag_themes(df['content']).sum()
         
         # Convert to percentages and sort by frequency
-        theme_percentages = {k: (v / total_posts * 100) for k, v in theme_counts.items()}
-        return dict(sorted(theme_percentages.items(), key=lambda x: x[1], reverse=True))
+        theme_percentages = (theme_counts / total_posts * 100).sort_values(ascending=False, kind='stable')
+        return {theme: float(percentage) for theme, percentage in theme_percentages.items()}
 
     def extract_key_metrics(self, content):
         """Extract key metrics and numbers from post content"""
@@ -62,127 +60,194 @@ class SummarySender:
 
     def is_bonk_related(self, title):
         """Check if a post is Bonk-related based on its title"""
-        return 'BONK' in title.upper() or 'is_bonk_related' in title
+        return self.relevance.matches(title)
 
     def filter_bonk_posts(self, df):
         """Filter dataframe for Bonk-related posts"""
         if 'is_bonk_related' in df.columns:
             return df[df['is_bonk_related']]
-        return df[df['title'].str.contains('BONK', case=False, na=False)]
+        if 'relevance' in df.columns:
+            # Scored once at collection time
+            return df[df['relevance'] > 0]
+        columns = [df[column] for column in ['title', 'content'] if column in df.columns]
+        if not columns:
+            return df.iloc[:0]
+        return df[self.relevance.score_series(*columns).to_numpy() > 0]
 
     def get_sentiment_trend(self, df):
         """Calculate sentiment trend compared to previous day"""
-        df['date'] = pd.to_datetime(df['timestamp']).dt.date
         today = datetime.now().date()
         yesterday = today - timedelta(days=1)
         
-        # Handle both string and dict sentiment distributions
-        def process_sentiment(sent):
-            if isinstance(sent, str):
-                return json.loads(sent)
-            return sent
-        
-        today_data = df[df['date'] == today]
-        yesterday_data = df[df['date'] == yesterday]
+        columns = _flat_columns('sentiment_distribution')
+        daily_means = df[columns].groupby(pd.to_datetime(df['timestamp']).dt.date).mean()
         
-        if len(today_data) == 0 or len(yesterday_data) == 0:
+        if today not in daily_means.index or yesterday not in daily_means.index:
             return None
-            
-        today_sentiment = today_data['sentiment_distribution'].apply(process_sentiment).mean()
-        yesterday_sentiment = yesterday_data['sentiment_distribution'].apply(process_sentiment).mean()
         
-        if not isinstance(today_sentiment, dict):
+        trend = daily_means.loc[today] - daily_means.loc[yesterday]
+        return {sentiment: float(value) for sentiment, value in zip(SENTIMENTS, trend)}
+
+    def summary_from_aggregates(self, report_date):
+        """Build the structured summary from the rolling hourly aggregates, or None if they hold no data"""
+        now = datetime.now()
+        window = self.rolling_aggregates.window(24, end=now)
+        if not window['item_count']:
             return None
-            
-        trend = {k: today_sentiment.get(k, 0) - yesterday_sentiment.get(k, 0) for k in today_sentiment}
-        return trend
+        
+        # Trend compares today's calendar day so far with the whole of yesterday
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        today_window = self.rolling_aggregates.range(today, now)
+        yesterday_window = self.rolling_aggregates.range(today - timedelta(days=1), today)
+        sentiment_trend = None
+        if today_window['item_count'] and yesterday_window['item_count']:
+            sentiment_trend = {
+                sentiment: today_window['sentiment_distribution'][sentiment]
+                - yesterday_window['sentiment_distribution'][sentiment]
+                for sentiment in SENTIMENTS
+            }
+        arrows = {1: '↑', -1: '↓', 0: '→'}
+        trend_indicators = {
+            sentiment: arrows[int(np.sign(sentiment_trend[sentiment]))] if sentiment_trend else '→'
+            for sentiment in SENTIMENTS
+        }
+        
+        theme_percentages = (
+            pd.Series(window['theme_counts'], dtype=float) / window['item_count'] * 100
+        ).sort_values(ascending=False, kind='stable')
+        hourly_activity = pd.Series(window['by_hour_of_day'], dtype='int64')
+        top_items = window['top_items']
+        
+        return {
+            'date': report_date,
+            'status': 'ok',
+            'volume': {
+                'total_posts': window['item_count'],
+                'avg_engagement': window['avg_engagement'],
+                'max_engagement': top_items[0]['engagement'] if top_items else 0.0,
+                'active_communities': len(window['by_subreddit'])
+            },
+            'sentiment_distribution': window['sentiment_distribution'],
+            'sentiment_trend': sentiment_trend,
+            'trend_indicators': trend_indicators,
+            'weighted_sentiment': window['weighted_sentiment'],
+            'key_themes': {theme: float(percentage) for theme, percentage in theme_percentages.items()},
+            'top_subreddits': dict(list(window['by_subreddit'].items())[:5]),
+            'top_posts': [
+                {
+                    'subreddit': item['subreddit'],
+                    'title': item['title'],
+                    'content': item['text'],
+                    'engagement': float(item['engagement'])
+                }
+                for item in top_items[:3]
+            ],
+            'peak_hours': [int(hour) for hour in hourly_activity.nlargest(3).index]
+        }
 
-    def generate_daily_summary(self):
-        """Generate a summary of the last 24 hours of analysis"""
+    def build_daily_summary(self):
+        """
+        Build the structured summary of the last 24 hours of analysis.
+        Returns a dict whose 'status' is 'ok', 'no_data', 'no_bonk_posts' or 'error'.
+        """
+        report_date = datetime.now().strftime('%Y-%m-%d')
         try:
-            # Get all summary files from the last 24 hours
-            data_dir = 'data/analyzed'
-            cutoff_time = datetime.now() - timedelta(days=1)
-            summary_files = []
+            # The hourly job keeps running aggregates; only rescan summaries without them
+            summary = self.summary_from_aggregates(report_date)
+            if summary is not None:
+                return summary
             
-            for file in os.listdir(data_dir):
-                if file.endswith('_summary.csv'):
-                    file_time = datetime.strptime(file.split('_')[2], '%Y%m%d')
-                    if file_time >= cutoff_time:
-                        summary_files.append(os.path.join(data_dir, file))
+            # Get summary partitions from the last 24 hours
+            cutoff_time = datetime.now() - timedelta(days=1)
+            dates = [
+                date for date in self.store.partitions('analyzed/summary')
+                if datetime.strptime(date, '%Y-%m-%d') >= cutoff_time
+            ]
             
-            if not summary_files:
-                return "No data available for the last 24 hours"
+            if not dates:
+                return {'date': report_date, 'status': 'no_data',
+                        'message': "No data available for the last 24 hours"}
             
             # Combine all summaries
-            all_summaries = []
-            for file in summary_files:
-                df = pd.read_csv(file)
-                for col in ['sentiment_distribution', 'weighted_sentiment']:
-                    if isinstance(df[col].iloc[0], str):
-                        df[col] = df[col].apply(json.loads)
-                all_summaries.append(df)
-            
-            combined_df = pd.concat(all_summaries)
+            combined_df = self.store.read('analyzed/summary', dates=dates)
             
             # Filter for Bonk-related posts
             bonk_df = self.filter_bonk_posts(combined_df)
             
             if len(bonk_df) == 0:
-                return "No Bonk-related posts found in the last 24 hours"
+                return {'date': report_date, 'status': 'no_bonk_posts',
+                        'message': "No Bonk-related posts found in the last 24 hours"}
             
-            # Calculate aggregate metrics
-            total_posts = len(bonk_df)
-            avg_engagement = bonk_df['total_engagement'].mean()
-            max_engagement = bonk_df['total_engagement'].max()
-            
-            # Calculate average sentiment distributions
-            sentiment_dist = {
-                'positive': 0,
-                'neutral': 0,
-                'negative': 0
-            }
-            weighted_sent = {
-                'positive': 0,
-                'neutral': 0,
-                'negative': 0
-            }
-            
-            for _, row in bonk_df.iterrows():
-                for sentiment in ['positive', 'neutral', 'negative']:
-                    sentiment_dist[sentiment] += row['sentiment_distribution'][sentiment]
-                    weighted_sent[sentiment] += row['weighted_sentiment'][sentiment]
-            
-            # Average the sentiments
-            n_rows = len(bonk_df)
-            for k in sentiment_dist:
-                sentiment_dist[k] /= n_rows
-                weighted_sent[k] /= n_rows
+            # Average sentiment distributions over the flattened columns
+            sentiment_dist = dict(zip(SENTIMENTS, bonk_df[_flat_columns('sentiment_distribution')].mean().tolist()))
+            weighted_sent = dict(zip(SENTIMENTS, bonk_df[_flat_columns('weighted_sentiment')].mean().tolist()))
             
             # Get sentiment trend
             sentiment_trend = self.get_sentiment_trend(bonk_df)
+            arrows = {1: '↑', -1: '↓', 0: '→'}
             trend_indicators = {
-                'positive': '↑' if sentiment_trend and sentiment_trend['positive'] > 0 else '↓' if sentiment_trend and sentiment_trend['positive'] < 0 else '→',
-                'neutral': '↑' if sentiment_trend and sentiment_trend['neutral'] > 0 else '↓' if sentiment_trend and sentiment_trend['neutral'] < 0 else '→',
-                'negative': '↑' if sentiment_trend and sentiment_trend['negative'] > 0 else '↓' if sentiment_trend and sentiment_trend['negative'] < 0 else '→'
+                sentiment: arrows[int(np.sign(sentiment_trend[sentiment]))] if sentiment_trend else '→'
+                for sentiment in SENTIMENTS
             }
             
             # Get top posts
             top_posts = self.get_top_posts(bonk_df)
             
-            # Analyze key topics and themes
-            key_themes = self.summarize_key_topics(bonk_df)
+            top_subreddits = bonk_df.groupby('subreddit')['total_tweets'].sum().sort_values(ascending=False).head(5)
+            hourly_activity = bonk_df.groupby(pd.to_datetime(bonk_df['timestamp']).dt.hour)['total_tweets'].sum()
+            
+            return {
+                'date': report_date,
+                'status': 'ok',
+                'volume': {
+                    'total_posts': int(len(bonk_df)),
+                    'avg_engagement': float(bonk_df['total_engagement'].mean()),
+                    'max_engagement': bonk_df['total_engagement'].max().item(),
+                    'active_communities': int(bonk_df['subreddit'].nunique())
+                },
+                'sentiment_distribution': sentiment_dist,
+                'sentiment_trend': sentiment_trend,
+                'trend_indicators': trend_indicators,
+                'weighted_sentiment': weighted_sent,
+                # Analyze key topics and themes
+                'key_themes': self.summarize_key_topics(bonk_df),
+                'top_subreddits': {name: int(count) for name, count in top_subreddits.items()},
+                'top_posts': [
+                    {
+                        'subreddit': post['subreddit'],
+                        'title': post['title'],
+                        'content': post['content'],
+                        'engagement': float(post['engagement'])
+                    }
+                    for post in top_posts[['subreddit', 'title', 'content', 'engagement']].to_dict(orient='records')
+                ],
+                'peak_hours': [int(hour) for hour in hourly_activity.nlargest(3).index]
+            }
             
-            # Format the summary
-            summary = f"""
+        except Exception as e:
+            return {'date': report_date, 'status': 'error', 'message': f"Error generating summary: {str(e)}"}
+
+    def render_text(self, summary):
+        """Render a structured summary as the plain-text report"""
+        if summary['status'] != 'ok':
+            return summary['message']
+        
+        volume = summary['volume']
+        sentiment_dist = summary['sentiment_distribution']
+        weighted_sent = summary['weighted_sentiment']
+        trend_indicators = summary['trend_indicators']
+        top_subreddits = pd.Series(summary['top_subreddits'], name='total_tweets', dtype='int64').rename_axis('subreddit')
+        top_posts = pd.DataFrame(summary['top_posts'], columns=['subreddit', 'title', 'content'])
+        
+        return f"""
 Daily Bonk Sentiment Summary
-{datetime.now().strftime('%Y-%m-%d')}
+{summary['date']}
 
 VOLUME METRICS:
-Bonk-Related Posts/Comments: {total_posts:,}
-Average Engagement Score: {avg_engagement:.2f}
-Peak Engagement Score: {max_engagement:,}
-Active Communities: {len(bonk_df['subreddit'].unique())}
+Bonk-Related Posts/Comments: {volume['total_posts']:,}
+Average Engagement Score: {volume['avg_engagement']:.2f}
+Peak Engagement Score: {volume['max_engagement']:,}
+Active Communities: {volume['active_communities']}
 
 SENTIMENT ANALYSIS:
 Raw Sentiment Distribution (with 24h trend):
@@ -196,83 +261,148 @@ Engagement-Weighted Sentiment:
 - Negative: {weighted_sent['negative']:.1%}
 
 KEY DISCUSSION THEMES:
-{chr(10).join(f"- {theme.title()}: {percentage:.1f}% of discussions" for theme, percentage in key_themes.items())}
+{chr(10).join(f"- {theme.title()}: {percentage:.1f}% of discussions" for theme, percentage in summary['key_themes'].items())}
 
 COMMUNITY ACTIVITY:
 Most Active Subreddits (Bonk posts):
-{bonk_df.groupby('subreddit')['total_tweets'].sum().sort_values(ascending=False).head(5).to_string()}
+{top_subreddits.to_string()}
 
 TOP BONK POSTS BY ENGAGEMENT:
-{top_posts[['subreddit', 'title', 'content']].to_string(index=False, max_colwidth=70)}
+{top_posts.to_string(index=False, max_colwidth=70)}
 
 HOURLY ACTIVITY:
-Peak Hours (UTC): {bonk_df.groupby(pd.to_datetime(bonk_df['timestamp']).dt.hour)['total_tweets'].sum().nlargest(3).index.tolist()}
+Peak Hours (UTC): {summary['peak_hours']}
 
 View detailed analysis at: http://localhost:8080
 """
-            return summary
-            
-        except Exception as e:
-            return f"Error generating summary: {str(e)}"
 
-    def send_daily_summary(self):
-        """Send the daily summary via email and Discord"""
-        summary_text = self.generate_daily_summary()
-        success = True
+    def render_html(self, summary):
+        """Render a structured summary as an HTML email body"""
+        if summary['status'] != 'ok':
+            return f"<p>{html.escape(summary['message'])}</p>"
+        
+        def rows(items):
+            return ''.join(
+                f"<tr><td>{html.escape(str(label))}</td><td>{html.escape(str(value))}</td></tr>"
+                for label, value in items
+            )
+        
+        volume = summary['volume']
+        sentiment_rows = [
+            (sentiment.title(),
+             f"{summary['sentiment_distribution'][sentiment]:.1%} {summary['trend_indicators'][sentiment]}")
+            for sentiment in SENTIMENTS
+        ]
+        weighted_rows = [
+            (sentiment.title(), f"{summary['weighted_sentiment'][sentiment]:.1%}") for sentiment in SENTIMENTS
+        ]
+        post_rows = ''.join(
+            f"<tr><td>r/{html.escape(post['subreddit'])}</td><td>{html.escape(post['title'])}</td>"
+            f"<td>{html.escape(str(post['content'])[:200])}</td><td>{post['engagement']:,.0f}</td></tr>"
+            for post in summary['top_posts']
+        )
         
-        # Send via email if configured
-        if all([self.smtp_username, self.smtp_password, self.recipient_emails]):
-            email_success = self.send_email_summary()
-            success = success and email_success
-        else:
+        return f"""<html><body>
+<h2>Daily Bonk Sentiment Summary - {summary['date']}</h2>
+<h3>Volume Metrics</h3>
+<table>{rows([
+    ('Bonk-Related Posts/Comments', f"{volume['total_posts']:,}"),
+    ('Average Engagement Score', f"{volume['avg_engagement']:.2f}"),
+    ('Peak Engagement Score', f"{volume['max_engagement']:,}"),
+    ('Active Communities', volume['active_communities'])
+])}</table>
+<h3>Raw Sentiment Distribution (with 24h trend)</h3>
+<table>{rows(sentiment_rows)}</table>
+<h3>Engagement-Weighted Sentiment</h3>
+<table>{rows(weighted_rows)}</table>
+<h3>Key Discussion Themes</h3>
+<table>{rows((theme.title(), f"{percentage:.1f}% of discussions") for theme, percentage in summary['key_themes'].items())}</table>
+<h3>Most Active Subreddits</h3>
+<table>{rows((f"r/{name}", count) for name, count in summary['top_subreddits'].items())}</table>
+<h3>Top Bonk Posts by Engagement</h3>
+<table><tr><th>Subreddit</th><th>Title</th><th>Content</th><th>Engagement</th></tr>{post_rows}</table>
+<p>Peak Hours (UTC): {', '.join(str(hour) for hour in summary['peak_hours'])}</p>
+<p><a href="http://localhost:8080">View detailed analysis</a></p>
+</body></html>"""
+
+    def render_json(self, summary):
+        """Render a structured summary as JSON"""
+        return json.dumps(summary, indent=2, ensure_ascii=False)
+
+    def get_rendered_summary(self):
+        """
+        Build today's summary once and render it for every sink. Renders are
+        memoized per day key and data version, so repeated sends do not rescan the data.
+        """
+        day_key = datetime.now().strftime('%Y-%m-%d')
+        memo_key = (day_key, self.summary_index.version())
+        if memo_key in self._rendered:
+            return self._rendered[memo_key]
+        
+        summary = self.build_daily_summary()
+        text = self.render_text(summary)
+        rendered = {
+            'summary': summary,
+            'text': text,
+            'discord': self.discord.format_for_discord(text),
+            'html': self.render_html(summary),
+            'json': self.render_json(summary)
+        }
+        
+        # Errors are not memoized so the next call retries
+        if summary['status'] != 'error':
+            self._rendered = {memo_key: rendered}
+        return rendered
+
+    def generate_daily_summary(self):
+        """Generate a summary of the last 24 hours of analysis"""
+        return self.get_rendered_summary()['text']
+
+    def send_daily_summary(self, wait=True):
+        """
+        Send the daily summary via email and Discord. With wait=False the delivery
+        is queued on the background dispatcher and a Future of {sink: success} is returned.
+        """
+        rendered = self.get_rendered_summary()
+        
+        if not self.email.is_configured:
             print("Email credentials not configured. Skipping email notification.")
-            self.save_summary_to_file()
+            self.save_summary_to_file(rendered)
+        if not self.discord.webhook_urls:
+            print("Discord webhook URL not configured. Skipping Discord notification.")
         
-        # Send to Discord if configured
-        discord_success = self.discord.send_report(summary_text)
-        success = success and discord_success
+        if not wait:
+            return self.dispatcher.submit(rendered)
         
-        return success
+        results = self.dispatcher.dispatch(rendered)
+        return bool(results) and all(results.values())
 
-    def send_email_summary(self):
+    def send_email_summary(self, rendered=None):
         """Send the daily summary via email"""
-        try:
-            summary_text = self.generate_daily_summary()
-            
-            msg = MIMEMultipart()
-            msg['Subject'] = f'Bonk Sentiment Daily Summary - {datetime.now().strftime("%Y-%m-%d")}'
-            msg['From'] = self.smtp_username
-            msg['To'] = ', '.join(self.recipient_emails)
-            
-            msg.attach(MIMEText(summary_text, 'plain'))
-            
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.smtp_username, self.smtp_password)
-                server.send_message(msg)
-            
+        rendered = rendered or self.get_rendered_summary()
+        results = [self.email.send(recipient, rendered) for recipient in self.email.recipient_emails]
+        if results and all(results):
             print("Daily summary email sent successfully")
-            return True
-            
-        except Exception as e:
-            print(f"Error sending email: {str(e)}")
-            return False
+        return bool(results) and all(results)
 
-    def save_summary_to_file(self):
+    def save_summary_to_file(self, rendered=None):
         """Save the daily summary to a file if email sending fails"""
         try:
-            summary_text = self.generate_daily_summary()
+            rendered = rendered or self.get_rendered_summary()
             
             os.makedirs('data/summaries', exist_ok=True)
-            filename = f'daily_summary_{datetime.now().strftime("%Y%m%d")}.txt'
-            filepath = os.path.join('data/summaries', filename)
+            base_filename = f'daily_summary_{datetime.now().strftime("%Y%m%d")}'
+            filepath = os.path.join('data/summaries', f'{base_filename}.txt')
             
             with open(filepath, 'w') as f:
-                f.write(summary_text)
+                f.write(rendered['text'])
+            
+            with open(os.path.join('data/summaries', f'{base_filename}.json'), 'w') as f:
+                f.write(rendered['json'])
             
             print(f"Daily summary saved to {filepath}")
             return True
             
         except Exception as e:
             print(f"Error saving summary: {str(e)}")
-            return False 
\ No newline at end of file
+            return False
@@ -0,0 +1,40 @@
+import re
+
+# Common themes to look for
+THEMES = {
+    'price': ['price', 'ATH', 'support', 'resistance', '$'],
+    'technical': ['trend', 'momentum', 'volume', 'analysis'],
+    'community': ['holder', 'community', 'governance', 'milestone'],
+    'development': ['feature', 'roadmap', 'update', 'partnership'],
+    'market': ['exchange', 'listing', 'trading', 'market']
+}
+
+def _keyword_pattern(keyword):
+    """
+    Alphabetic keywords match at the start of a word, as stems of any word
+    ('trending', 'updated', 'holders'), so 'ATH' does not match inside 'path'
+    or 'death'; symbols such as '$' match anywhere
+    """
+    if keyword.isalpha():
+        return rf"\b{re.escape(keyword)}\w*"
+    return re.escape(keyword)
+
+# One pattern for all themes. The zero-width lookahead lets extractall report every
+# theme whose keyword starts at each position, so overlapping keywords are not lost.
+THEME_PATTERN = re.compile(
+    '(?=' + '|'.join(
+        f"(?P<{theme}>{'|'.join(_keyword_pattern(keyword) for keyword in keywords)})"
+        for theme, keywords in THEMES.items()
+    ) + ')',
+    re.IGNORECASE
+)
+
+def tag_themes(texts):
+    """Boolean rows x themes frame of whether any theme keyword occurs in each text"""
+    texts = texts.astype(str).reset_index(drop=True)
+    matches = texts.str.extractall(THEME_PATTERN)
+    return (
+        matches.notna().groupby(level=0).any()
+        .reindex(index=texts.index, columns=list(THEMES), fill_value=False)
+        .astype(bool)
+    )
@@ -0,0 +1,241 @@
+import os
+import hashlib
+import sqlite3
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from ..storage.file_lock import file_lock
+from ..pipeline.metrics import get_registry
+
+# SQLite limits the number of bound parameters per statement
+QUERY_CHUNK_SIZE = 500
+
+# Token ids and lengths are stored as raw little-endian int32
+TOKEN_DTYPE = np.dtype('<i4')
+
+# The tokenizer loaded in each tokenization worker process
+_worker_tokenizer = None
+
+def tokenize_texts(tokenizer, texts, max_length):
+    """Tokenize texts with truncation, returning one int32 array of input ids per text"""
+    if not texts:
+        return []
+    encoded = tokenizer(texts, truncation=True, max_length=max_length)
+    return [np.asarray(ids, dtype=TOKEN_DTYPE) for ids in encoded['input_ids']]
+
+def _init_worker(model_name):
+    global _worker_tokenizer
+    from transformers import AutoTokenizer
+    _worker_tokenizer = AutoTokenizer.from_pretrained(model_name)
+
+def _tokenize_shard(texts, max_length):
+    return tokenize_texts(_worker_tokenizer, texts, max_length)
+
+class TokenStore:
+    """
+    Append-only store of tokenized texts for one tokenizer and truncation length.
+
+    The input ids of every stored text are concatenated in ids.int32 and
+    their lengths kept in lengths.int32, both plain int32 arrays readable
+    without parsing, e.g. np.memmap(path, dtype='<i4', mode='r'). A SQLite
+    index maps each text's hash to its row. Texts are tokenized once, so
+    re-scoring them with another backend, model version or threshold only
+    pays for inference.
+
+    Several processes (the scheduler and the API) may share a store: appends
+    take an exclusive file lock and start from the rows on disk, and rows
+    appended by other processes are picked up before they are served.
+    """
+
+    def __init__(self, tokenizer, model_name, max_length=128, path=None, workers=None):
+        self.tokenizer = tokenizer
+        self.model_name = model_name
+        self.max_length = max_length
+
+        root = path or os.getenv('TOKEN_STORE_PATH', 'data/cache/tokens')
+        self.path = os.path.join(root, f"{model_name.replace('/', '__')}__{max_length}")
+        self.ids_path = os.path.join(self.path, 'ids.int32')
+        self.lengths_path = os.path.join(self.path, 'lengths.int32')
+        self.lock_path = os.path.join(self.path, 'append.lock')
+        os.makedirs(self.path, exist_ok=True)
+
+        # Worker processes tokenize large batches of new texts in parallel
+        self.workers = workers if workers is not None else int(os.getenv('TOKENIZE_WORKERS', '0'))
+        self._executor = None
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(self.path, 'index.sqlite'), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS token_rows (
+                key TEXT PRIMARY KEY,
+                row INTEGER NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+        with self._file_lock():
+            self._offsets = self._recover()
+        self._ids = None
+
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(text):
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def _file_lock(self):
+        """Exclusive lock across every process appending to this store"""
+        return file_lock(self.lock_path)
+
+    def _recover(self):
+        """
+        Drop a partially appended tail left by an interrupted write and return
+        the row offsets into the ids array
+        """
+        for path in [self.ids_path, self.lengths_path]:
+            if not os.path.exists(path):
+                open(path, 'wb').close()
+
+        lengths_bytes = os.path.getsize(self.lengths_path)
+        lengths = np.fromfile(self.lengths_path, dtype=TOKEN_DTYPE, count=lengths_bytes // TOKEN_DTYPE.itemsize)
+        offsets = np.concatenate([[0], np.cumsum(lengths, dtype=np.int64)])
+
+        # Ids are appended before lengths, so rows whose ids are missing are dropped
+        stored_ids = os.path.getsize(self.ids_path) // TOKEN_DTYPE.itemsize
+        rows = int(np.searchsorted(offsets, stored_ids, side='right')) - 1
+        offsets = offsets[:rows + 1]
+
+        with open(self.lengths_path, 'r+b') as f:
+            f.truncate(rows * TOKEN_DTYPE.itemsize)
+        with open(self.ids_path, 'r+b') as f:
+            f.truncate(int(offsets[-1]) * TOKEN_DTYPE.itemsize)
+
+        # Index entries are committed last, but may point past a truncated tail
+        self._conn.execute('DELETE FROM token_rows WHERE row >= ?', (rows,))
+        self._conn.commit()
+        return offsets
+
+    def _refresh(self):
+        """Extend the row offsets with rows other processes have appended since"""
+        rows = len(self._offsets) - 1
+        stored_rows = os.path.getsize(self.lengths_path) // TOKEN_DTYPE.itemsize
+        if stored_rows <= rows:
+            return
+        # Lengths are appended after their ids, so every counted row's ids are on disk
+        lengths = np.fromfile(self.lengths_path, dtype=TOKEN_DTYPE, count=stored_rows - rows,
+                              offset=rows * TOKEN_DTYPE.itemsize)
+        self._offsets = np.concatenate([self._offsets, self._offsets[-1] + np.cumsum(lengths, dtype=np.int64)])
+
+    def _lookup(self, keys):
+        unique_keys = list(dict.fromkeys(keys))
+        rows = {}
+        for start in range(0, len(unique_keys), QUERY_CHUNK_SIZE):
+            chunk = unique_keys[start:start + QUERY_CHUNK_SIZE]
+            placeholders = ','.join('?' * len(chunk))
+            rows.update(self._conn.execute(
+                f'SELECT key, row FROM token_rows WHERE key IN ({placeholders})', chunk
+            ).fetchall())
+        return rows
+
+    def _tokenize(self, texts):
+        if self.workers <= 0 or len(texts) < self.workers * 64:
+            return tokenize_texts(self.tokenizer, texts, self.max_length)
+
+        if self._executor is None:
+            # Forking after torch has started threads can deadlock, so workers are spawned
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(self.model_name,)
+            )
+        shard_size = -(-len(texts) // (self.workers * 4))
+        shards = [texts[start:start + shard_size] for start in range(0, len(texts), shard_size)]
+        futures = [self._executor.submit(_tokenize_shard, shard, self.max_length) for shard in shards]
+        return [ids for future in futures for ids in future.result()]
+
+    def _append(self, keys, token_ids):
+        """Append rows after those on disk; the caller holds the file lock and has refreshed"""
+        first_row = len(self._offsets) - 1
+        lengths = np.array([len(ids) for ids in token_ids], dtype=TOKEN_DTYPE)
+
+        # Ids first, then lengths, then the index, so a crash leaves at most an unindexed tail,
+        # which the next append overwrites
+        with open(self.ids_path, 'r+b') as f:
+            f.seek(int(self._offsets[-1]) * TOKEN_DTYPE.itemsize)
+            f.truncate()
+            f.write(np.concatenate(token_ids).astype(TOKEN_DTYPE, copy=False).tobytes())
+        with open(self.lengths_path, 'ab') as f:
+            f.write(lengths.tobytes())
+
+        rows = {key: first_row + i for i, key in enumerate(keys)}
+        self._conn.executemany('INSERT OR REPLACE INTO token_rows (key, row) VALUES (?, ?)', rows.items())
+        self._conn.commit()
+
+        self._offsets = np.concatenate([self._offsets, self._offsets[-1] + np.cumsum(lengths, dtype=np.int64)])
+        return rows
+
+    def _mapped_ids(self):
+        if self._offsets[-1] == 0:
+            return np.zeros(0, dtype=TOKEN_DTYPE)
+        # Remap after appends; views handed out earlier keep the old mapping alive
+        if self._ids is None or len(self._ids) < self._offsets[-1]:
+            self._ids = np.asarray(np.memmap(self.ids_path, dtype=TOKEN_DTYPE, mode='r'))
+        return self._ids
+
+    def encode(self, texts):
+        """
+        Return the int32 input ids of each text as views into the memory-mapped
+        store, tokenizing and appending only texts that are not stored yet
+        """
+        keys = [self.make_key(text) for text in texts]
+        with self._lock:
+            rows = self._lookup(keys)
+
+            missing = {}
+            for key, text in zip(keys, texts):
+                if key not in rows:
+                    missing.setdefault(key, text)
+            if missing:
+                # Tokenize before locking, so other processes are only held up for the write
+                tokenized = dict(zip(missing.keys(), self._tokenize(list(missing.values()))))
+                with self._file_lock():
+                    self._refresh()
+                    # Another process may have appended some of these texts meanwhile
+                    rows.update(self._lookup(list(missing.keys())))
+                    new_keys = [key for key in missing if key not in rows]
+                    if new_keys:
+                        rows.update(self._append(new_keys, [tokenized[key] for key in new_keys]))
+            elif rows and max(rows.values()) >= len(self._offsets) - 1:
+                # Indexed rows are only committed after their ids and lengths are on disk
+                self._refresh()
+
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+            get_registry().inc('bonk_token_store_lookups_total', len(keys) - len(missing), result='hit')
+            get_registry().inc('bonk_token_store_lookups_total', len(missing), result='miss')
+
+            if not keys:
+                return []
+            ids = self._mapped_ids()
+            offsets = self._offsets
+            return [ids[offsets[row]:offsets[row + 1]] for row in (rows[key] for key in keys)]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'rows': len(self._offsets) - 1,
+                'tokens': int(self._offsets[-1])
+            }
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        self._conn.close()
@@ -1,13 +1,33 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Query
+from fastapi.responses import StreamingResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 from datetime import datetime
-import pandas as pd
-import os
 import json
+import base64
+import pyarrow.dataset as ds
+from ..analysis.inference_service import get_inference_service
+from ..analysis.rolling_aggregates import RollingAggregates
+from ..storage.columnar_store import ColumnarStore, STRUCT_SEPARATOR, nest_record, to_records
+from ..storage.summary_index import SummaryIndex
+from ..pipeline.metrics import get_registry
+from .response_cache import ResponseCache
 
 app = FastAPI(title="Bonk Sentiment Tracker API")
+store = ColumnarStore()
+summary_index = SummaryIndex()
+rolling_aggregates = RollingAggregates()
+
+# Inference run by the API is labelled apart from the pipeline's snapshot it also serves
+metrics_registry = get_registry()
+metrics_registry.process = 'api'
+
+# Rolling windows served from the hourly aggregates
+ROLLING_WINDOWS = {'1h': 1, '6h': 6, '24h': 24, '7d': 24 * 7}
+
+# Parsed responses are reused until the analyzer writes a new run
+response_cache = ResponseCache(summary_index.version)
 
 # Enable CORS
 app.add_middleware(
@@ -25,82 +45,191 @@ class SentimentSummary(BaseModel):
     weighted_sentiment: dict
     total_engagement: float
 
+class AnalyzeRequest(BaseModel):
+    texts: list[str]
+
+@app.post("/api/analyze")
+def analyze_texts(request: AnalyzeRequest):
+    """Score texts with the API process's long-lived sentiment model"""
+    try:
+        return get_inference_service().analyze_texts(request.texts)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/model-metrics")
+async def get_model_metrics():
+    """Get cold-start and steady-state inference latency for the API process"""
+    return get_inference_service().get_metrics()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Per-stage timings, counters and memory high-water marks in the Prometheus text format"""
+    return PlainTextResponse(
+        metrics_registry.render([metrics_registry.load_saved()]),
+        media_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
 @app.get("/api/latest-summary")
-async def get_latest_summary():
+async def get_latest_summary(request: Request):
     """Get the most recent sentiment analysis summary"""
+    def load():
+        summaries = summary_index.latest()
+        if not summaries:
+            raise HTTPException(status_code=404, detail="No summaries found")
+        return SentimentSummary(**summaries[0])
+    
     try:
-        data_dir = 'data/analyzed'
-        if not os.path.exists(data_dir):
-            raise HTTPException(status_code=404, detail="No analysis data found")
-        
-        # Find the most recent summary file
-        summary_files = [f for f in os.listdir(data_dir) if f.endswith('_summary.csv')]
-        if not summary_files:
-            raise HTTPException(status_code=404, detail="No summary files found")
-        
-        latest_file = sorted(summary_files, reverse=True)[0]
-        df = pd.read_csv(os.path.join(data_dir, latest_file))
-        
-        # Convert the first row to a dictionary
-        summary_dict = df.iloc[0].to_dict()
-        
-        # Parse nested JSON strings if they exist
-        for key in ['sentiment_distribution', 'weighted_sentiment']:
-            if isinstance(summary_dict[key], str):
-                summary_dict[key] = json.loads(summary_dict[key])
-        
-        return SentimentSummary(**summary_dict)
+        return response_cache.respond(request, 'latest-summary', load)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/historical-summaries/{days}")
-async def get_historical_summaries(days: int = 7):
+async def get_historical_summaries(request: Request, days: int = 7):
     """Get historical sentiment summaries for the specified number of days"""
-    try:
-        data_dir = 'data/analyzed'
-        if not os.path.exists(data_dir):
-            raise HTTPException(status_code=404, detail="No analysis data found")
-        
-        summary_files = [f for f in os.listdir(data_dir) if f.endswith('_summary.csv')]
-        if not summary_files:
-            raise HTTPException(status_code=404, detail="No summary files found")
-        
-        # Sort files by date and take the last 'days' number of files
-        sorted_files = sorted(summary_files, reverse=True)[:days]
-        
-        summaries = []
-        for file in sorted_files:
-            df = pd.read_csv(os.path.join(data_dir, file))
-            summary_dict = df.iloc[0].to_dict()
-            
-            # Parse nested JSON strings
-            for key in ['sentiment_distribution', 'weighted_sentiment']:
-                if isinstance(summary_dict[key], str):
-                    summary_dict[key] = json.loads(summary_dict[key])
-            
-            summaries.append(summary_dict)
-        
+    def load():
+        # The last 'days' number of runs, newest first
+        summaries = summary_index.latest(days)
+        if not summaries:
+            raise HTTPException(status_code=404, detail="No summaries found")
         return summaries
+    
+    try:
+        return response_cache.respond(request, f'historical-summaries/{days}', load)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/rolling/{window}")
+async def get_rolling_window(request: Request, window: str):
+    """Get sentiment aggregates for a rolling 1h, 6h, 24h or 7d window"""
+    if window not in ROLLING_WINDOWS:
+        raise HTTPException(status_code=404, detail=f"Unknown window, expected one of {list(ROLLING_WINDOWS)}")
+    
+    def load():
+        return rolling_aggregates.window(ROLLING_WINDOWS[window])
+    
+    try:
+        # Windows slide by the hour, so the hour is part of the key
+        window_key = f"rolling/{window}/{datetime.now().strftime('%Y%m%d%H')}"
+        return response_cache.respond(request, window_key, load)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _encode_cursor(file_index, row_offset):
+    return base64.urlsafe_b64encode(f"{file_index}:{row_offset}".encode()).decode()
+
+def _decode_cursor(cursor):
+    if not cursor:
+        return 0, 0
+    try:
+        file_index, row_offset = base64.urlsafe_b64decode(cursor.encode()).decode().split(':')
+        return int(file_index), int(row_offset)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _detailed_scan_args(paths, columns, sentiment, subreddit, source=None):
+    """Resolve requested columns and filters against the schema of the day's files"""
+    schema_names = store.unified_schema(paths).names
+    
+    projection = None
+    if columns:
+        projection = []
+        for name in columns.split(','):
+            name = name.strip()
+            # A nested column like 'metrics' selects all of its flattened fields
+            matches = [field for field in schema_names
+                       if field == name or field.startswith(f"{name}{STRUCT_SEPARATOR}")]
+            if not matches:
+                raise HTTPException(status_code=400, detail=f"Unknown column {name}")
+            projection.extend(matches)
+    
+    # Subreddits are stored as the item's channel since items were normalized across sources
+    channel_field = 'channel' if 'channel' in schema_names else 'subreddit'
+    
+    expression = None
+    for field, value in [('sentiment', sentiment), (channel_field, subreddit), ('source', source)]:
+        if value is None:
+            continue
+        if field not in schema_names:
+            raise HTTPException(status_code=400, detail=f"Analysis data has no {field} column to filter on")
+        condition = ds.field(field) == value
+        expression = condition if expression is None else expression & condition
+    
+    return projection, expression
+
+def _stream_ndjson(paths, projection, expression, start):
+    """Yield one JSON line per row, reading the files a record batch at a time"""
+    for _, _, batch in store.scan_files('analyzed/detailed', paths, projection, expression, start):
+        yield ''.join(json.dumps(nest_record(record), default=str) + '\n' for record in batch.to_pylist())
+
 @app.get("/api/detailed-analysis/{date}")
-async def get_detailed_analysis(date: str):
-    """Get detailed sentiment analysis for a specific date"""
+async def get_detailed_analysis(
+    request: Request,
+    date: str,
+    limit: int = Query(None, ge=1, le=1000),
+    cursor: str = None,
+    columns: str = None,
+    sentiment: str = None,
+    subreddit: str = None,
+    source: str = None,
+    format: str = Query('json', pattern='^(json|ndjson)$')
+):
+    """
+    Get detailed sentiment analysis for a specific date (YYYY-MM-DD or YYYYMMDD).
+
+    Without query parameters the whole day is returned as a list. With `limit`,
+    `cursor`, `columns` (comma-separated) or `sentiment`/`subreddit`/`source` filters the
+    response is {"items": [...], "next_cursor": ...}; pass next_cursor back for the
+    following page. format=ndjson streams matching rows as newline-delimited JSON.
+    """
+    if len(date) == 8 and date.isdigit():
+        date = f"{date[:4]}-{date[4:6]}-{date[6:]}"
+    
     try:
-        data_dir = 'data/analyzed'
-        if not os.path.exists(data_dir):
-            raise HTTPException(status_code=404, detail="No analysis data found")
+        detailed_paths = summary_index.detailed_paths(date)
+        if not detailed_paths:
+            raise HTTPException(status_code=404, detail=f"No analysis found for date {date}")
         
-        # Find the detailed analysis file for the specified date
-        detailed_file = f"sentiment_analysis_{date}_detailed.csv"
-        file_path = os.path.join(data_dir, detailed_file)
+        start = _decode_cursor(cursor)
+        projection, expression = _detailed_scan_args(detailed_paths, columns, sentiment, subreddit, source)
         
-        if not os.path.exists(file_path):
-            raise HTTPException(status_code=404, detail=f"No analysis found for date {date}")
+        if format == 'ndjson':
+            return StreamingResponse(
+                _stream_ndjson(detailed_paths, projection, expression, start),
+                media_type='application/x-ndjson'
+            )
+        
+        if limit is None and start == (0, 0) and projection is None and expression is None:
+            return response_cache.respond(
+                request,
+                f'detailed-analysis/{date}',
+                lambda: to_records(store.read('analyzed/detailed', files=detailed_paths))
+            )
+        
+        def load_page():
+            items = []
+            next_cursor = None
+            for file_index, row_offset, batch in store.scan_files(
+                'analyzed/detailed', detailed_paths, projection, expression, start
+            ):
+                records = batch.to_pylist()
+                if limit is not None:
+                    records = records[:limit - len(items)]
+                items.extend(nest_record(record) for record in records)
+                if limit is not None and len(items) >= limit:
+                    next_cursor = _encode_cursor(file_index, row_offset + len(records))
+                    break
+            return {'items': items, 'next_cursor': next_cursor}
         
-        df = pd.read_csv(file_path)
-        return df.to_dict(orient='records')
+        page_key = f'detailed-analysis/{date}?{request.url.query}'
+        return response_cache.respond(request, page_key, load_page)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
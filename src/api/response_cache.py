@@ -0,0 +1,51 @@
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+class ResponseCache:
+    """In-memory cache of serialized endpoint responses, cleared whenever the data version changes"""
+
+    def __init__(self, version_source, max_entries=256):
+        self.version_source = version_source
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, compute):
+        """Return (body, etag) for key, calling compute() to build the payload on a miss"""
+        version = self.version_source()
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        body = json.dumps(jsonable_encoder(compute())).encode('utf-8')
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+
+        with self._lock:
+            self.misses += 1
+            if version == self._version:
+                self._entries[key] = (body, etag)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return body, etag
+
+    def respond(self, request: Request, key, compute):
+        """JSON response with an ETag, or 304 if the client already has this version"""
+        body, etag = self.get(key, compute)
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+
+        if_none_match = request.headers.get('if-none-match', '')
+        if etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*':
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type='application/json', headers=headers)
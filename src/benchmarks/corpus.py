@@ -0,0 +1,367 @@
+import os
+import json
+import random
+import argparse
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from ..analysis.relevance import RelevanceMatcher
+
+SUBREDDITS = ['solana', 'CryptoCurrency', 'SatoshiStreetBets', 'CryptoMarkets', 'memecoin']
+
+# Filler words appended to generated texts so items are not all exact duplicates
+FILLER_WORDS = (
+    "honestly imo lol ngl fr though still just really maybe probably definitely chart volume holders "
+    "wallet whale dip pump moon rally bearish bullish support resistance breakout listing airdrop burn "
+    "community dev update roadmap hype fud hodl gm wagmi ser anon week today tomorrow"
+).split()
+
+# Items the pre-filter settles without the model
+TRIVIAL_TEXTS = ['', '[deleted]', '[removed]', 'https://example.com/chart.png', '\U0001F680\U0001F680\U0001F680']
+
+class CorpusGenerator:
+    """
+    Seedable generator of synthetic Bonk and non-Bonk Reddit data: posts and
+    comments as RedditScraper rows, raw listing JSON as served by Reddit, and
+    summary rows for the report. The same seed always yields the same corpus
+    for the same time window.
+    """
+
+    def __init__(self, seed=None, bonk_fraction=0.3, comment_fraction=0.6, trivial_fraction=0.05,
+                 subreddits=None, end=None, hours=24):
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.np_random = np.random.default_rng(seed)
+        self.bonk_fraction = bonk_fraction
+        self.comment_fraction = comment_fraction
+        self.trivial_fraction = trivial_fraction
+        self.subreddits = subreddits or SUBREDDITS
+        self.end = end or datetime.now()
+        self.hours = hours
+        self._next_id = 0
+
+    def bonk_title(self):
+        templates = [
+            "BONK just hit {price}!",
+            "Why BONK is {action} today",
+            "BONK vs {other_coin}: The meme coin battle",
+            "Breaking: BONK {news}",
+            "{exchange} lists BONK!",
+            "BONK community milestone: {milestone}"
+        ]
+
+        actions = ["pumping", "trending", "gaining traction", "making moves"]
+        prices = ["$0.00002", "$0.00003", "new ATH", "support level"]
+        other_coins = ["DOGE", "SHIB", "PEPE"]
+        news = ["partners with major platform", "reaches 1M holders", "trending on Twitter"]
+        exchanges = ["Binance", "KuCoin", "OKX", "Bybit"]
+        milestones = ["100K holders", "1B market cap", "$5M trading volume"]
+
+        template = self.random.choice(templates)
+        return template.format(
+            action=self.random.choice(actions),
+            price=self.random.choice(prices),
+            other_coin=self.random.choice(other_coins),
+            news=self.random.choice(news),
+            exchange=self.random.choice(exchanges),
+            milestone=self.random.choice(milestones)
+        )
+
+    def non_bonk_title(self, subreddit=None):
+        templates = [
+            "Daily Discussion - {date}",
+            "What's your take on {coin}?",
+            "Market Analysis: {trend}",
+            "Breaking: {news}",
+            "Technical Analysis: {coin} looks {direction}"
+        ]
+
+        coins = ["SOL", "ETH", "BTC", "ADA"]
+        trends = ["Bull run incoming?", "Bear market bottom?", "Sideways movement"]
+        news = ["New regulation proposed", "Major partnership announced", "Market volatility increases"]
+        directions = ["bullish", "bearish", "ready for breakout"]
+
+        template = self.random.choice(templates)
+        return template.format(
+            date=self.end.strftime("%B %d"),
+            coin=self.random.choice(coins),
+            trend=self.random.choice(trends),
+            news=self.random.choice(news),
+            direction=self.random.choice(directions)
+        )
+
+    def bonk_content(self):
+        templates = [
+            "Just analyzed $BONK's performance today. {analysis}. {prediction}. {sentiment}",
+            "Breaking news for BONK holders! {news}. {impact}. {action}",
+            "Comparing BONK to other meme coins: {comparison}. {metrics}. {conclusion}",
+            "Technical analysis of BONK: {ta_points}. {support_resistance}. {outlook}",
+            "BONK community update: {update}. {growth}. {next_steps}"
+        ]
+
+        analysis = [
+            "Volume is up 150% from yesterday",
+            "Social mentions have doubled",
+            "Price action shows strong momentum",
+            "Whale wallets are accumulating"
+        ]
+
+        predictions = [
+            "Looking bullish for the next week",
+            "Expecting increased volatility",
+            "Support level seems strong",
+            "Resistance might be tested soon"
+        ]
+
+        sentiments = [
+            "Community sentiment is overwhelmingly positive",
+            "Traders are cautiously optimistic",
+            "Social metrics indicate growing interest",
+            "Market makers showing increased activity"
+        ]
+
+        news = [
+            "Major exchange listing confirmed",
+            "New partnership announced",
+            "Development roadmap updated",
+            "Community governance proposal passed"
+        ]
+
+        impacts = [
+            "This could drive significant volume",
+            "Expected to boost market visibility",
+            "Should strengthen market position",
+            "May attract institutional interest"
+        ]
+
+        actions = [
+            "Worth keeping an eye on the daily charts",
+            "Consider reviewing your position",
+            "Stay tuned for more updates",
+            "Join the community discussion"
+        ]
+
+        template = self.random.choice(templates)
+        return template.format(
+            analysis=self.random.choice(analysis),
+            prediction=self.random.choice(predictions),
+            sentiment=self.random.choice(sentiments),
+            news=self.random.choice(news),
+            impact=self.random.choice(impacts),
+            action=self.random.choice(actions),
+            comparison="BONK shows stronger community engagement",
+            metrics="Trading volume exceeds similar tokens",
+            conclusion="Fundamentals remain strong",
+            ta_points="Moving averages show upward trend",
+            support_resistance="Support at $0.00002, resistance at $0.00003",
+            outlook="Short-term momentum looks positive",
+            update="New features being rolled out",
+            growth="Holder count up 25%",
+            next_steps="Community events planned for next week"
+        )
+
+    def non_bonk_content(self, subreddit=None):
+        templates = [
+            "Market analysis for {coin}: {analysis}. {outlook}. {recommendation}",
+            "Daily {coin} thread: {price_action}. {volume}. {sentiment}",
+            "Breaking: {news}. {impact}. {market_reaction}"
+        ]
+
+        coins = ["SOL", "ETH", "BTC", "ADA"]
+
+        return self.random.choice(templates).format(
+            coin=self.random.choice(coins),
+            analysis="Technical indicators showing mixed signals",
+            outlook="Market sentiment remains neutral",
+            recommendation="Watch key support levels",
+            price_action="Sideways trading continues",
+            volume="Volume below weekly average",
+            sentiment="Mixed reactions from traders",
+            news="New protocol upgrade announced",
+            impact="Minor price impact expected",
+            market_reaction="Trading within expected range"
+        )
+
+    def _filler(self):
+        return ' '.join(self.random.choices(FILLER_WORDS, k=self.random.randint(0, 12)))
+
+    def _new_ids(self, n):
+        ids = [np.base_repr(value, 36).lower() for value in range(self._next_id, self._next_id + n)]
+        self._next_id += n
+        return ids
+
+    def _timestamps(self, n):
+        seconds = self.np_random.uniform(0, self.hours * 3600, size=n)
+        return [(self.end - timedelta(seconds=float(offset))).replace(microsecond=0).isoformat() for offset in seconds]
+
+    def items(self, n, chunk_size=100_000):
+        """
+        Yield n posts and comments as RedditScraper rows, in DataFrames of at
+        most chunk_size rows so millions of items never sit in memory at once
+        """
+        for start in range(0, n, chunk_size):
+            size = min(chunk_size, n - start)
+            is_bonk = self.np_random.random(size) < self.bonk_fraction
+            is_comment = self.np_random.random(size) < self.comment_fraction
+            is_trivial = self.np_random.random(size) < self.trivial_fraction
+            subreddits = self.np_random.choice(self.subreddits, size=size)
+            ids = self._new_ids(size)
+
+            titles, texts = [], []
+            for bonk, comment, trivial in zip(is_bonk, is_comment, is_trivial):
+                if trivial:
+                    titles.append('')
+                    texts.append(self.random.choice(TRIVIAL_TEXTS))
+                    continue
+                titles.append('' if comment else (self.bonk_title() if bonk else self.non_bonk_title()))
+                content = self.bonk_content() if bonk else self.non_bonk_content()
+                texts.append(f"{content} {self._filler()}".strip())
+
+            # Bonk items draw more engagement, as in the report samples
+            scores = np.where(is_bonk, self.np_random.integers(10, 1000, size), self.np_random.integers(0, 300, size))
+            yield pd.DataFrame({
+                'id': ids,
+                'type': np.where(is_comment, 'comment', 'post'),
+                'text': texts,
+                'title': titles,
+                'created_at': self._timestamps(size),
+                'author': [f'user_{value}' for value in self.np_random.integers(0, 50_000, size)],
+                'subreddit': subreddits,
+                'score': scores,
+                'upvote_ratio': np.where(is_comment, np.nan, np.round(self.np_random.uniform(0.5, 1.0, size), 2)),
+                'num_comments': np.where(is_comment, 0, self.np_random.integers(0, 200, size)),
+                'url': [f"https://reddit.com/r/{subreddit}/comments/{item_id}/" for subreddit, item_id in zip(subreddits, ids)]
+            })
+
+    def _created_utc(self):
+        return (self.end - timedelta(seconds=self.random.uniform(0, self.hours * 3600))).timestamp()
+
+    def listing_pages(self, n_posts, page_size=100, comments_per_post=5):
+        """
+        Raw Reddit JSON as a scraper would receive it: (subreddit, listing
+        page bytes) pairs for n_posts posts across the subreddits, and the
+        comment page bytes of each post by id
+        """
+        pages = []
+        comment_pages = {}
+        per_subreddit = -(-n_posts // len(self.subreddits))
+        remaining = n_posts
+        for subreddit in self.subreddits:
+            count = min(per_subreddit, remaining)
+            remaining -= count
+            posts = []
+            for post_id in self._new_ids(count):
+                bonk = self.random.random() < self.bonk_fraction
+                post = {
+                    'id': post_id,
+                    'name': f't3_{post_id}',
+                    'title': self.bonk_title() if bonk else self.non_bonk_title(),
+                    'selftext': self.bonk_content() if bonk else self.non_bonk_content(),
+                    'created_utc': self._created_utc(),
+                    'author': f'user_{self.random.randint(0, 50_000)}',
+                    'score': self.random.randint(0, 1000),
+                    'upvote_ratio': round(self.random.uniform(0.5, 1.0), 2),
+                    'num_comments': comments_per_post,
+                    'permalink': f'/r/{subreddit}/comments/{post_id}/post/'
+                }
+                posts.append({'kind': 't3', 'data': post})
+                comments = [
+                    {'kind': 't1', 'data': {
+                        'id': comment_id,
+                        'body': f"{self.bonk_content() if self.random.random() < 0.5 else self.non_bonk_content()} {self._filler()}",
+                        'created_utc': self._created_utc(),
+                        'author': f'user_{self.random.randint(0, 50_000)}',
+                        'score': self.random.randint(0, 100)
+                    }}
+                    for comment_id in self._new_ids(comments_per_post)
+                ]
+                comment_pages[post_id] = json.dumps([
+                    {'kind': 'Listing', 'data': {'children': [{'kind': 't3', 'data': post}]}},
+                    {'kind': 'Listing', 'data': {'children': comments}}
+                ]).encode()
+
+            for start in range(0, len(posts), page_size):
+                page = posts[start:start + page_size]
+                after = page[-1]['data']['name'] if start + page_size < len(posts) else None
+                pages.append((subreddit, json.dumps({'kind': 'Listing', 'data': {
+                    'children': page, 'after': after, 'before': None
+                }}).encode()))
+        return pages, comment_pages
+
+    def summary_row(self, timestamp, subreddit):
+        """One fabricated run summary with a sample post, as shown in the daily report"""
+        # 30% chance of Bonk-related content
+        is_bonk = self.random.random() < self.bonk_fraction
+
+        title = self.bonk_title() if is_bonk else self.non_bonk_title(subreddit)
+        content = self.bonk_content() if is_bonk else self.non_bonk_content(subreddit)
+        engagement = self.random.randint(1000, 10000) if is_bonk else self.random.randint(100, 3000)
+
+        # Bonk posts tend to have more positive sentiment
+        if is_bonk:
+            positive = round(self.random.uniform(0.4, 0.8), 2)
+            negative = round(self.random.uniform(0.1, 0.3), 2)
+            neutral = round(1 - positive - negative, 2)
+        else:
+            positive = round(self.random.uniform(0.2, 0.5), 2)
+            negative = round(self.random.uniform(0.2, 0.4), 2)
+            neutral = round(1 - positive - negative, 2)
+
+        return {
+            'timestamp': timestamp.isoformat(),
+            'total_tweets': self.random.randint(150, 300),
+            'total_engagement': engagement,
+            'sentiment_distribution': {
+                'positive': positive,
+                'neutral': neutral,
+                'negative': negative
+            },
+            'weighted_sentiment': {
+                'positive': round(positive * 1.2, 2),
+                'neutral': round(neutral * 0.8, 2),
+                'negative': round(negative * 0.9, 2)
+            },
+            'subreddit': subreddit,
+            'title': title,
+            'content': content,
+            'url': f'https://reddit.com/r/{subreddit}/sample',
+            'engagement': engagement,
+            'is_bonk_related': is_bonk
+        }
+
+def write_corpus(generator, n, output_dir, output_format='parquet', chunk_size=100_000):
+    """
+    Write n generated items to output_dir: numbered Parquet files, or a
+    reddit.jsonl fixture that SOURCE_FIXTURE_DIR can replay through the pipeline
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    relevance = RelevanceMatcher()
+    paths = []
+    for index, chunk in enumerate(generator.items(n, chunk_size)):
+        chunk['relevance'] = relevance.score_series(chunk['title'], chunk['text'])
+        if output_format == 'jsonl':
+            path = os.path.join(output_dir, 'reddit.jsonl')
+            lines = chunk.to_json(orient='records', lines=True)
+            with open(path, 'w' if index == 0 else 'a') as f:
+                f.write(lines if lines.endswith('\n') else lines + '\n')
+        else:
+            path = os.path.join(output_dir, f'corpus_{index:05d}.parquet')
+            chunk.to_parquet(path, index=False, compression='zstd')
+        if path not in paths:
+            paths.append(path)
+    return paths
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic Bonk/non-Bonk Reddit corpus")
+    parser.add_argument('--items', type=int, default=1000, help="Number of posts and comments to generate")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--hours', type=int, default=24, help="Spread items over this many hours up to now")
+    parser.add_argument('--format', choices=['parquet', 'jsonl'], default='parquet',
+                        help="jsonl writes a reddit.jsonl source fixture")
+    parser.add_argument('--chunk-size', type=int, default=100_000)
+    parser.add_argument('--output', default='data/corpus')
+    args = parser.parse_args()
+
+    paths = write_corpus(CorpusGenerator(seed=args.seed, hours=args.hours), args.items, args.output,
+                         args.format, args.chunk_size)
+    print(f"Wrote {args.items} items to {len(paths)} file(s) under {args.output}")
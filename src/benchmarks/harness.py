@@ -0,0 +1,303 @@
+import os
+import json
+import time
+import platform
+import shutil
+import tempfile
+import argparse
+import subprocess
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from .corpus import CorpusGenerator
+
+BENCHMARKS = ['scrape_parse', 'relevance', 'tokenization', 'inference', 'summary', 'api']
+
+# Every run writes to a scratch directory, never to the live data and state files
+SCRATCH_PATHS = {
+    'DATA_DIR': 'data',
+    'SUMMARY_INDEX_PATH': 'summary_index.sqlite',
+    'ROLLING_AGGREGATES_PATH': 'rolling_aggregates.sqlite',
+    'SENTIMENT_CACHE_PATH': 'sentiment_cache.sqlite',
+    'TOKEN_STORE_PATH': 'tokens',
+    'SEEN_INDEX_PATH': 'seen_items.sqlite',
+    'REDDIT_CURSOR_PATH': 'reddit_cursors.json',
+    'SCHEDULER_STATE_PATH': 'scheduler.json',
+    'METRICS_SNAPSHOT_PATH': 'metrics.json',
+    'PROFILE_DIR': 'profiles'
+}
+
+def use_scratch_dir(path):
+    for name, relative in SCRATCH_PATHS.items():
+        os.environ[name] = os.path.join(path, relative)
+    os.makedirs(os.path.join(path, 'data'), exist_ok=True)
+
+def time_runs(fn, repeats):
+    """Wall-clock seconds of each of `repeats` calls, and the last call's result"""
+    timings = []
+    result = None
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start_time)
+    return np.array(timings), result
+
+def throughput(timings, items):
+    best = float(timings.min())
+    return {
+        'items': items,
+        'best_seconds': best,
+        'mean_seconds': float(timings.mean()),
+        'items_per_second': items / best if best else None
+    }
+
+def latency(timings):
+    return {
+        'requests': len(timings),
+        'mean_seconds': float(timings.mean()),
+        'p50_seconds': float(np.percentile(timings, 50)),
+        'p95_seconds': float(np.percentile(timings, 95))
+    }
+
+def bench_scrape_parse(corpus, args):
+    """Parse recorded listing and comment JSON into rows, as the scraper does after each fetch"""
+    from ..scrapers.reddit_scraper import RedditScraper
+    scraper = RedditScraper()
+    pages, comment_pages = corpus.listing_pages(args.posts, comments_per_post=args.comments_per_post)
+
+    def parse():
+        rows = []
+        for subreddit, page in pages:
+            for post_data in json.loads(page)['data']['children']:
+                post = post_data['data']
+                if not scraper._is_relevant(post):
+                    continue
+                comments = json.loads(comment_pages[post['id']])[1]['data']['children']
+                rows.extend(scraper._post_rows(post, comments, subreddit, datetime.min))
+        return rows
+
+    timings, rows = time_runs(parse, args.repeats)
+    return {'listing_json': {**throughput(timings, args.posts), 'rows': len(rows)}}
+
+def bench_relevance(items_df, args):
+    from ..analysis.relevance import RelevanceMatcher
+    matcher = RelevanceMatcher()
+
+    series_timings, _ = time_runs(lambda: matcher.score_series(items_df['title'], items_df['text']), args.repeats)
+    titles, texts = items_df['title'].tolist(), items_df['text'].tolist()
+    per_item_timings, _ = time_runs(
+        lambda: [matcher.score(title, text) for title, text in zip(titles, texts)], args.repeats
+    )
+    return {
+        'score_series': throughput(series_timings, len(items_df)),
+        'score_per_item': throughput(per_item_timings, len(items_df))
+    }
+
+def bench_tokenization(texts, scratch_dir, args):
+    from transformers import AutoTokenizer
+    from ..analysis.sentiment_analyzer import MODEL_NAME
+    from ..analysis.token_store import TokenStore, tokenize_texts
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+
+    tokenizer_timings, _ = time_runs(lambda: tokenize_texts(tokenizer, texts, 128), args.repeats)
+
+    store = TokenStore(tokenizer, MODEL_NAME, 128, path=os.path.join(scratch_dir, 'bench_tokens'))
+    cold_timings, _ = time_runs(lambda: store.encode(texts), 1)
+    warm_timings, _ = time_runs(lambda: store.encode(texts), args.repeats)
+    store.close()
+    return {
+        'tokenizer': throughput(tokenizer_timings, len(texts)),
+        'token_store_cold': throughput(cold_timings, len(texts)),
+        'token_store_warm': throughput(warm_timings, len(texts))
+    }
+
+def bench_inference(texts, args):
+    """Model time alone for each backend and batch size; texts are tokenized up front"""
+    from ..analysis.sentiment_analyzer import SentimentAnalyzer
+    results = {}
+    for backend in args.backends.split(','):
+        try:
+            analyzer = SentimentAnalyzer(use_cache=False, pool_workers=0, backend=backend, use_prefilter=False,
+                                         use_token_store=False)
+        except ImportError as e:
+            results[backend] = {'error': str(e)}
+            continue
+        token_ids = analyzer.tokenize(texts)
+        analyzer._score_tokens(token_ids[:8])
+        for batch_size in [int(size) for size in args.batch_sizes.split(',')]:
+            timings, _ = time_runs(lambda: analyzer._score_tokens(token_ids, batch_size), args.repeats)
+            results[f'{backend}/batch_{batch_size}'] = throughput(timings, len(token_ids))
+    return results
+
+def synthetic_analysis(items_df, seed):
+    """Analyzed results for the corpus with random scores in place of the model, and a model-free analyzer"""
+    from ..analysis.sentiment_analyzer import SentimentAnalyzer, analysis_frame
+    from ..models.items import normalize_items
+    analyzer = SentimentAnalyzer(use_cache=False, use_prefilter=False, load_model=False)
+    items = normalize_items(items_df)
+    scores = np.random.default_rng(seed).dirichlet(np.ones(3), size=len(items)).astype(np.float32)
+    return analyzer, analysis_frame(items, scores)
+
+def bench_summary(analyzer, analyzed_df, scratch_dir, args):
+    from ..analysis.rolling_aggregates import RollingAggregates
+    summary_timings, summary = time_runs(lambda: analyzer.generate_summary(analyzed_df), args.repeats)
+
+    aggregates = RollingAggregates(path=os.path.join(scratch_dir, 'bench_rolling.sqlite'))
+    fold_timings, _ = time_runs(lambda: aggregates.fold(analyzed_df), 1)
+    window_timings, _ = time_runs(lambda: aggregates.window(24), args.repeats)
+    return {
+        'generate_summary': throughput(summary_timings, len(analyzed_df)),
+        'rolling_fold': throughput(fold_timings, len(analyzed_df)),
+        'rolling_window_24h': latency(window_timings)
+    }
+
+def bench_api(analyzer, analyzed_df, args):
+    """Latency of the read endpoints over the saved corpus; the first request is uncached"""
+    try:
+        from fastapi.testclient import TestClient
+    except (ImportError, RuntimeError) as e:
+        return {'error': f"The API benchmark needs httpx: {str(e)}"}
+
+    # Stored the way an hourly run stores it
+    from ..analysis.rolling_aggregates import RollingAggregates
+    RollingAggregates().fold(analyzed_df)
+    analyzer.save_analysis(analyzed_df, analyzer.generate_summary(analyzed_df))
+    from ..api.main import app
+    client = TestClient(app)
+
+    today = datetime.now().strftime('%Y-%m-%d')
+    endpoints = [
+        '/api/latest-summary',
+        '/api/historical-summaries/7',
+        '/api/rolling/24h',
+        f'/api/detailed-analysis/{today}?limit=100',
+        f'/api/detailed-analysis/{today}?limit=100&sentiment=positive',
+        f'/api/detailed-analysis/{today}'
+    ]
+    results = {}
+    for endpoint in endpoints:
+        def request():
+            response = client.get(endpoint)
+            response.raise_for_status()
+        first_timings, _ = time_runs(request, 1)
+        timings, _ = time_runs(request, args.api_requests)
+        results[endpoint] = {'first_seconds': float(first_timings[0]), **latency(timings)}
+    return results
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    try:
+        import torch
+        torch_version = torch.__version__
+    except ImportError:
+        torch_version = None
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'torch': torch_version,
+        'pandas': pd.__version__,
+        'numpy': np.__version__
+    }
+
+def run_benchmarks(args):
+    selected = args.only.split(',') if args.only else BENCHMARKS
+    unknown = [name for name in selected if name not in BENCHMARKS]
+    if unknown:
+        raise ValueError(f"Unknown benchmarks {unknown}, expected some of {BENCHMARKS}")
+
+    scratch_dir = tempfile.mkdtemp(prefix='bonk_bench_')
+    use_scratch_dir(scratch_dir)
+
+    # Items fall in the last few hours so the rolling windows and API see them
+    corpus = CorpusGenerator(seed=args.seed, end=datetime.now() - timedelta(minutes=1), hours=6)
+    items_df = pd.concat(list(corpus.items(args.items)), ignore_index=True)
+    texts = items_df['text'].tolist()
+
+    results = {}
+    analysis = None
+    for name in selected:
+        print(f"Running {name}...")
+        start_time = time.perf_counter()
+        if name == 'scrape_parse':
+            results[name] = bench_scrape_parse(corpus, args)
+        elif name == 'relevance':
+            results[name] = bench_relevance(items_df, args)
+        elif name == 'tokenization':
+            results[name] = bench_tokenization(texts, scratch_dir, args)
+        elif name == 'inference':
+            results[name] = bench_inference(texts[:args.inference_items], args)
+        else:
+            if analysis is None:
+                analysis = synthetic_analysis(items_df, args.seed)
+            if name == 'summary':
+                results[name] = bench_summary(*analysis, scratch_dir, args)
+            else:
+                results[name] = bench_api(*analysis, args)
+        print(f"  {name} done in {time.perf_counter() - start_time:.1f}s")
+
+    shutil.rmtree(scratch_dir, ignore_errors=True)
+    return {
+        'environment': environment(),
+        'settings': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+        'results': results
+    }
+
+def _headline(metrics):
+    """The figure a result is compared on, and whether higher is better"""
+    if 'items_per_second' in metrics:
+        return metrics['items_per_second'], True
+    if 'p50_seconds' in metrics:
+        return metrics['p50_seconds'], False
+    return None, None
+
+def compare(baseline, current):
+    """Print the change of every result present in both runs"""
+    print(f"\nCompared with {baseline['environment'].get('commit')} ({baseline['environment']['timestamp']}):")
+    for bench, cases in current['results'].items():
+        for case, metrics in cases.items():
+            old_metrics = baseline['results'].get(bench, {}).get(case)
+            if not old_metrics:
+                continue
+            new, higher_is_better = _headline(metrics)
+            old, _ = _headline(old_metrics)
+            if not new or not old:
+                continue
+            change = new / old - 1
+            better = change > 0 if higher_is_better else change < 0
+            unit = 'items/s' if higher_is_better else 's p50'
+            print(f"  {bench}/{case}: {old:.4g} -> {new:.4g} {unit} "
+                  f"({change:+.1%}, {'better' if better else 'worse'})")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline stages on a synthetic corpus")
+    parser.add_argument('--items', type=int, default=10_000, help="Corpus size for relevance, tokenization, "
+                                                                   "summary and API benchmarks")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--only', help=f"Comma-separated subset of {','.join(BENCHMARKS)}")
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--posts', type=int, default=1000, help="Posts in the recorded listing JSON")
+    parser.add_argument('--comments-per-post', type=int, default=5)
+    parser.add_argument('--inference-items', type=int, default=256)
+    parser.add_argument('--backends', default='torch-fp32', help="Comma-separated sentiment backends")
+    parser.add_argument('--batch-sizes', default='16,32,64')
+    parser.add_argument('--api-requests', type=int, default=20)
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--compare', help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args)
+    with open(f"{args.output}.tmp", 'w') as f:
+        json.dump(report, f, indent=2, default=str)
+    os.replace(f"{args.output}.tmp", args.output)
+    print(f"Wrote results to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
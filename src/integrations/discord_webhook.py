@@ -1,12 +1,29 @@
 import os
+import time
 import requests
 from datetime import datetime
+from requests.adapters import HTTPAdapter
+from .retry import RetryableError, backoff_delay, max_attempts
+from ..pipeline.metrics import get_registry
 
 class DiscordWebhook:
-    def __init__(self):
-        self.webhook_url = os.getenv('DISCORD_WEBHOOK_URL')
+    def __init__(self, webhook_urls=None):
+        # One or more comma-separated webhook URLs
+        urls = webhook_urls if webhook_urls is not None else os.getenv('DISCORD_WEBHOOK_URL', '')
+        if isinstance(urls, str):
+            urls = urls.split(',')
+        self.webhook_urls = [url.strip() for url in urls if url and url.strip()]
+        self.webhook_url = self.webhook_urls[0] if self.webhook_urls else None
         self.username = "Bonk Sentiment Bot"
         self.avatar_url = "https://raw.githubusercontent.com/sqryxz/bonk-sentiment-tracker/main/assets/bonk_logo.png"
+        self.request_timeout = 10
+        self.max_attempts = max_attempts()
+        
+        # Keep-alive session shared by every webhook and sender thread
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=max(4, len(self.webhook_urls)))
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
 
     def format_for_discord(self, summary_text):
         """Format the summary text to fit Discord's message limits and formatting"""
@@ -39,30 +56,64 @@ class DiscordWebhook:
             
         return messages
 
+    def _post_once(self, webhook_url, payload):
+        try:
+            response = self.session.post(webhook_url, json=payload, timeout=self.request_timeout)
+        except requests.ConnectionError as e:
+            raise RetryableError(str(e))
+        except requests.Timeout as e:
+            raise RetryableError(str(e))
+        
+        get_registry().inc('bonk_http_responses_total', target='discord', status=response.status_code)
+        if response.status_code == 429:
+            # Discord reports the wait in seconds in the body; fall back to the header
+            retry_after = None
+            try:
+                retry_after = float(response.json().get('retry_after'))
+            except (ValueError, TypeError, AttributeError):
+                retry_after = float(response.headers.get('Retry-After', 1))
+            raise RetryableError("rate limited (429)", retry_after=retry_after)
+        if response.status_code >= 500:
+            raise RetryableError(f"server error ({response.status_code})")
+        response.raise_for_status()
+
+    def post(self, webhook_url, payload):
+        """POST one message, retrying rate limits and transient failures with jittered backoff"""
+        for attempt in range(self.max_attempts):
+            try:
+                return self._post_once(webhook_url, payload)
+            except RetryableError as e:
+                if attempt == self.max_attempts - 1:
+                    raise
+                delay = backoff_delay(attempt, e.retry_after)
+                print(f"Discord delivery failed ({str(e)}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
     def send_report(self, summary_text):
         """Send the daily report to Discord channel"""
-        if not self.webhook_url:
+        return self.send_messages(self.format_for_discord(summary_text))
+
+    def send_messages(self, messages, webhook_url=None):
+        """Send an already formatted report to one webhook, or to every configured webhook"""
+        webhook_urls = [webhook_url] if webhook_url else self.webhook_urls
+        if not webhook_urls:
             print("Discord webhook URL not configured. Skipping Discord notification.")
             return False
 
         try:
-            # Format the summary for Discord
-            messages = self.format_for_discord(summary_text)
-            
-            # Send each part as a separate message
-            for i, message in enumerate(messages):
-                payload = {
-                    "username": self.username,
-                    "avatar_url": self.avatar_url,
-                    "content": message if i > 0 else f"🔔 **Daily Bonk Sentiment Report** - {datetime.now().strftime('%Y-%m-%d')}\n\n{message}"
-                }
-                
-                response = requests.post(self.webhook_url, json=payload)
-                response.raise_for_status()
+            for url in webhook_urls:
+                # Send each part as a separate message, in order
+                for i, message in enumerate(messages):
+                    payload = {
+                        "username": self.username,
+                        "avatar_url": self.avatar_url,
+                        "content": message if i > 0 else f"🔔 **Daily Bonk Sentiment Report** - {datetime.now().strftime('%Y-%m-%d')}\n\n{message}"
+                    }
+                    self.post(url, payload)
                 
             print("Daily summary sent to Discord successfully")
             return True
             
         except Exception as e:
             print(f"Error sending to Discord: {str(e)}")
-            return False 
\ No newline at end of file
+            return False
@@ -0,0 +1,146 @@
+import os
+import queue
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from .retry import RetryableError, backoff_delay, max_attempts
+
+class SMTPConnectionPool:
+    """Persistent SMTP connections reused across sends and threads"""
+
+    def __init__(self, host, port, username=None, password=None, starttls=True, size=2, timeout=30):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            server.starttls()
+        if self.username and self.password:
+            server.login(self.username, self.password)
+        return server
+
+    def _is_alive(self, server):
+        try:
+            return server.noop()[0] == 250
+        except smtplib.SMTPException:
+            return False
+        except OSError:
+            return False
+
+    @contextmanager
+    def connection(self):
+        """Borrow a live connection, reconnecting if the idle one was dropped"""
+        with self._slots:
+            server = None
+            try:
+                server = self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            if server is None or not self._is_alive(server):
+                self._quit(server)
+                server = self._connect()
+            
+            try:
+                yield server
+            except Exception:
+                # The connection state is unknown after a failure; do not reuse it
+                self._quit(server)
+                raise
+            self._idle.put(server)
+
+    def _quit(self, server):
+        if server is None:
+            return
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+
+    def close(self):
+        while True:
+            try:
+                self._quit(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+class EmailSender:
+    """Sends the rendered daily summary to each recipient over pooled SMTP connections"""
+
+    def __init__(self):
+        self.smtp_server = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
+        self.smtp_port = int(os.getenv('SMTP_PORT', '587'))
+        self.smtp_username = os.getenv('SMTP_USERNAME')
+        self.smtp_password = os.getenv('SMTP_PASSWORD')
+        self.sender = os.getenv('SMTP_FROM') or self.smtp_username
+        self.recipient_emails = [
+            email.strip() for email in os.getenv('RECIPIENT_EMAILS', '').split(',') if email.strip()
+        ]
+        self.max_attempts = max_attempts()
+        self.pool = SMTPConnectionPool(
+            self.smtp_server,
+            self.smtp_port,
+            self.smtp_username,
+            self.smtp_password,
+            starttls=os.getenv('SMTP_STARTTLS', 'true').lower() == 'true',
+            size=int(os.getenv('SMTP_POOL_SIZE', '2'))
+        )
+
+    @property
+    def is_configured(self):
+        return bool(self.sender and self.recipient_emails)
+
+    def build_message(self, rendered, recipient):
+        msg = MIMEMultipart('alternative')
+        msg['Subject'] = f'Bonk Sentiment Daily Summary - {datetime.now().strftime("%Y-%m-%d")}'
+        msg['From'] = self.sender
+        msg['To'] = recipient
+        
+        msg.attach(MIMEText(rendered['text'], 'plain'))
+        msg.attach(MIMEText(rendered['html'], 'html'))
+        return msg
+
+    def _send_once(self, msg):
+        try:
+            with self.pool.connection() as server:
+                server.send_message(msg)
+        except smtplib.SMTPResponseException as e:
+            # 4xx replies are transient by definition
+            if 400 <= e.smtp_code < 500:
+                raise RetryableError(f"{e.smtp_code} {e.smtp_error!r}")
+            raise
+        except smtplib.SMTPServerDisconnected as e:
+            raise RetryableError(str(e))
+        except (ConnectionError, TimeoutError) as e:
+            raise RetryableError(str(e))
+
+    def send(self, recipient, rendered):
+        """Send the summary to one recipient, retrying transient failures with jittered backoff"""
+        msg = self.build_message(rendered, recipient)
+        try:
+            for attempt in range(self.max_attempts):
+                try:
+                    self._send_once(msg)
+                    return True
+                except RetryableError as e:
+                    if attempt == self.max_attempts - 1:
+                        raise
+                    delay = backoff_delay(attempt, e.retry_after)
+                    print(f"Email delivery to {recipient} failed ({str(e)}), retrying in {delay:.1f}s")
+                    time.sleep(delay)
+        except Exception as e:
+            print(f"Error sending email to {recipient}: {str(e)}")
+            return False
+
+    def close(self):
+        self.pool.close()
@@ -0,0 +1,140 @@
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+import numpy as np
+from .discord_webhook import DiscordWebhook
+from .email_sender import EmailSender
+from ..pipeline.metrics import get_registry
+
+class NotificationDispatcher:
+    """
+    Delivers rendered summaries to every configured sink from a background
+    thread, fanning out concurrently to each webhook and email recipient
+    """
+
+    def __init__(self, discord=None, email=None, max_workers=None, history_size=1000):
+        self.discord = discord or DiscordWebhook()
+        self.email = email or EmailSender()
+        self.max_workers = max_workers or int(os.getenv('NOTIFY_MAX_WORKERS', '4'))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='notify')
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        
+        # Per-sink delivery latency
+        self._metrics_lock = threading.Lock()
+        self._deliveries = {}
+        self.history_size = history_size
+
+    def sinks(self, rendered):
+        """(sink name, send callable) for every configured delivery target"""
+        deliveries = []
+        for i, webhook_url in enumerate(self.discord.webhook_urls):
+            deliveries.append((
+                f'discord[{i}]',
+                lambda webhook_url=webhook_url: self.discord.send_messages(rendered['discord'], webhook_url)
+            ))
+        if self.email.is_configured:
+            for recipient in self.email.recipient_emails:
+                deliveries.append((
+                    f'email:{recipient}',
+                    lambda recipient=recipient: self.email.send(recipient, rendered)
+                ))
+        return deliveries
+
+    def _deliver(self, name, send):
+        start_time = time.perf_counter()
+        try:
+            with get_registry().timed('notify'):
+                success = bool(send())
+        except Exception as e:
+            print(f"Error delivering to {name}: {str(e)}")
+            success = False
+        self._record(name, time.perf_counter() - start_time, success)
+        # Labelled by sink type so recipient addresses stay out of the metrics
+        sink = name.split('[')[0].split(':')[0]
+        get_registry().inc('bonk_notifications_total', sink=sink, result='success' if success else 'failure')
+        return success
+
+    def dispatch(self, rendered):
+        """Deliver to every sink concurrently and wait; returns {sink name: success}"""
+        futures = {
+            name: self._executor.submit(self._deliver, name, send)
+            for name, send in self.sinks(rendered)
+        }
+        return {name: future.result() for name, future in futures.items()}
+
+    def submit(self, rendered):
+        """Queue a delivery without blocking; the returned Future resolves to dispatch()'s result"""
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((rendered, future))
+        return future
+
+    def _ensure_worker(self):
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='notification-dispatcher', daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            rendered, future = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(self.dispatch(rendered))
+            except Exception as e:
+                future.set_exception(e)
+
+    def _record(self, name, seconds, success):
+        with self._metrics_lock:
+            stats = self._deliveries.setdefault(name, {
+                'successes': 0,
+                'failures': 0,
+                'latencies': deque(maxlen=self.history_size)
+            })
+            stats['successes' if success else 'failures'] += 1
+            stats['latencies'].append(seconds)
+
+    def get_metrics(self):
+        """Delivery counts and latency per sink"""
+        with self._metrics_lock:
+            metrics = {}
+            for name, stats in self._deliveries.items():
+                latencies = np.array(stats['latencies'])
+                metrics[name] = {
+                    'successes': stats['successes'],
+                    'failures': stats['failures'],
+                    'mean_seconds': float(latencies.mean()),
+                    'p50_seconds': float(np.percentile(latencies, 50)),
+                    'p95_seconds': float(np.percentile(latencies, 95)),
+                    'last_seconds': float(latencies[-1])
+                }
+            return metrics
+
+    def close(self, wait=True):
+        """Drain queued deliveries and release pooled connections"""
+        if self._worker is not None and self._worker.is_alive():
+            self._queue.put(None)
+            if wait:
+                self._worker.join()
+        self._executor.shutdown(wait=wait)
+        self.email.close()
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+def get_dispatcher():
+    """Return the process-wide notification dispatcher, creating it on first use"""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = NotificationDispatcher()
+        return _dispatcher
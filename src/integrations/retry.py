@@ -0,0 +1,22 @@
+import os
+import random
+
+class RetryableError(Exception):
+    """A delivery failure worth retrying, optionally with a server-requested delay"""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def max_attempts():
+    return int(os.getenv('NOTIFY_MAX_ATTEMPTS', '5'))
+
+def backoff_delay(attempt, retry_after=None, base=1.0, cap=60.0):
+    """
+    Seconds to wait before retry number attempt (0-based): exponential backoff
+    with full jitter, never shorter than a server-provided retry_after
+    """
+    delay = random.uniform(0, min(cap, base * 2 ** attempt))
+    if retry_after is not None:
+        delay += float(retry_after)
+    return delay
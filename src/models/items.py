@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+
+# Columns every source's items are normalized to
+ITEM_COLUMNS = [
+    'id', 'source', 'type', 'text', 'title', 'created_at', 'author', 'channel', 'url',
+    'likes', 'shares', 'replies', 'relevance', 'engagement_score'
+]
+
+# Common engagement model: likes (upvotes), shares (retweets) and replies are
+# weighted the same way for every source
+ENGAGEMENT_WEIGHTS = {'likes': 1.0, 'shares': 2.0, 'replies': 1.5}
+
+def engagement_score(likes, shares, replies):
+    """Weighted engagement; works on scalars and on Series/arrays alike"""
+    return (ENGAGEMENT_WEIGHTS['likes'] * likes
+            + ENGAGEMENT_WEIGHTS['shares'] * shares
+            + ENGAGEMENT_WEIGHTS['replies'] * replies)
+
+def _column(df, name, default):
+    if name in df.columns:
+        return df[name]
+    return pd.Series(default, index=df.index)
+
+def _count(df, name):
+    return pd.to_numeric(_column(df, name, 0), errors='coerce').fillna(0).astype(np.int64)
+
+def _timestamps(values):
+    return pd.to_datetime(values, utc=True).dt.tz_localize(None).dt.strftime('%Y-%m-%dT%H:%M:%S')
+
+def normalize_reddit(df):
+    """Normalize RedditScraper rows (score/num_comments) to the item schema"""
+    return _finish(pd.DataFrame({
+        'id': df['id'].astype(str),
+        'source': 'reddit',
+        'type': _column(df, 'type', 'post'),
+        'text': _column(df, 'text', ''),
+        'title': _column(df, 'title', ''),
+        'created_at': _timestamps(df['created_at']),
+        'author': _column(df, 'author', ''),
+        'channel': _column(df, 'subreddit', ''),
+        'url': _column(df, 'url', ''),
+        # Reddit has no share count; the score stands in for likes
+        'likes': _count(df, 'score'),
+        'shares': 0,
+        'replies': _count(df, 'num_comments'),
+        'relevance': _count(df, 'relevance')
+    }, index=df.index))
+
+def normalize_twitter(df):
+    """Normalize TwitterScraper rows (like/retweet/reply counts) to the item schema"""
+    return _finish(pd.DataFrame({
+        'id': df['id'].astype(str),
+        'source': 'twitter',
+        'type': 'tweet',
+        'text': _column(df, 'text', ''),
+        'title': '',
+        'created_at': _timestamps(df['created_at']),
+        'author': _column(df, 'author_id', '').astype(str),
+        'channel': '',
+        'url': 'https://twitter.com/i/web/status/' + df['id'].astype(str),
+        'likes': _count(df, 'like_count'),
+        'shares': _count(df, 'retweet_count'),
+        'replies': _count(df, 'reply_count'),
+        'relevance': _count(df, 'relevance')
+    }, index=df.index))
+
+def _finish(items):
+    items['text'] = items['text'].fillna('').astype(str)
+    items['title'] = items['title'].fillna('').astype(str)
+    items['engagement_score'] = engagement_score(items['likes'], items['shares'], items['replies']).astype(float)
+    return items[ITEM_COLUMNS].reset_index(drop=True)
+
+def normalize_items(df):
+    """
+    Bring collected rows of any supported shape to the item schema: already
+    normalized items, RedditScraper rows, or TwitterScraper rows
+    """
+    if 'source' in df.columns and 'engagement_score' in df.columns:
+        return df.reset_index(drop=True)
+    if 'retweet_count' in df.columns or 'like_count' in df.columns:
+        return normalize_twitter(df)
+    return normalize_reddit(df)
@@ -0,0 +1,183 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows; memory high-water marks are then left out
+    resource = None
+
+# Histogram bucket upper bounds in seconds, from sub-millisecond calls to whole runs
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+METRIC_HELP = {
+    'bonk_stage_seconds': 'Time spent in each hot stage (fetch, parse, relevance, tokenize, forward, '
+                          'aggregate, persist, notify)',
+    'bonk_stage_items_total': 'Items processed by each hot stage',
+    'bonk_stage_rss_high_water_bytes': 'Highest resident set size seen at the end of each stage',
+    'bonk_job_seconds': 'Duration of each scheduled pipeline stage run',
+    'bonk_job_failures_total': 'Failed scheduled pipeline stage runs',
+    'bonk_http_responses_total': 'HTTP responses by target and status code',
+    'bonk_cache_lookups_total': 'Sentiment score cache lookups by result',
+    'bonk_token_store_lookups_total': 'Token store lookups by result',
+    'bonk_prefilter_items_total': 'Items settled by each pre-filter route',
+    'bonk_notifications_total': 'Report deliveries by sink type and result',
+    'bonk_process_peak_rss_bytes': 'Peak resident set size of the process'
+}
+
+def current_rss_bytes():
+    """Resident set size of this process, or None where it cannot be read"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return peak_rss_bytes()
+
+def peak_rss_bytes():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if os.uname().sysname == 'Darwin' else peak * 1024
+
+def _label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+class MetricsRegistry:
+    """
+    Process-wide counters, gauges and latency histograms, rendered in the
+    Prometheus text format. The pipeline process saves a snapshot after each
+    scheduled stage run, which the API process merges into /metrics.
+    """
+
+    def __init__(self, process='pipeline', buckets=DEFAULT_BUCKETS, snapshot_path=None):
+        self.process = process
+        self.buckets = tuple(buckets)
+        self.snapshot_path = snapshot_path or os.getenv('METRICS_SNAPSHOT_PATH', 'data/state/metrics.json')
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_max(self, name, value, **labels):
+        """Raise a gauge to value if it is higher, for high-water marks"""
+        if value is None:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._gauges[key] = max(self._gauges.get(key, value), value)
+
+    def observe(self, name, seconds, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    histogram['buckets'][i] += 1
+            histogram['sum'] += seconds
+            histogram['count'] += 1
+
+    @contextmanager
+    def timed(self, stage, items=None):
+        """Time a block as one observation of the stage, counting its items"""
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe('bonk_stage_seconds', time.perf_counter() - start_time, stage=stage)
+            if items:
+                self.inc('bonk_stage_items_total', items, stage=stage)
+            self.set_max('bonk_stage_rss_high_water_bytes', current_rss_bytes(), stage=stage)
+
+    def snapshot(self):
+        """JSON-safe copy of every metric, labelled with this process"""
+        process = [('process', self.process)]
+        with self._lock:
+            snapshot = {
+                'counters': [[name, list(labels) + process, value] for (name, labels), value in self._counters.items()],
+                'gauges': [[name, list(labels) + process, value] for (name, labels), value in self._gauges.items()],
+                'histograms': [
+                    [name, list(labels) + process, dict(histogram, buckets=list(histogram['buckets']))]
+                    for (name, labels), histogram in self._histograms.items()
+                ],
+                'bucket_bounds': list(self.buckets)
+            }
+        peak = peak_rss_bytes()
+        if peak is not None:
+            snapshot['gauges'].append(['bonk_process_peak_rss_bytes', process, peak])
+        return snapshot
+
+    def save(self):
+        """Write the snapshot for other processes to serve"""
+        if not self.snapshot_path:
+            return
+        os.makedirs(os.path.dirname(self.snapshot_path) or '.', exist_ok=True)
+        with open(f"{self.snapshot_path}.tmp", 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(f"{self.snapshot_path}.tmp", self.snapshot_path)
+
+    def load_saved(self):
+        """The snapshot last saved by another process, or None"""
+        try:
+            with open(self.snapshot_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def render(self, snapshots=None):
+        """Prometheus text exposition of this process's metrics and any other snapshots"""
+        snapshots = [self.snapshot()] + [snapshot for snapshot in (snapshots or []) if snapshot]
+
+        families = {}
+        for snapshot in snapshots:
+            for name, labels, value in snapshot['counters']:
+                families.setdefault((name, 'counter'), []).append((labels, value, None))
+            for name, labels, value in snapshot['gauges']:
+                families.setdefault((name, 'gauge'), []).append((labels, value, None))
+            for name, labels, histogram in snapshot['histograms']:
+                families.setdefault((name, 'histogram'), []).append((labels, histogram, snapshot['bucket_bounds']))
+
+        lines = []
+        for (name, kind), samples in sorted(families.items()):
+            lines.append(f"# HELP {name} {METRIC_HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value, bounds in samples:
+                labels = [tuple(pair) for pair in labels]
+                if kind != 'histogram':
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+                    continue
+                # Bucket counts are kept cumulative, as the exposition format expects
+                for bound, count in zip(bounds, value['buckets']):
+                    lines.append(f"{name}_bucket{_format_labels(labels, [('le', repr(float(bound)))])} {count}")
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {value['count']}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {value['sum']}")
+                lines.append(f"{name}_count{_format_labels(labels)} {value['count']}")
+        return '\n'.join(lines) + '\n'
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_registry():
+    """Return the process-wide metrics registry, creating it on first use"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = MetricsRegistry()
+        return _registry
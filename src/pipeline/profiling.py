@@ -0,0 +1,103 @@
+import os
+import sys
+import time
+import cProfile
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+PROFILE_MODES = ('off', 'cprofile', 'sample')
+
+class StackSampler:
+    """
+    Wall-clock sampling profiler in the style of py-spy: a background thread
+    records the stack of one thread (every other thread if thread_id is None)
+    at a fixed interval, and the counts are written as collapsed stacks
+    ("frame;frame;frame count"), which flamegraph.pl, speedscope and inferno
+    read directly.
+    """
+
+    def __init__(self, interval=0.01, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            names.update((thread.ident, thread.name) for thread in threading.enumerate())
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or (self.thread_id is not None and thread_id != self.thread_id):
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def write(self, path):
+        with open(f"{path}.tmp", 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        os.replace(f"{path}.tmp", path)
+
+@contextmanager
+def profile_run(name, mode=None):
+    """
+    Profile one run of a block when PROFILE_MODE is set: 'cprofile' writes a
+    deterministic .prof file (open with pstats or snakeviz), 'sample' a
+    collapsed-stack .folded file. Both cover only the calling thread, so
+    overlapping stage runs do not show up in each other's profiles. Yields the
+    dump path, or None when profiling is off.
+    """
+    mode = (mode or os.getenv('PROFILE_MODE', 'off')).lower()
+    if mode not in PROFILE_MODES:
+        print(f"Unknown PROFILE_MODE {mode}, profiling is off")
+        mode = 'off'
+    if mode == 'off':
+        yield None
+        return
+
+    profile_dir = os.getenv('PROFILE_DIR', 'data/profiles')
+    os.makedirs(profile_dir, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+    extension = 'prof' if mode == 'cprofile' else 'folded'
+    path = os.path.join(profile_dir, f"{name}_{stamp}.{extension}")
+
+    start_time = time.perf_counter()
+    if mode == 'cprofile':
+        # cProfile only sees the calling thread, which is where a stage handler runs
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield path
+        finally:
+            profiler.disable()
+            profiler.dump_stats(path)
+    else:
+        sampler = StackSampler(float(os.getenv('PROFILE_SAMPLE_INTERVAL', '0.01')),
+                               thread_id=threading.get_ident()).start()
+        try:
+            yield path
+        finally:
+            sampler.stop()
+            sampler.write(path)
+    print(f"Profile of {name} ({time.perf_counter() - start_time:.2f}s) written to {path}")
@@ -0,0 +1,167 @@
+import os
+import json
+import threading
+from datetime import datetime, timedelta
+
+class Job:
+    """A recurring trigger that feeds a stage, either every interval or daily at HH:MM"""
+
+    def __init__(self, name, stage, interval=None, at=None, run_on_start=False):
+        if (interval is None) == (at is None):
+            raise ValueError("A job needs exactly one of interval or at")
+        self.name = name
+        self.stage = stage
+        self.interval = interval
+        self.at = datetime.strptime(at, '%H:%M').time() if at else None
+        self.run_on_start = run_on_start
+        
+        # Held from the time a run is queued until its stage has finished with it
+        self.lock = threading.Lock()
+        self.runs = 0
+        self.missed = 0
+        self.deferred = 0
+        self._deferred_slot = None
+        # Latest slot queued by this process, recorded in the state only once its run succeeds
+        self._queued_slot = None
+
+    def latest_slot(self, now):
+        """The most recent scheduled time at or before now"""
+        if self.interval is not None:
+            seconds = self.interval.total_seconds()
+            return datetime.fromtimestamp(now.timestamp() // seconds * seconds)
+        slot = datetime.combine(now.date(), self.at)
+        return slot if slot <= now else slot - timedelta(days=1)
+
+    def slots_between(self, last, due):
+        """Number of scheduled times in (last, due]"""
+        period = self.interval or timedelta(days=1)
+        return int((due - last) / period)
+
+class JobScheduler:
+    """
+    Fires jobs from a dedicated thread without running them: each firing is
+    queued on the job's stage, so a long run never delays other jobs. A job is
+    not re-queued while its previous run is still waiting or running, and runs
+    missed while the process was down or busy are caught up as a single run.
+    A slot is saved as run only once its stage has finished it successfully,
+    so a failed or interrupted run is caught up with the next slot.
+    """
+
+    def __init__(self, stages=(), state_path=None, poll_seconds=1.0):
+        self.stages = list(stages)
+        self.jobs = []
+        self.state_path = state_path or os.getenv('SCHEDULER_STATE_PATH', 'data/state/scheduler.json')
+        self.poll_seconds = poll_seconds
+        self._stopped = threading.Event()
+        # Written from the stage threads as runs finish
+        self._state_lock = threading.Lock()
+        self._state = {}
+        
+        if os.path.exists(self.state_path):
+            try:
+                with open(self.state_path) as f:
+                    self._state = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Error loading scheduler state from {self.state_path}: {str(e)}")
+
+    def add_job(self, name, stage, interval=None, at=None, run_on_start=False):
+        job = Job(name, stage, interval=interval, at=at, run_on_start=run_on_start)
+        self.jobs.append(job)
+        if stage not in self.stages:
+            self.stages.append(stage)
+        return job
+
+    def _last_slot(self, job, now):
+        with self._state_lock:
+            last = self._state.get(job.name)
+            if last is not None:
+                return datetime.fromisoformat(last)
+            # First start: run immediately if asked, otherwise wait for the next slot
+            due = job.latest_slot(now)
+            last = due - (job.interval or timedelta(days=1)) if job.run_on_start else due
+            self._state[job.name] = last.isoformat()
+            return last
+
+    def _save_state(self):
+        os.makedirs(os.path.dirname(self.state_path) or '.', exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self._state, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.state_path)
+
+    def tick(self, now=None):
+        """Queue every job whose latest slot has not been run yet"""
+        now = now or datetime.now()
+        for job in self.jobs:
+            due = job.latest_slot(now)
+            last = self._last_slot(job, now)
+            # A slot already queued by this process is not queued again, even if its run failed
+            if due <= last or (job._queued_slot is not None and due <= job._queued_slot):
+                continue
+            
+            # Overlap protection: leave the slot pending until the previous run is done
+            if not job.lock.acquire(blocking=False):
+                if job._deferred_slot != due:
+                    job._deferred_slot = due
+                    job.deferred += 1
+                    print(f"Job {job.name} is still running; deferring the {due} run")
+                continue
+            
+            missed = job.slots_between(last, due) - 1
+            if missed > 0:
+                job.missed += missed
+                print(f"Job {job.name} missed {missed} run(s) since {last}; catching up in one run")
+            
+            job.runs += 1
+            job._queued_slot = due
+            job.stage.put(
+                {'job': job.name, 'scheduled_for': due, 'missed': max(0, missed)},
+                on_done=lambda success, job=job, due=due: self._finish(job, due, success)
+            )
+
+    def _finish(self, job, due, success):
+        """Save the slot as run if its run succeeded, then let the job be queued again"""
+        try:
+            if success:
+                with self._state_lock:
+                    self._state[job.name] = due.isoformat()
+                    self._save_state()
+            else:
+                print(f"Job {job.name} failed for the {due} run; it will be caught up with the next run")
+        except Exception as e:
+            print(f"Error saving scheduler state: {str(e)}")
+        finally:
+            job.lock.release()
+
+    def start(self):
+        for stage in self.stages:
+            stage.start()
+        return self
+
+    def run_forever(self):
+        """Start the stages and fire due jobs until stop() is called"""
+        self.start()
+        while not self._stopped.is_set():
+            self.tick()
+            self._stopped.wait(self.poll_seconds)
+
+    def stop(self, wait=True):
+        self._stopped.set()
+        for stage in self.stages:
+            stage.stop(wait=wait)
+
+    def get_metrics(self):
+        """Per-job run counts and per-stage timing"""
+        return {
+            'jobs': {
+                job.name: {
+                    'last_scheduled': self._state.get(job.name),
+                    'runs': job.runs,
+                    'missed': job.missed,
+                    'deferred': job.deferred,
+                    'running': job.lock.locked()
+                }
+                for job in self.jobs
+            },
+            'stages': {stage.name: stage.get_metrics() for stage in self.stages}
+        }
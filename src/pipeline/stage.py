@@ -0,0 +1,107 @@
+import queue
+import threading
+import time
+from collections import deque
+import numpy as np
+from .metrics import get_registry
+from .profiling import profile_run
+
+class Stage:
+    """
+    A pipeline stage: a worker thread that drains its input queue, runs the
+    handler on each item and forwards non-None results to the next stage
+    """
+
+    def __init__(self, name, handler, next_stage=None, maxsize=0, history_size=1000):
+        self.name = name
+        self.handler = handler
+        self.next_stage = next_stage
+        self.queue = queue.Queue(maxsize=maxsize)
+        self._thread = None
+        
+        # Timing metrics
+        self._metrics_lock = threading.Lock()
+        self.processed = 0
+        self.failed = 0
+        self.busy_since = None
+        self.latencies = deque(maxlen=history_size)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name=f'stage-{self.name}', daemon=True)
+            self._thread.start()
+        return self
+
+    def put(self, item, on_done=None):
+        """Queue an item; on_done(success) is called once this stage has finished with it"""
+        self.queue.put((item, on_done))
+
+    def stop(self, wait=True):
+        if self._thread is not None and self._thread.is_alive():
+            self.queue.put(None)
+            if wait:
+                self._thread.join()
+
+    def _run(self):
+        while True:
+            job = self.queue.get()
+            if job is None:
+                return
+            item, on_done = job
+            
+            start_time = time.perf_counter()
+            with self._metrics_lock:
+                self.busy_since = time.time()
+            result = None
+            try:
+                with profile_run(self.name):
+                    result = self.handler(item)
+                success = True
+            except Exception as e:
+                print(f"Error in {self.name} stage: {str(e)}")
+                success = False
+            seconds = time.perf_counter() - start_time
+            self._export(seconds, success)
+            
+            with self._metrics_lock:
+                self.busy_since = None
+                self.processed += 1
+                self.failed += 0 if success else 1
+                self.latencies.append(seconds)
+            print(f"Stage {self.name} finished in {seconds:.2f}s")
+            
+            if on_done is not None:
+                on_done(success)
+            if result is not None and self.next_stage is not None:
+                self.next_stage.put(result)
+
+    def _export(self, seconds, success):
+        """Record the run in the metrics registry and save a snapshot for the API's /metrics"""
+        metrics = get_registry()
+        metrics.observe('bonk_job_seconds', seconds, stage=self.name)
+        if not success:
+            metrics.inc('bonk_job_failures_total', stage=self.name)
+        try:
+            metrics.save()
+        except Exception as e:
+            print(f"Error saving metrics snapshot: {str(e)}")
+
+    def get_metrics(self):
+        """Throughput, failures, queue depth and timing for this stage"""
+        with self._metrics_lock:
+            timing = {}
+            if self.latencies:
+                latencies = np.array(self.latencies)
+                timing = {
+                    'mean_seconds': float(latencies.mean()),
+                    'p50_seconds': float(np.percentile(latencies, 50)),
+                    'p95_seconds': float(np.percentile(latencies, 95)),
+                    'last_seconds': float(latencies[-1])
+                }
+            return {
+                'processed': self.processed,
+                'failed': self.failed,
+                'queued': self.queue.qsize(),
+                'busy_seconds': time.time() - self.busy_since if self.busy_since else None,
+                **timing
+            }
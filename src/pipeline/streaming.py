@@ -0,0 +1,99 @@
+import os
+import queue
+import threading
+import time
+import pandas as pd
+
+# Marks the end of the producer's output on the queue
+_END = object()
+
+def put_until_stopped(items, item, stop, poll_seconds=0.1):
+    """Put item on a bounded queue unless stop is set first; returns whether it was put"""
+    while not stop.is_set():
+        try:
+            items.put(item, timeout=poll_seconds)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def stream_analyze(chunks, analyze_frame, batch_size=None, maxsize=None, idle_seconds=0.5, stop=None):
+    """
+    Drain an iterator of collected-item DataFrames through analyze_frame while it
+    is still producing. The iterator runs on a background thread feeding a bounded
+    queue; items are analyzed once batch_size rows are buffered, or as soon as the
+    producer has been idle for idle_seconds.
+    Returns (raw_df, analyzed_df, stats).
+
+    If analysis fails, stop is set, the iterator closed and the producer thread
+    joined before the error is raised, so nothing keeps collecting behind the
+    caller's back. Pass the event the iterator watches as stop (as with
+    Collector.stream(stop=...)), so the producer does not first wait for the
+    iterator's next item.
+    """
+    batch_size = batch_size or int(os.getenv('STREAM_BATCH_SIZE', '64'))
+    maxsize = maxsize or int(os.getenv('STREAM_QUEUE_SIZE', '32'))
+    items = queue.Queue(maxsize=maxsize)
+    stop = stop if stop is not None else threading.Event()
+    stats = {'items': 0, 'batches': 0, 'producer_seconds': 0.0, 'analyze_seconds': 0.0}
+    
+    def produce():
+        start_time = time.perf_counter()
+        try:
+            for chunk in chunks:
+                if not put_until_stopped(items, chunk, stop):
+                    break
+        except Exception as e:
+            put_until_stopped(items, e, stop)
+        finally:
+            if hasattr(chunks, 'close'):
+                # Lets a generator such as Collector.stream stop its own threads
+                chunks.close()
+            stats['producer_seconds'] = time.perf_counter() - start_time
+            put_until_stopped(items, _END, stop)
+    
+    producer = threading.Thread(target=produce, name='stream-producer', daemon=True)
+    start_time = time.perf_counter()
+    producer.start()
+    
+    raw_frames, analyzed_frames, buffered = [], [], []
+    
+    def flush():
+        batch = pd.concat(buffered, ignore_index=True)
+        buffered.clear()
+        batch_start = time.perf_counter()
+        analyzed_frames.append(analyze_frame(batch))
+        stats['analyze_seconds'] += time.perf_counter() - batch_start
+        stats['batches'] += 1
+        raw_frames.append(batch)
+    
+    try:
+        while True:
+            try:
+                item = items.get(timeout=idle_seconds)
+            except queue.Empty:
+                # The producer is waiting on the network; use the time to analyze what we have
+                if buffered:
+                    flush()
+                continue
+            
+            if item is _END:
+                break
+            if isinstance(item, Exception):
+                raise item
+            
+            buffered.append(item)
+            stats['items'] += len(item)
+            if sum(len(frame) for frame in buffered) >= batch_size:
+                flush()
+        
+        if buffered:
+            flush()
+    finally:
+        stop.set()
+        producer.join()
+    stats['total_seconds'] = time.perf_counter() - start_time
+    
+    if not raw_frames:
+        return pd.DataFrame(), pd.DataFrame(), stats
+    return pd.concat(raw_frames, ignore_index=True), pd.concat(analyzed_frames, ignore_index=True), stats
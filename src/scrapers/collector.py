@@ -0,0 +1,128 @@
+import queue
+import threading
+import time
+import pandas as pd
+from datetime import datetime
+from .sources import load_sources
+from ..storage.columnar_store import ColumnarStore
+from ..pipeline.metrics import get_registry
+from ..pipeline.streaming import put_until_stopped
+
+# Marks one source's end of output on the shared queue
+_SOURCE_DONE = object()
+
+class Collector:
+    """Runs every configured source concurrently and merges their normalized items"""
+
+    def __init__(self, sources=None, maxsize=32):
+        self.sources = sources if sources is not None else load_sources()
+        self.maxsize = maxsize
+        self.store = ColumnarStore()
+        
+        # Per-source counters, accumulated across runs
+        self._lock = threading.Lock()
+        self.counters = {
+            source.name: {'runs': 0, 'items': 0, 'chunks': 0, 'errors': 0, 'seconds': 0.0, 'last_error': None}
+            for source in self.sources
+        }
+
+    def _run_source(self, source, hours_ago, items, stop):
+        start_time = time.perf_counter()
+        chunks = source.collect(hours_ago, stop)
+        try:
+            for chunk in chunks:
+                with self._lock:
+                    self.counters[source.name]['items'] += len(chunk)
+                    self.counters[source.name]['chunks'] += 1
+                if not put_until_stopped(items, chunk, stop):
+                    break
+        except Exception as e:
+            print(f"Error collecting from {source.name}: {str(e)}")
+            with self._lock:
+                self.counters[source.name]['errors'] += 1
+                self.counters[source.name]['last_error'] = str(e)
+        finally:
+            if hasattr(chunks, 'close'):
+                chunks.close()
+            with self._lock:
+                self.counters[source.name]['runs'] += 1
+                self.counters[source.name]['seconds'] += time.perf_counter() - start_time
+            put_until_stopped(items, _SOURCE_DONE, stop)
+
+    def stream(self, hours_ago=1, stop=None, poll_seconds=0.1):
+        """
+        Yield normalized item DataFrames from all sources as they arrive. Closing
+        the generator early, or setting stop, stops and joins the source threads,
+        so no source stages state after the caller has discarded the run. Sources
+        drop their queued fetches and only finish the ones in flight.
+        """
+        items = queue.Queue(maxsize=self.maxsize)
+        stop_sources = threading.Event()
+        threads = [
+            threading.Thread(target=self._run_source, args=(source, hours_ago, items, stop_sources),
+                             name=f'source-{source.name}', daemon=True)
+            for source in self.sources
+        ]
+        for thread in threads:
+            thread.start()
+        
+        try:
+            remaining = len(threads)
+            while remaining:
+                if stop is not None and stop.is_set():
+                    return
+                try:
+                    chunk = items.get(timeout=poll_seconds)
+                except queue.Empty:
+                    continue
+                if chunk is _SOURCE_DONE:
+                    remaining -= 1
+                    continue
+                yield chunk
+        finally:
+            stop_sources.set()
+            for thread in threads:
+                thread.join()
+
+    def collect(self, hours_ago=1):
+        """Collect from all sources into one normalized DataFrame"""
+        chunks = list(self.stream(hours_ago))
+        return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+
+    def save_items(self, items_df, filename=None):
+        """Save normalized items to the raw item store"""
+        if filename is None:
+            filename = f"bonk_items_{datetime.now().strftime('%Y%m%d_%H%M')}"
+        with get_registry().timed('persist', items=len(items_df)):
+            return self.store.write('raw/items', items_df, filename)
+
+    def commit(self, items_saved=False):
+        """
+        Persist every source's state once the run's items are stored. Pass
+        items_saved=True after save_items(), so sources skip their own raw copy.
+        """
+        for source in self.sources:
+            source.commit(items_saved=items_saved)
+
+    def discard(self):
+        for source in self.sources:
+            source.discard()
+
+    def record_analysis(self, analyzed_df):
+        """
+        Hand the analyzed items back to their sources once the results are
+        saved, so later engagement changes keep the stored sentiment
+        """
+        for source in self.sources:
+            source.record_analysis(analyzed_df)
+
+    def get_metrics(self):
+        """Per-source item throughput and error counts"""
+        with self._lock:
+            return {
+                name: {
+                    **counters,
+                    'items_per_second': counters['items'] / counters['seconds'] if counters['seconds'] else 0.0
+                }
+                for name, counters in self.counters.items()
+            }
@@ -0,0 +1,50 @@
+import os
+import json
+import threading
+
+class CursorStore:
+    """Persisted per-subreddit high-water marks for incremental collection"""
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv('REDDIT_CURSOR_PATH', 'data/state/reddit_cursors.json')
+        self._lock = threading.Lock()
+        self._cursors = {}
+        self._pending = {}
+
+        if os.path.exists(self.path):
+            try:
+                with open(self.path) as f:
+                    self._cursors = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Error loading cursors from {self.path}: {str(e)}")
+
+    def get(self, key):
+        """Return the committed cursor for key, or None on first run"""
+        with self._lock:
+            return self._cursors.get(key)
+
+    def advance(self, key, fullname, created_utc):
+        """Stage a new high-water mark; it is persisted by commit()"""
+        with self._lock:
+            current = self._pending.get(key) or self._cursors.get(key)
+            if current is None or created_utc >= current['created_utc']:
+                self._pending[key] = {'fullname': fullname, 'created_utc': created_utc}
+
+    def commit(self):
+        """Persist staged cursors once the collected items have been saved"""
+        with self._lock:
+            if not self._pending:
+                return
+            self._cursors.update(self._pending)
+            self._pending = {}
+
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self._cursors, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+    def discard(self):
+        """Drop staged cursors so the next run refetches the same window"""
+        with self._lock:
+            self._pending = {}
@@ -2,13 +2,51 @@ import os
 import requests
 import pandas as pd
 from datetime import datetime, timedelta
-import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from requests.adapters import HTTPAdapter
+from .rate_limiter import TokenBucket
+from .cursor_store import CursorStore
+from .seen_index import SeenIndex
+from ..storage.columnar_store import ColumnarStore
+from ..analysis.relevance import RelevanceMatcher
+from ..analysis.rolling_aggregates import RollingAggregates
+from ..models.items import normalize_reddit
+from ..pipeline.metrics import get_registry
 
 class RedditScraper:
-    def __init__(self):
+    def __init__(self, base_url=None, max_workers=None, requests_per_second=None):
         self.headers = {
             'User-Agent': 'BonkSentimentBot/1.0 (Script)'
         }
+        self.base_url = (base_url or os.getenv('REDDIT_BASE_URL', 'https://www.reddit.com')).rstrip('/')
+        self.request_timeout = 10
+        
+        # Concurrency and rate limiting
+        self.max_workers = max_workers or int(os.getenv('REDDIT_MAX_WORKERS', '8'))
+        rate = requests_per_second or float(os.getenv('REDDIT_REQUESTS_PER_SECOND', '2'))
+        self.rate_limiter = TokenBucket(rate, capacity=max(1, self.max_workers // 2))
+        
+        # Per-subreddit high-water marks; listings are paged back until they meet them
+        self.cursors = CursorStore()
+        self.max_pages = int(os.getenv('REDDIT_MAX_PAGES', '10'))
+        
+        # Ids collected in earlier runs, so items are only emitted once
+        self.seen_index = SeenIndex()
+        self.rolling_aggregates = RollingAggregates()
+        self.store = ColumnarStore()
+        
+        # Shared with the report so both agree on what counts as a Bonk item
+        self.relevance = RelevanceMatcher()
+        
+        # Streaming runs still write the raw items as an audit trail unless disabled
+        self.stream_audit = os.getenv('STREAM_AUDIT', 'true').lower() == 'true'
+        
+        # Shared keep-alive session, pooled across worker threads
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         
         # Subreddits to monitor
         self.subreddits = [
@@ -24,121 +62,288 @@ class RedditScraper:
             'SolanaNFT'            # Solana NFT ecosystem
         ]
 
-    def get_subreddit_posts(self, subreddit, limit=100):
+    def _get(self, url, target='reddit'):
+        """
+        Rate-limited GET on the shared session
+        """
+        self.rate_limiter.acquire()
+        metrics = get_registry()
+        with metrics.timed('http_fetch'):
+            response = self.session.get(url, timeout=self.request_timeout)
+        metrics.inc('bonk_http_responses_total', target=target, status=response.status_code)
+        return response
+
+    def _parse(self, response):
+        with get_registry().timed('json_parse'):
+            return response.json()
+
+    def get_subreddit_posts(self, subreddit, limit=100, after=None):
         """
         Get posts from a subreddit using Reddit's JSON API
         """
-        url = f'https://www.reddit.com/r/{subreddit}/new.json?limit={limit}'
-        response = requests.get(url, headers=self.headers)
+        return self.get_subreddit_page(subreddit, limit, after)[0]
+
+    def get_subreddit_page(self, subreddit, limit=100, after=None):
+        """
+        Get one page of a subreddit's new listing and the token for the next (older) page.
+        Raises on an error response, so a failed page is never taken for the end of the listing.
+        """
+        url = f'{self.base_url}/r/{subreddit}/new.json?limit={limit}'
+        if after:
+            url += f'&after={after}'
+        response = self._get(url, target='reddit_listing')
         
         if response.status_code == 200:
-            return response.json()['data']['children']
+            data = self._parse(response)['data']
+            return data['children'], data.get('after')
+        raise requests.HTTPError(f"Error fetching from r/{subreddit}: {response.status_code}", response=response)
+
+    def get_new_posts(self, subreddit, cutoff_time, stop=None):
+        """
+        Get posts newer than the subreddit's cursor (or cutoff_time on the first run),
+        paging back through the listing until the cursor is reached.
+
+        The cursor only advances once paging has reached it (or the end of the
+        listing). If a page fails, the page cap is hit or stop is set, the posts
+        fetched so far are returned but the old cursor is kept, so the next run
+        pages over the gap again; posts already collected are dropped by the seen index.
+        """
+        cursor = self.cursors.get(subreddit)
+        new_posts = []
+        after = None
+        complete = False
+        
+        for _ in range(self.max_pages):
+            if stop is not None and stop.is_set():
+                break
+            try:
+                children, after = self.get_subreddit_page(subreddit, after=after)
+            except Exception as e:
+                print(f"{str(e)}; keeping the r/{subreddit} cursor so the next run resumes from it")
+                break
+            reached_cursor = False
+            
+            for post_data in children:
+                post = post_data['data']
+                if cursor:
+                    reached_cursor = (post.get('name', f"t3_{post['id']}") == cursor['fullname']
+                                      or post['created_utc'] < cursor['created_utc'])
+                else:
+                    reached_cursor = datetime.fromtimestamp(post['created_utc']) < cutoff_time
+                if reached_cursor:
+                    break
+                new_posts.append(post_data)
+            
+            if reached_cursor or not after:
+                complete = True
+                break
         else:
-            print(f"Error fetching from r/{subreddit}: {response.status_code}")
-            return []
+            print(f"Stopped paging r/{subreddit} after {self.max_pages} pages before reaching the cursor or cutoff; "
+                  f"keeping the cursor so the next run resumes from it")
+        
+        # The listing is newest first, so the first new post becomes the next cursor
+        if new_posts and complete:
+            newest = new_posts[0]['data']
+            self.cursors.advance(subreddit, newest.get('name', f"t3_{newest['id']}"), newest['created_utc'])
+        
+        return new_posts
 
     def get_post_comments(self, post_id, subreddit):
         """
         Get comments for a specific post
         """
-        url = f'https://www.reddit.com/r/{subreddit}/comments/{post_id}.json'
-        response = requests.get(url, headers=self.headers)
+        url = f'{self.base_url}/r/{subreddit}/comments/{post_id}.json'
+        response = self._get(url, target='reddit_comments')
         
         if response.status_code == 200:
             try:
-                return response.json()[1]['data']['children']
+                return self._parse(response)[1]['data']['children']
             except (IndexError, KeyError):
                 return []
         else:
             print(f"Error fetching comments for post {post_id}: {response.status_code}")
             return []
 
-    def search_posts(self, hours_ago=1):
+    def _fetch_subreddit(self, subreddit_name, cutoff_time, stop=None):
+        try:
+            return self.get_new_posts(subreddit_name, cutoff_time, stop)
+        except Exception as e:
+            print(f"Error scraping subreddit {subreddit_name}: {str(e)}")
+            return []
+
+    def _fetch_comments(self, post_id, subreddit_name):
+        try:
+            return self.get_post_comments(post_id, subreddit_name)
+        except Exception as e:
+            print(f"Error fetching comments for post {post_id}: {str(e)}")
+            return []
+
+    def _post_row(self, post, subreddit_name):
+        return {
+            'id': post['id'],
+            'type': 'post',
+            'text': post.get('selftext', post['title']),
+            'title': post['title'],
+            'created_at': datetime.fromtimestamp(post['created_utc']).isoformat(),
+            'author': post.get('author', '[deleted]'),
+            'subreddit': subreddit_name,
+            'score': post['score'],
+            'upvote_ratio': post.get('upvote_ratio', None),
+            'num_comments': post['num_comments'],
+            'url': f"https://reddit.com{post['permalink']}",
+            'relevance': self.relevance.score(post['title'], post.get('selftext', ''))
+        }
+
+    def _comment_row(self, comment, post, subreddit_name):
+        return {
+            'id': comment['id'],
+            'type': 'comment',
+            'text': comment.get('body', ''),
+            'title': '',  # Comments don't have titles
+            'created_at': datetime.fromtimestamp(comment['created_utc']).isoformat(),
+            'author': comment.get('author', '[deleted]'),
+            'subreddit': subreddit_name,
+            'score': comment.get('score', 0),
+            'upvote_ratio': None,  # Comments don't have upvote ratios
+            'num_comments': 0,
+            'url': f"https://reddit.com{post['permalink']}{comment['id']}/",
+            'relevance': self.relevance.score(comment.get('body', ''))
+        }
+
+    def _is_relevant(self, post):
+        """Check if a post is relevant to Bonk"""
+        return self.relevance.matches(post['title'], post.get('selftext', ''))
+
+    def _post_rows(self, post, comments, subreddit_name, cutoff_time):
+        rows = [self._post_row(post, subreddit_name)]
+        with get_registry().timed('relevance', items=len(comments)):
+            rows.extend(self._comment_rows(post, comments, subreddit_name, cutoff_time))
+        return rows
+
+    def _comment_rows(self, post, comments, subreddit_name, cutoff_time):
+        rows = []
+        for comment_data in comments:
+            try:
+                comment = comment_data['data']
+                comment_time = datetime.fromtimestamp(comment['created_utc'])
+                
+                # Off-topic replies under a Bonk post are not worth scoring
+                if comment_time >= cutoff_time and self.relevance.is_relevant_comment(comment.get('body', '')):
+                    rows.append(self._comment_row(comment, post, subreddit_name))
+            except Exception as comment_error:
+                print(f"Error processing comment: {str(comment_error)}")
+                continue
+        return rows
+
+    def iter_posts(self, hours_ago=1, stop=None):
         """
-        Search for Bonk-related posts and comments from the past specified hours
+        Yield Bonk-related posts from the past specified hours as soon as their
+        comments are fetched, one list of rows (the post, then its comments) per post.
+        Setting stop, or closing the generator, drops the fetches still queued
+        and only waits for those already in flight.
         """
-        posts = []
         cutoff_time = datetime.utcnow() - timedelta(hours=hours_ago)
         
-        # Search in each subreddit
-        for subreddit_name in self.subreddits:
-            try:
-                subreddit_posts = self.get_subreddit_posts(subreddit_name)
-                
-                for post_data in subreddit_posts:
-                    post = post_data['data']
-                    
-                    # Check if post is relevant to Bonk
-                    title_lower = post['title'].lower()
-                    selftext_lower = post.get('selftext', '').lower()
-                    
-                    if not any(keyword in title_lower or keyword in selftext_lower
-                             for keyword in ['bonk', '$bonk', 'bonkcoin']):
-                        continue
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            # Fetch every subreddit listing concurrently; comment fetches start as each listing arrives
+            pending = {
+                executor.submit(self._fetch_subreddit, subreddit_name, cutoff_time, stop): (subreddit_name, None)
+                for subreddit_name in self.subreddits
+            }
+            
+            while pending:
+                if stop is not None and stop.is_set():
+                    return
+                done, _ = wait(pending, timeout=None if stop is None else 0.1, return_when=FIRST_COMPLETED)
+                for future in done:
+                    subreddit_name, post = pending.pop(future)
                     
-                    created_time = datetime.fromtimestamp(post['created_utc'])
-                    if created_time < cutoff_time:
+                    if post is not None:
+                        yield self._post_rows(post, future.result(), subreddit_name, cutoff_time)
                         continue
                     
-                    posts.append({
-                        'id': post['id'],
-                        'type': 'post',
-                        'text': post.get('selftext', post['title']),
-                        'title': post['title'],
-                        'created_at': created_time.isoformat(),
-                        'author': post.get('author', '[deleted]'),
-                        'subreddit': subreddit_name,
-                        'score': post['score'],
-                        'upvote_ratio': post.get('upvote_ratio', None),
-                        'num_comments': post['num_comments'],
-                        'url': f"https://reddit.com{post['permalink']}"
-                    })
-                    
-                    # Get comments
-                    comments = self.get_post_comments(post['id'], subreddit_name)
-                    for comment_data in comments:
+                    for post_data in future.result():
                         try:
-                            comment = comment_data['data']
-                            comment_time = datetime.fromtimestamp(comment['created_utc'])
-                            
-                            if comment_time >= cutoff_time:
-                                posts.append({
-                                    'id': comment['id'],
-                                    'type': 'comment',
-                                    'text': comment.get('body', ''),
-                                    'title': '',  # Comments don't have titles
-                                    'created_at': comment_time.isoformat(),
-                                    'author': comment.get('author', '[deleted]'),
-                                    'subreddit': subreddit_name,
-                                    'score': comment.get('score', 0),
-                                    'upvote_ratio': None,  # Comments don't have upvote ratios
-                                    'num_comments': 0,
-                                    'url': f"https://reddit.com{post['permalink']}{comment['id']}/"
-                                })
-                        except Exception as comment_error:
-                            print(f"Error processing comment: {str(comment_error)}")
-                            continue
-                    
-                    # Sleep briefly to avoid hitting rate limits
-                    time.sleep(0.5)
-                
-            except Exception as e:
-                print(f"Error scraping subreddit {subreddit_name}: {str(e)}")
-                continue
+                            post_item = post_data['data']
+                            with get_registry().timed('relevance', items=1):
+                                relevant = self._is_relevant(post_item)
+                            if not relevant:
+                                continue
+                            if post_item.get('num_comments', 1) == 0:
+                                # Nothing to fetch; emit the post right away
+                                yield self._post_rows(post_item, [], subreddit_name, cutoff_time)
+                                continue
+                            comments = executor.submit(self._fetch_comments, post_item['id'], subreddit_name)
+                            pending[comments] = (subreddit_name, post_item)
+                        except Exception as e:
+                            print(f"Error processing post in r/{subreddit_name}: {str(e)}")
+        finally:
+            # Waiting on the running fetches keeps a listing walk from staging a cursor after the run
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def search_posts(self, hours_ago=1):
+        """
+        Search for Bonk-related posts and comments from the past specified hours
+        """
+        return pd.DataFrame([row for rows in self.iter_posts(hours_ago) for row in rows])
+
+    def stream_new_posts(self, hours_ago=1, stop=None):
+        """
+        Yield DataFrames of items not collected by earlier runs as they arrive,
+        until stop is set. Call finish_stream() with everything consumed once it
+        has been processed.
+        """
+        for rows in self.iter_posts(hours_ago, stop):
+            new_df, changed_df = self.seen_index.partition(pd.DataFrame(rows))
+            if not changed_df.empty:
+                self.refresh_engagement(changed_df)
+            if not new_df.empty:
+                yield new_df
+
+    def refresh_engagement(self, changed_df):
+        """
+        Apply the new metrics of re-fetched items (changed rows from the seen
+        index) without re-analyzing them: analyzed items keep their sentiment,
+        their engagement moves in the rolling aggregates and the updated rows
+        are written to analyzed/engagement_updates. Returns the updated rows.
+        """
+        analyzed = changed_df[changed_df['seen_sentiment'].notna()]
+        updates_df = normalize_reddit(analyzed).rename(columns={'id': 'tweet_id'})
+        if not updates_df.empty:
+            updates_df['sentiment'] = analyzed['seen_sentiment'].to_numpy()
+            updates_df['previous_engagement'] = analyzed['seen_engagement'].to_numpy(dtype=float)
+            self.rolling_aggregates.apply_engagement_updates(updates_df)
+            self.store.write('analyzed/engagement_updates', updates_df,
+                             f"bonk_engagement_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
         
-        return pd.DataFrame(posts)
+        # Recorded last, so a failed update is retried from the same metrics on the next fetch
+        self.seen_index.update_metrics(changed_df)
+        return updates_df
+
+    def finish_stream(self, posts_df, audit=True):
+        """
+        Record streamed items as collected and advance the cursors, writing the
+        raw items to the store when auditing is enabled and the caller has not
+        stored them already (audit=False). Returns the audit file, if any.
+        """
+        filepath = None
+        if not posts_df.empty:
+            if audit and self.stream_audit:
+                filepath = self.save_posts(posts_df)
+            self.seen_index.mark_seen(posts_df)
+        self.cursors.commit()
+        return filepath
 
     def save_posts(self, df, filename=None):
         """
-        Save Reddit posts and comments to a CSV file in the data directory
+        Save Reddit posts and comments to a Parquet file in the raw data store
         """
         if filename is None:
-            filename = f"bonk_reddit_{datetime.now().strftime('%Y%m%d_%H%M')}.csv"
+            filename = f"bonk_reddit_{datetime.now().strftime('%Y%m%d_%H%M')}"
         
-        os.makedirs('data/raw', exist_ok=True)
-        filepath = os.path.join('data/raw', filename)
-        df.to_csv(filepath, index=False)
-        return filepath
+        with get_registry().timed('persist', items=len(df)):
+            return self.store.write('raw/reddit', df, filename)
 
     def collect_posts(self, hours_ago=1):
         """
@@ -146,14 +351,26 @@ class RedditScraper:
         """
         try:
             posts_df = self.search_posts(hours_ago)
+            
+            # Drop items collected by earlier runs; only their engagement is updated
+            posts_df, changed_df = self.seen_index.partition(posts_df)
+            if not changed_df.empty:
+                updates_df = self.refresh_engagement(changed_df)
+                print(f"{len(changed_df)} previously collected Reddit items changed engagement "
+                      f"({len(updates_df)} already analyzed updated in the aggregates)")
+            
             if not posts_df.empty:
                 filepath = self.save_posts(posts_df)
+                self.seen_index.mark_seen(posts_df)
+                self.cursors.commit()
                 print(f"Collected {len(posts_df)} Reddit items and saved to {filepath}")
                 return filepath
             else:
-                print("No Reddit posts found in the specified time period")
+                self.cursors.commit()
+                print("No new Reddit posts found in the specified time period")
                 return None
         except Exception as e:
+            self.cursors.discard()
             print(f"Error collecting Reddit posts: {str(e)}")
             return None
 
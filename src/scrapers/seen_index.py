@@ -0,0 +1,149 @@
+import os
+import sqlite3
+import threading
+import time
+import pandas as pd
+from ..models.items import engagement_score
+
+# SQLite limits the number of bound parameters per statement
+QUERY_CHUNK_SIZE = 400
+
+class SeenIndex:
+    """
+    On-disk index of already collected item ids, their last engagement
+    metrics and, once analyzed, their sentiment label.
+
+    The stored metrics let partition() report a re-fetched item as changed
+    once per change, along with the sentiment and engagement last folded into
+    the rolling aggregates, so only the engagement difference is applied there.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv('SEEN_INDEX_PATH', 'data/state/seen_items.sqlite')
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS seen_items (
+                type TEXT NOT NULL,
+                id TEXT NOT NULL,
+                score INTEGER,
+                num_comments INTEGER,
+                first_seen REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                sentiment TEXT,
+                engagement REAL,
+                PRIMARY KEY (type, id)
+            ) WITHOUT ROWID
+        """)
+        # Indexes written before sentiments were recorded lack the last two columns
+        columns = {row[1] for row in self._conn.execute('PRAGMA table_info(seen_items)')}
+        for column, column_type in [('sentiment', 'TEXT'), ('engagement', 'REAL')]:
+            if column not in columns:
+                self._conn.execute(f'ALTER TABLE seen_items ADD COLUMN {column} {column_type}')
+        self._conn.commit()
+
+    def _lookup(self, item_type, ids):
+        found = {}
+        for start in range(0, len(ids), QUERY_CHUNK_SIZE):
+            chunk = ids[start:start + QUERY_CHUNK_SIZE]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self._conn.execute(
+                f'SELECT id, score, num_comments, sentiment, engagement FROM seen_items '
+                f'WHERE type = ? AND id IN ({placeholders})',
+                [item_type] + chunk
+            ).fetchall()
+            for item_id, *stored in rows:
+                found[item_id] = tuple(stored)
+        return found
+
+    def partition(self, df):
+        """
+        Split collected rows into (new_df, changed_df): items never seen before,
+        and already seen items whose score or comment count has changed. Changed
+        rows carry the stored seen_sentiment (None until the item is analyzed)
+        and seen_engagement, the engagement last folded into the aggregates.
+        """
+        if df.empty:
+            return df, df
+
+        known = {}
+        with self._lock:
+            for item_type, group in df.groupby('type'):
+                ids = group['id'].astype(str).unique().tolist()
+                for item_id, metrics in self._lookup(item_type, ids).items():
+                    known[(item_type, item_id)] = metrics
+
+        keys = list(zip(df['type'], df['id'].astype(str)))
+        is_seen = pd.Series([key in known for key in keys], index=df.index)
+        previous = [known.get(key, (None, None, None, None)) for key in keys]
+        changed = pd.Series(
+            [
+                seen and (prev[0] != score or prev[1] != num_comments)
+                for seen, prev, score, num_comments in zip(is_seen, previous, df['score'], df['num_comments'])
+            ],
+            index=df.index
+        )
+        new_df = df[~is_seen].drop_duplicates(subset=['type', 'id'])
+        changed_df = df[changed].assign(
+            seen_sentiment=[prev[2] for prev, is_changed in zip(previous, changed) if is_changed],
+            seen_engagement=[prev[3] for prev, is_changed in zip(previous, changed) if is_changed]
+        )
+        return new_df, changed_df.drop_duplicates(subset=['type', 'id'], keep='last')
+
+    def mark_seen(self, df):
+        """Record rows as collected"""
+        if df.empty:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO seen_items (type, id, score, num_comments, first_seen, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                [
+                    (item_type, str(item_id), int(score), int(num_comments), now, now)
+                    for item_type, item_id, score, num_comments
+                    in zip(df['type'], df['id'], df['score'], df['num_comments'])
+                ]
+            )
+            self._conn.commit()
+
+    def update_metrics(self, df):
+        """Record the latest engagement metrics of already collected rows"""
+        if df.empty:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                'UPDATE seen_items SET score = ?, num_comments = ?, engagement = ?, updated_at = ? '
+                'WHERE type = ? AND id = ?',
+                [
+                    (int(score), int(num_comments), float(engagement_score(score, 0, num_comments)), now,
+                     item_type, str(item_id))
+                    for item_type, item_id, score, num_comments
+                    in zip(df['type'], df['id'], df['score'], df['num_comments'])
+                ]
+            )
+            self._conn.commit()
+
+    def record_analysis(self, analyzed_df):
+        """
+        Record the sentiment of analyzed rows with the metrics they were folded
+        into the rolling aggregates with, which later engagement changes start from
+        """
+        if analyzed_df.empty:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                'UPDATE seen_items SET sentiment = ?, score = ?, num_comments = ?, engagement = ?, updated_at = ? '
+                'WHERE type = ? AND id = ?',
+                [
+                    (str(sentiment), int(likes), int(replies), float(engagement), now, item_type, str(item_id))
+                    for item_type, item_id, sentiment, likes, replies, engagement in zip(
+                        analyzed_df['type'], analyzed_df['tweet_id'], analyzed_df['sentiment'],
+                        analyzed_df['metrics.likes'], analyzed_df['metrics.replies'], analyzed_df['engagement_score']
+                    )
+                ]
+            )
+            self._conn.commit()
@@ -0,0 +1,166 @@
+import os
+import pandas as pd
+from datetime import datetime
+from ..models.items import normalize_reddit, normalize_twitter
+from ..analysis.relevance import RelevanceMatcher
+
+class Source:
+    """
+    A collection plugin. Subclasses fetch raw rows in chunks and normalize
+    them to the item schema; the collector commits the source's state once
+    the run's items are safely stored.
+
+    With a fixture directory set, collect() replays <fixture_dir>/<name>.jsonl
+    instead of touching the network; with record=True, live runs append their
+    raw rows to that file so they can be replayed later.
+    """
+
+    name = None
+
+    def __init__(self, fixture_dir=None, record=None):
+        self.fixture_dir = fixture_dir if fixture_dir is not None else os.getenv('SOURCE_FIXTURE_DIR')
+        if record is None:
+            record = os.getenv('SOURCE_FIXTURE_RECORD', 'false').lower() == 'true'
+        self.record = record
+        self._collected = []
+
+    @property
+    def fixture_path(self):
+        return os.path.join(self.fixture_dir, f'{self.name}.jsonl') if self.fixture_dir else None
+
+    @property
+    def replaying(self):
+        return bool(self.fixture_dir) and not self.record
+
+    def fetch(self, hours_ago, stop=None):
+        """Yield raw DataFrames of newly collected rows, finishing early once stop is set"""
+        raise NotImplementedError
+
+    def normalize(self, raw_df):
+        """Convert raw rows to the item schema"""
+        raise NotImplementedError
+
+    def _commit(self, raw_df, items_saved):
+        """
+        Persist source state (seen items, cursors) for rows that were stored.
+        items_saved is true when the normalized items were already written to
+        raw/items, so the source need not keep its own raw copy.
+        """
+
+    def _discard(self):
+        """Roll back source state staged during a failed run"""
+
+    def _record_analysis(self, analyzed_df):
+        """Keep what later runs need from this source's analyzed rows (e.g. sentiments)"""
+
+    def _replay(self, chunk_size=100):
+        if not os.path.exists(self.fixture_path):
+            print(f"No {self.name} fixture at {self.fixture_path}")
+            return
+        fixture = pd.read_json(self.fixture_path, lines=True, dtype={'id': str})
+        for start in range(0, len(fixture), chunk_size):
+            yield fixture.iloc[start:start + chunk_size]
+
+    def _record(self, raw_df):
+        os.makedirs(self.fixture_dir, exist_ok=True)
+        lines = raw_df.to_json(orient='records', lines=True, date_format='iso')
+        with open(self.fixture_path, 'a') as f:
+            # Older pandas versions leave off the final newline
+            f.write(lines if lines.endswith('\n') else lines + '\n')
+
+    def collect(self, hours_ago=1, stop=None):
+        """Yield normalized DataFrames as the source produces them"""
+        chunks = self._replay() if self.replaying else self.fetch(hours_ago, stop)
+        for raw_df in chunks:
+            if raw_df.empty:
+                continue
+            if self.record and self.fixture_dir:
+                self._record(raw_df)
+            self._collected.append(raw_df)
+            yield self.normalize(raw_df)
+
+    def commit(self, items_saved=False):
+        raw_df = pd.concat(self._collected, ignore_index=True) if self._collected else pd.DataFrame()
+        self._collected = []
+        if not self.replaying:
+            self._commit(raw_df, items_saved)
+
+    def discard(self):
+        self._collected = []
+        if not self.replaying:
+            self._discard()
+
+    def record_analysis(self, analyzed_df):
+        if not self.replaying and 'source' in analyzed_df:
+            self._record_analysis(analyzed_df[analyzed_df['source'] == self.name])
+
+class RedditSource(Source):
+    name = 'reddit'
+
+    def __init__(self, scraper=None, **kwargs):
+        super().__init__(**kwargs)
+        self._scraper = scraper
+
+    @property
+    def scraper(self):
+        # Created on first live use so fixture replay needs no network or state files
+        if self._scraper is None:
+            from .reddit_scraper import RedditScraper
+            self._scraper = RedditScraper()
+        return self._scraper
+
+    def fetch(self, hours_ago, stop=None):
+        return self.scraper.stream_new_posts(hours_ago, stop)
+
+    def normalize(self, raw_df):
+        return normalize_reddit(raw_df)
+
+    def _commit(self, raw_df, items_saved):
+        self.scraper.finish_stream(raw_df, audit=not items_saved)
+
+    def _discard(self):
+        self.scraper.cursors.discard()
+
+    def _record_analysis(self, analyzed_df):
+        self.scraper.seen_index.record_analysis(analyzed_df)
+
+class TwitterSource(Source):
+    name = 'twitter'
+
+    def __init__(self, scraper=None, **kwargs):
+        super().__init__(**kwargs)
+        self._scraper = scraper
+        self.relevance = RelevanceMatcher()
+
+    @property
+    def scraper(self):
+        # tweepy and the API credentials are only needed for live collection
+        if self._scraper is None:
+            from .twitter_scraper import TwitterScraper
+            self._scraper = TwitterScraper()
+        return self._scraper
+
+    def fetch(self, hours_ago, stop=None):
+        # A single search request; there is nothing to stop part way
+        tweets_df = self.scraper.search_tweets(hours_ago)
+        if not tweets_df.empty:
+            tweets_df['relevance'] = self.relevance.score_series(tweets_df['text'])
+        yield tweets_df
+
+    def normalize(self, raw_df):
+        return normalize_twitter(raw_df)
+
+    def _commit(self, raw_df, items_saved):
+        if not raw_df.empty and not items_saved:
+            self.scraper.save_tweets(raw_df, f"bonk_tweets_{datetime.now().strftime('%Y%m%d_%H%M')}")
+
+# Source plugins by name, as listed in the SOURCES setting
+SOURCE_TYPES = {source.name: source for source in [RedditSource, TwitterSource]}
+
+def load_sources(names=None, **kwargs):
+    """Instantiate the configured sources (SOURCES, comma-separated; default reddit)"""
+    names = names or [name.strip() for name in os.getenv('SOURCES', 'reddit').split(',') if name.strip()]
+    unknown = [name for name in names if name not in SOURCE_TYPES]
+    if unknown:
+        raise ValueError(f"Unknown sources {unknown}, expected some of {list(SOURCE_TYPES)}")
+    return [SOURCE_TYPES[name](**kwargs) for name in names]
@@ -3,6 +3,7 @@ import tweepy
 import pandas as pd
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
+from ..storage.columnar_store import ColumnarStore
 
 load_dotenv()
 
@@ -22,6 +23,7 @@ class TwitterScraper:
             access_token=self.access_token,
             access_token_secret=self.access_token_secret
         )
+        self.store = ColumnarStore()
 
     def search_tweets(self, hours_ago=1):
         """
@@ -52,15 +54,12 @@ class TwitterScraper:
 
     def save_tweets(self, df, filename=None):
         """
-        Save tweets to a CSV file in the data directory
+        Save tweets to a Parquet file in the raw data store
         """
         if filename is None:
-            filename = f"bonk_tweets_{datetime.now().strftime('%Y%m%d_%H%M')}.csv"
+            filename = f"bonk_tweets_{datetime.now().strftime('%Y%m%d_%H%M')}"
         
-        os.makedirs('data/raw', exist_ok=True)
-        filepath = os.path.join('data/raw', filename)
-        df.to_csv(filepath, index=False)
-        return filepath
+        return self.store.write('raw/twitter', df, filename)
 
     def collect_tweets(self, hours_ago=1):
         """
@@ -0,0 +1,211 @@
+import os
+import re
+import ast
+import json
+from datetime import datetime
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# Nested dict columns are stored as one flat column per key, e.g. metrics.like_count
+STRUCT_SEPARATOR = '.'
+
+DATE_PARTITIONING = ds.partitioning(pa.schema([('date', pa.string())]), flavor='hive')
+
+def parse_dict_cell(value):
+    """Parse a dict stored as JSON or as a Python repr by older to_csv calls"""
+    if isinstance(value, dict) or value is None:
+        return value
+    if isinstance(value, float) and pd.isna(value):
+        return None
+    text = str(value)
+    try:
+        return json.loads(text)
+    except ValueError:
+        # Python reprs of numpy scalars, e.g. np.int64(3)
+        return ast.literal_eval(re.sub(r'np\.\w+\(([^()]*)\)', r'\1', text))
+
+def _is_dict_column(series):
+    sample = series.dropna()
+    if sample.empty:
+        return False
+    first = sample.iloc[0]
+    return isinstance(first, dict) or (isinstance(first, str) and first.startswith('{'))
+
+def flatten_columns(df):
+    """Expand dict-valued columns into typed flat columns named <column>.<key>"""
+    flat = df.copy()
+    for column in df.columns:
+        is_text = df[column].dtype == object or pd.api.types.is_string_dtype(df[column])
+        if not is_text or not _is_dict_column(df[column]):
+            continue
+        try:
+            parsed = df[column].map(parse_dict_cell)
+        except (ValueError, SyntaxError):
+            continue
+        expanded = pd.DataFrame(
+            [value if isinstance(value, dict) else {} for value in parsed],
+            index=df.index
+        ).add_prefix(f"{column}{STRUCT_SEPARATOR}")
+        position = flat.columns.get_loc(column)
+        flat = flat.drop(columns=[column])
+        for offset, name in enumerate(expanded.columns):
+            flat.insert(position + offset, name, expanded[name])
+    return flat
+
+def nest_columns(df, prefixes=None):
+    """Fold <prefix>.<key> columns back into dict-valued columns"""
+    nested = df.copy()
+    if prefixes is None:
+        prefixes = list(dict.fromkeys(
+            column.split(STRUCT_SEPARATOR, 1)[0] for column in df.columns if STRUCT_SEPARATOR in column
+        ))
+    for prefix in prefixes:
+        columns = [column for column in df.columns if column.startswith(f"{prefix}{STRUCT_SEPARATOR}")]
+        if not columns:
+            continue
+        keys = [column.split(STRUCT_SEPARATOR, 1)[1] for column in columns]
+        nested[prefix] = [dict(zip(keys, values)) for values in df[columns].itertuples(index=False, name=None)]
+        nested = nested.drop(columns=columns)
+    return nested
+
+def nest_record(record):
+    """Fold <prefix>.<key> entries of a flat record back into nested dicts"""
+    nested = {}
+    for key, value in record.items():
+        if STRUCT_SEPARATOR in key:
+            prefix, field = key.split(STRUCT_SEPARATOR, 1)
+            nested.setdefault(prefix, {})[field] = value
+        else:
+            nested[key] = value
+    return nested
+
+def to_records(df):
+    """Convert a flat frame to JSON-safe records with nested dict columns restored"""
+    df = nest_columns(df)
+    return df.astype(object).where(df.notna(), None).to_dict(orient='records')
+
+def read_frame(path, columns=None):
+    """Read a single Parquet or legacy CSV file"""
+    if path.endswith('.parquet'):
+        return pq.read_table(path, columns=columns).to_pandas()
+    df = pd.read_csv(path)
+    return df[columns] if columns else df
+
+class ColumnarStore:
+    """Date-partitioned, compressed Parquet datasets under the data directory"""
+
+    def __init__(self, root=None, compression='zstd'):
+        self.root = root or os.getenv('DATA_DIR', 'data')
+        self.compression = compression
+
+    def dataset_path(self, dataset):
+        return os.path.join(self.root, dataset)
+
+    def write(self, dataset, df, name, timestamp=None):
+        """Write df as <root>/<dataset>/date=YYYY-MM-DD/<name>.parquet and return the path"""
+        timestamp = timestamp or datetime.now()
+        partition_dir = os.path.join(self.dataset_path(dataset), f"date={timestamp.strftime('%Y-%m-%d')}")
+        os.makedirs(partition_dir, exist_ok=True)
+
+        path = os.path.join(partition_dir, f"{name}.parquet")
+        table = pa.Table.from_pandas(flatten_columns(df), preserve_index=False)
+        pq.write_table(table, path, compression=self.compression)
+        return path
+
+    def partitions(self, dataset):
+        """Sorted list of YYYY-MM-DD partitions present for a dataset"""
+        path = self.dataset_path(dataset)
+        if not os.path.isdir(path):
+            return []
+        return sorted(
+            entry.split('=', 1)[1] for entry in os.listdir(path)
+            if entry.startswith('date=')
+        )
+
+    def files(self, dataset, dates=None):
+        """Sorted Parquet file paths, optionally restricted to some date partitions"""
+        paths = []
+        for date in self.partitions(dataset):
+            if dates is not None and date not in dates:
+                continue
+            partition_dir = os.path.join(self.dataset_path(dataset), f"date={date}")
+            paths.extend(
+                os.path.join(partition_dir, name)
+                for name in sorted(os.listdir(partition_dir)) if name.endswith('.parquet')
+            )
+        return paths
+
+    def dataset(self, dataset, dates=None):
+        """pyarrow dataset over the selected partitions, or None if there are no files"""
+        return self.open_files(dataset, self.files(dataset, dates))
+
+    def open_files(self, dataset, files):
+        """pyarrow dataset over specific files of a dataset, or None if files is empty"""
+        if not files:
+            return None
+        return self._open(dataset, files, self.unified_schema(files))
+
+    def unified_schema(self, files):
+        """
+        Schema covering every file, so runs with extra or wider columns can be read together
+        """
+        return pa.unify_schemas(
+            [pq.read_schema(path) for path in files] + [pa.schema([('date', pa.string())])],
+            promote_options='permissive'
+        )
+
+    def _open(self, dataset, files, schema):
+        return ds.dataset(
+            files,
+            schema=schema,
+            format='parquet',
+            partitioning=DATE_PARTITIONING,
+            partition_base_dir=self.dataset_path(dataset)
+        )
+
+    def scan_files(self, dataset, files, columns=None, filter=None, start=(0, 0), batch_size=1024):
+        """
+        Lazily yield (file_index, row_offset, record_batch) over files in order.
+        row_offset counts rows after filtering within each file, and `start` skips
+        everything before a (file_index, row_offset) position, so scans can be resumed.
+        """
+        if not files:
+            return
+        schema = self.unified_schema(files)
+        start_file, start_row = start
+
+        for file_index in range(start_file, len(files)):
+            scanner = self._open(dataset, [files[file_index]], schema).scanner(
+                columns=columns, filter=filter, batch_size=batch_size
+            )
+            row_offset = 0
+            skip = start_row if file_index == start_file else 0
+
+            for batch in scanner.to_batches():
+                if skip >= batch.num_rows:
+                    skip -= batch.num_rows
+                    row_offset += batch.num_rows
+                    continue
+                if skip:
+                    batch = batch.slice(skip)
+                    row_offset += skip
+                    skip = 0
+                if batch.num_rows:
+                    yield file_index, row_offset, batch
+                    row_offset += batch.num_rows
+
+    def read(self, dataset, columns=None, filter=None, dates=None, files=None):
+        """
+        Read a dataset into a DataFrame with column projection and predicate pushdown.
+        `filter` is a pyarrow.dataset expression, `dates` a list of YYYY-MM-DD partitions
+        and `files` an explicit list of files to read instead of listing partitions.
+        """
+        if files is None:
+            arrow_dataset = self.dataset(dataset, dates)
+        else:
+            arrow_dataset = self.open_files(dataset, files)
+        if arrow_dataset is None:
+            return pd.DataFrame(columns=columns or [])
+        return arrow_dataset.to_table(columns=columns, filter=filter).to_pandas()
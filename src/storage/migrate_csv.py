@@ -0,0 +1,74 @@
+import os
+import re
+import argparse
+from datetime import datetime
+import pandas as pd
+from .columnar_store import ColumnarStore
+from .summary_index import SummaryIndex
+
+# Legacy CSV filename patterns and the dataset each one migrates into
+LEGACY_PATTERNS = [
+    ('raw', re.compile(r'^bonk_reddit_(\d{8}(?:_\d{4})?)\.csv$'), 'raw/reddit'),
+    ('raw', re.compile(r'^bonk_tweets_(\d{8}(?:_\d{4})?)\.csv$'), 'raw/twitter'),
+    ('analyzed', re.compile(r'^sentiment_analysis_(\d{8}(?:_\d{4})?)_detailed\.csv$'), 'analyzed/detailed'),
+    ('analyzed', re.compile(r'^sentiment_analysis_(\d{8}(?:_\d{4})?)_summary\.csv$'), 'analyzed/summary'),
+]
+
+def _parse_stamp(stamp):
+    return datetime.strptime(stamp, '%Y%m%d_%H%M' if '_' in stamp else '%Y%m%d')
+
+def migrate_csvs(store=None, data_dir=None, delete=False):
+    """
+    Convert legacy per-run CSV files into the partitioned Parquet store.
+    Files whose Parquet counterpart already exists are skipped, so the migration can be rerun.
+    """
+    store = store or ColumnarStore(root=data_dir)
+    data_dir = data_dir or store.root
+    migrated = []
+
+    for subdir, pattern, dataset in LEGACY_PATTERNS:
+        source_dir = os.path.join(data_dir, subdir)
+        if not os.path.isdir(source_dir):
+            continue
+
+        for filename in sorted(os.listdir(source_dir)):
+            match = pattern.match(filename)
+            if not match:
+                continue
+
+            source_path = os.path.join(source_dir, filename)
+            timestamp = _parse_stamp(match.group(1))
+            name = filename[:-len('.csv')]
+            if dataset.startswith('analyzed/'):
+                name = name.rsplit('_', 1)[0]
+
+            target_path = os.path.join(
+                store.dataset_path(dataset), f"date={timestamp.strftime('%Y-%m-%d')}", f"{name}.parquet"
+            )
+            if os.path.exists(target_path):
+                continue
+
+            try:
+                df = pd.read_csv(source_path)
+                store.write(dataset, df, name, timestamp)
+                migrated.append((source_path, target_path))
+                print(f"Migrated {source_path} -> {target_path}")
+                if delete:
+                    os.remove(source_path)
+            except Exception as e:
+                print(f"Error migrating {source_path}: {str(e)}")
+
+    return migrated
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate legacy CSV data files to Parquet")
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--delete', action='store_true', help="Remove each CSV after it is migrated")
+    args = parser.parse_args()
+
+    store = ColumnarStore(root=args.data_dir)
+    migrated = migrate_csvs(store, delete=args.delete)
+    print(f"Migrated {len(migrated)} files")
+    
+    indexed = SummaryIndex(os.path.join(args.data_dir, 'summary_index.sqlite')).rebuild(store)
+    print(f"Indexed {indexed} summaries")
@@ -0,0 +1,119 @@
+import os
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from .columnar_store import ColumnarStore, read_frame, to_records
+
+def _json_default(value):
+    # numpy scalars from DataFrame rows
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+class SummaryIndex:
+    """Time-indexed SQLite store of run summaries and the files behind them"""
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv('SUMMARY_INDEX_PATH', 'data/summary_index.sqlite')
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS summaries (
+                run_name TEXT PRIMARY KEY,
+                ts REAL NOT NULL,
+                date TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                summary_path TEXT,
+                detailed_path TEXT
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            )
+        """)
+        self._conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0)")
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_summaries_ts ON summaries (ts)')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_summaries_date ON summaries (date)')
+        self._conn.commit()
+
+    def add(self, run_name, summary, summary_path=None, detailed_path=None):
+        """Insert or replace the summary of one analysis run"""
+        timestamp = datetime.fromisoformat(str(summary['timestamp']))
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO summaries (run_name, ts, date, payload, summary_path, detailed_path) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (
+                    run_name,
+                    timestamp.timestamp(),
+                    timestamp.strftime('%Y-%m-%d'),
+                    json.dumps(summary, default=_json_default),
+                    summary_path,
+                    detailed_path
+                )
+            )
+            # Readers compare this counter to invalidate anything derived from the index
+            self._conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+            self._conn.commit()
+
+    def version(self):
+        """Counter incremented on every write, shared across processes"""
+        with self._lock:
+            return self._conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+    def latest(self, n=1):
+        """The n most recent summaries, newest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT payload FROM summaries ORDER BY ts DESC LIMIT ?', (n,)
+            ).fetchall()
+        return [json.loads(payload) for (payload,) in rows]
+
+    def between(self, start, end):
+        """Summaries with start <= timestamp < end, oldest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT payload FROM summaries WHERE ts >= ? AND ts < ? ORDER BY ts',
+                (start.timestamp(), end.timestamp())
+            ).fetchall()
+        return [json.loads(payload) for (payload,) in rows]
+
+    def detailed_paths(self, date):
+        """Detailed analysis files for a YYYY-MM-DD date, oldest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT detailed_path FROM summaries WHERE date = ? AND detailed_path IS NOT NULL ORDER BY ts',
+                (date,)
+            ).fetchall()
+        return [path for (path,) in rows]
+
+    def rebuild(self, store=None):
+        """Re-index every summary file in the columnar store"""
+        store = store or ColumnarStore()
+        count = 0
+        for summary_path in store.files('analyzed/summary'):
+            run_name = os.path.basename(summary_path)[:-len('.parquet')]
+            detailed_path = summary_path.replace(
+                store.dataset_path('analyzed/summary'), store.dataset_path('analyzed/detailed'), 1
+            )
+            try:
+                summary = to_records(read_frame(summary_path))[0]
+                self.add(
+                    run_name,
+                    summary,
+                    summary_path=summary_path,
+                    detailed_path=detailed_path if os.path.exists(detailed_path) else None
+                )
+                count += 1
+            except Exception as e:
+                print(f"Error indexing {summary_path}: {str(e)}")
+        return count
+
+if __name__ == "__main__":
+    # Rebuild the index from stored summary files, e.g. after migrating CSVs
+    print(f"Indexed {SummaryIndex().rebuild()} summaries")
@@ -0,0 +1,108 @@
+from datetime import datetime
+import pandas as pd
+from src.models.items import normalize_reddit
+from src.scrapers.reddit_scraper import RedditScraper
+
+CREATED_AT = datetime(2024, 1, 1, 12, 30)
+
+def raw_row(item_id, score, num_comments):
+    return {
+        'id': item_id,
+        'type': 'post',
+        'text': f'bonk post {item_id}',
+        'title': f'Bonk {item_id}',
+        'created_at': CREATED_AT.isoformat(),
+        'author': 'someone',
+        'subreddit': 'solana',
+        'score': score,
+        'num_comments': num_comments,
+        'url': f'https://reddit.com/r/solana/{item_id}',
+        'relevance': 1
+    }
+
+def analyzed_frame(raw_df, sentiments):
+    """The analyzed columns the aggregates and the seen index read, with fixed labels"""
+    items = normalize_reddit(raw_df)
+    analyzed = pd.DataFrame({
+        'tweet_id': items['id'],
+        'source': items['source'],
+        'type': items['type'],
+        'channel': items['channel'],
+        'title': items['title'],
+        'text': items['text'],
+        'created_at': items['created_at'],
+        'sentiment': sentiments,
+        'metrics.likes': items['likes'],
+        'metrics.shares': items['shares'],
+        'metrics.replies': items['replies'],
+        'engagement_score': items['engagement_score']
+    })
+    for label in ['positive', 'neutral', 'negative']:
+        analyzed[f'{label}_score'] = [1.0 if sentiment == label else 0.0 for sentiment in sentiments]
+    return analyzed
+
+def make_scraper(tmp_path, monkeypatch):
+    monkeypatch.setenv('SEEN_INDEX_PATH', str(tmp_path / 'seen.sqlite'))
+    monkeypatch.setenv('ROLLING_AGGREGATES_PATH', str(tmp_path / 'rolling.sqlite'))
+    monkeypatch.setenv('REDDIT_CURSOR_PATH', str(tmp_path / 'cursors.json'))
+    monkeypatch.setenv('DATA_DIR', str(tmp_path / 'data'))
+    return RedditScraper()
+
+def collect_and_analyze(scraper, rows, sentiments):
+    new_df, changed_df = scraper.seen_index.partition(pd.DataFrame(rows))
+    assert changed_df.empty
+    scraper.seen_index.mark_seen(new_df)
+    analyzed = analyzed_frame(new_df, sentiments)
+    scraper.rolling_aggregates.fold(analyzed)
+    scraper.seen_index.record_analysis(analyzed)
+
+def window(scraper):
+    return scraper.rolling_aggregates.range(datetime(2024, 1, 1), datetime(2024, 1, 2))
+
+def test_changed_engagement_moves_in_the_aggregates(tmp_path, monkeypatch):
+    scraper = make_scraper(tmp_path, monkeypatch)
+    collect_and_analyze(scraper, [raw_row('a', 10, 2), raw_row('b', 20, 0)], ['positive', 'negative'])
+    before = window(scraper)
+    assert before['total_engagement'] == 13 + 20
+
+    # 'a' is fetched again with more upvotes and comments
+    new_df, changed_df = scraper.seen_index.partition(pd.DataFrame([raw_row('a', 40, 4), raw_row('b', 20, 0)]))
+    assert new_df.empty
+    assert changed_df['id'].tolist() == ['a']
+    assert changed_df['seen_sentiment'].tolist() == ['positive']
+    updates_df = scraper.refresh_engagement(changed_df)
+    assert updates_df['engagement_score'].tolist() == [46.0]
+    assert updates_df['previous_engagement'].tolist() == [13.0]
+
+    after = window(scraper)
+    assert after['item_count'] == before['item_count'] == 2
+    assert after['sentiment_distribution'] == before['sentiment_distribution']
+    assert after['total_engagement'] == 46 + 20
+    assert after['weighted_sentiment']['positive'] == 46 / 66
+    assert [(item['id'], item['engagement'], item['sentiment']) for item in after['top_items']] == [
+        ('a', 46.0, 'positive'), ('b', 20.0, 'negative')
+    ]
+
+    # The updated row is kept, and the same metrics are not applied twice
+    assert len(scraper.store.read('analyzed/engagement_updates')) == 1
+    _, changed_df = scraper.seen_index.partition(pd.DataFrame([raw_row('a', 40, 4)]))
+    assert changed_df.empty
+
+def test_change_before_analysis_only_updates_the_seen_index(tmp_path, monkeypatch):
+    scraper = make_scraper(tmp_path, monkeypatch)
+    new_df, _ = scraper.seen_index.partition(pd.DataFrame([raw_row('a', 10, 2)]))
+    scraper.seen_index.mark_seen(new_df)
+
+    # Not analyzed yet, so there is no sentiment to move engagement under
+    _, changed_df = scraper.seen_index.partition(pd.DataFrame([raw_row('a', 30, 2)]))
+    assert changed_df['seen_sentiment'].tolist() == [None]
+    assert scraper.refresh_engagement(changed_df).empty
+    assert window(scraper)['item_count'] == 0
+
+    # The analysis records the metrics it folded in, so the next change starts from those
+    analyzed = analyzed_frame(new_df, ['neutral'])
+    scraper.rolling_aggregates.fold(analyzed)
+    scraper.seen_index.record_analysis(analyzed)
+    _, changed_df = scraper.seen_index.partition(pd.DataFrame([raw_row('a', 30, 2)]))
+    scraper.refresh_engagement(changed_df)
+    assert window(scraper)['total_engagement'] == 33
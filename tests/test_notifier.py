@@ -0,0 +1,142 @@
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from aiosmtpd.controller import Controller
+from src.integrations import discord_webhook
+from src.integrations.discord_webhook import DiscordWebhook
+from src.integrations.email_sender import EmailSender
+from src.integrations.notifier import NotificationDispatcher
+from src.analysis import summary_sender
+from src.analysis.summary_sender import SummarySender
+
+class FakeWebhook:
+    """Local Discord webhook: replies with the queued (status, body) responses, then 204s"""
+
+    def __init__(self):
+        self.responses = []
+        self.payloads = []
+        # Cleared to hold replies until the test sets it again
+        self.release = threading.Event()
+        self.release.set()
+        webhook = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                webhook.payloads.append(json.loads(self.rfile.read(int(self.headers['Content-Length']))))
+                webhook.release.wait(10)
+                status, body = webhook.responses.pop(0) if webhook.responses else (204, None)
+                data = json.dumps(body).encode() if body is not None else b''
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}/webhook'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.release.set()
+        self.server.shutdown()
+        self.server.server_close()
+
+class RecordingHandler:
+    """aiosmtpd handler keeping each message with the client address it arrived from"""
+
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append((session.peer, envelope.rcpt_tos))
+        return '250 OK'
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+@pytest.fixture
+def webhook():
+    webhook = FakeWebhook()
+    yield webhook
+    webhook.close()
+
+@pytest.fixture
+def smtp_server(monkeypatch):
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname='127.0.0.1', port=free_port())
+    controller.start()
+    monkeypatch.setenv('SMTP_SERVER', '127.0.0.1')
+    monkeypatch.setenv('SMTP_PORT', str(controller.port))
+    monkeypatch.setenv('SMTP_STARTTLS', 'false')
+    monkeypatch.setenv('SMTP_FROM', 'bot@example.com')
+    monkeypatch.setenv('RECIPIENT_EMAILS', 'a@example.com')
+    yield handler
+    controller.stop()
+
+@pytest.fixture
+def delays(monkeypatch):
+    """Record each retry's (attempt, retry_after) instead of sleeping"""
+    recorded = []
+    def backoff_delay(attempt, retry_after=None):
+        recorded.append((attempt, retry_after))
+        return 0
+    monkeypatch.setattr(discord_webhook, 'backoff_delay', backoff_delay)
+    return recorded
+
+RENDERED = {'text': 'Daily summary', 'html': '<p>Daily summary</p>', 'discord': ['Daily summary']}
+
+def test_rate_limited_post_waits_for_retry_after(webhook, delays):
+    webhook.responses = [(429, {'retry_after': 2.5, 'global': False})]
+    assert DiscordWebhook([webhook.url]).send_messages(['hello'])
+    assert len(webhook.payloads) == 2
+    assert delays == [(0, 2.5)]
+
+def test_server_errors_give_up_after_max_attempts(webhook, delays, monkeypatch):
+    monkeypatch.setenv('NOTIFY_MAX_ATTEMPTS', '3')
+    webhook.responses = [(503, None)] * 5
+    assert not DiscordWebhook([webhook.url]).send_messages(['hello'])
+    assert len(webhook.payloads) == 3
+    assert [attempt for attempt, _ in delays] == [0, 1]
+
+def test_smtp_connection_is_reused_across_sends(smtp_server):
+    sender = EmailSender()
+    for recipient in ['a@example.com', 'b@example.com', 'c@example.com']:
+        assert sender.send(recipient, RENDERED)
+    sender.close()
+    assert [recipients for _, recipients in smtp_server.messages] == [
+        ['a@example.com'], ['b@example.com'], ['c@example.com']
+    ]
+    assert len({peer for peer, _ in smtp_server.messages}) == 1
+
+def test_daily_summary_is_delivered_in_the_background(webhook, smtp_server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('DATA_DIR', str(tmp_path / 'data'))
+    monkeypatch.setenv('SUMMARY_INDEX_PATH', str(tmp_path / 'summary_index.sqlite'))
+    monkeypatch.setenv('ROLLING_AGGREGATES_PATH', str(tmp_path / 'rolling.sqlite'))
+    dispatcher = NotificationDispatcher(discord=DiscordWebhook([webhook.url]), email=EmailSender())
+    monkeypatch.setattr(summary_sender, 'get_dispatcher', lambda: dispatcher)
+
+    delivered = threading.Event()
+    results = []
+    def on_delivered(future):
+        results.append(future.result())
+        delivered.set()
+
+    # The webhook holds its reply, so the call must return before the delivery finishes
+    webhook.release.clear()
+    delivery = SummarySender().send_daily_summary(wait=False)
+    delivery.add_done_callback(on_delivered)
+    assert not delivery.done()
+
+    webhook.release.set()
+    assert delivered.wait(10)
+    assert results == [{'discord[0]': True, 'email:a@example.com': True}]
+    assert len(smtp_server.messages) == 1
+    dispatcher.close()
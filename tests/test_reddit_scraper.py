@@ -0,0 +1,188 @@
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import pytest
+from src.pipeline.streaming import stream_analyze
+from src.scrapers.collector import Collector
+from src.scrapers.reddit_scraper import RedditScraper
+from src.scrapers.sources import RedditSource
+
+def make_post(subreddit, i, created_utc):
+    return {'data': {
+        'id': f'{subreddit}{i}',
+        'name': f't3_{subreddit}{i}',
+        'title': f'BONK post {i}',
+        'selftext': 'bonk to the moon',
+        'created_utc': created_utc,
+        'author': 'someone',
+        'score': 10,
+        'num_comments': 1,
+        'permalink': f'/r/{subreddit}/comments/{subreddit}{i}/'
+    }}
+
+class StubReddit:
+    """
+    Local stand-in for Reddit's JSON API. Each subreddit's new listing is a
+    list of pages; pages named in failing answer 500. Every request is
+    recorded with its arrival time and the client port it came in on.
+    """
+
+    def __init__(self, latency=0.0):
+        self.listings = {}
+        self.failing = set()
+        self.requests = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, so a pooled session can reuse its connections
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests.append((time.monotonic(), self.client_address[1], self.path))
+                    stub.in_flight += 1
+                    stub.peak_in_flight = max(stub.peak_in_flight, stub.in_flight)
+                try:
+                    time.sleep(latency)
+                    status, body = stub.respond(urlparse(self.path))
+                finally:
+                    with stub._lock:
+                        stub.in_flight -= 1
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def respond(self, url):
+        parts = url.path.strip('/').split('/')
+        subreddit = parts[1]
+        if parts[2] == 'comments':
+            comment = {'data': {'id': f'c_{parts[3]}', 'body': 'bonk!', 'created_utc': time.time(), 'score': 1}}
+            return 200, [{}, {'data': {'children': [comment]}}]
+
+        page = int(parse_qs(url.query).get('after', ['page0'])[0][len('page'):])
+        if (subreddit, page) in self.failing:
+            return 500, {}
+        pages = self.listings[subreddit]
+        after = f'page{page + 1}' if page + 1 < len(pages) else None
+        return 200, {'data': {'children': pages[page], 'after': after}}
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+@pytest.fixture
+def stub():
+    stub = StubReddit()
+    yield stub
+    stub.close()
+
+@pytest.fixture
+def state_paths(tmp_path, monkeypatch):
+    monkeypatch.setenv('SEEN_INDEX_PATH', str(tmp_path / 'seen.sqlite'))
+    monkeypatch.setenv('ROLLING_AGGREGATES_PATH', str(tmp_path / 'rolling.sqlite'))
+    monkeypatch.setenv('REDDIT_CURSOR_PATH', str(tmp_path / 'cursors.json'))
+    monkeypatch.setenv('DATA_DIR', str(tmp_path / 'data'))
+
+def test_concurrent_fetches_share_one_session_within_the_rate(state_paths):
+    stub = StubReddit(latency=0.1)
+    now = time.time()
+    for subreddit in ['alpha', 'beta']:
+        stub.listings[subreddit] = [[make_post(subreddit, i, now - i) for i in range(10)]]
+
+    rate = 40
+    scraper = RedditScraper(base_url=stub.url, max_workers=4, requests_per_second=rate)
+    scraper.subreddits = ['alpha', 'beta']
+    try:
+        rows = [row for rows in scraper.iter_posts(hours_ago=1) for row in rows]
+    finally:
+        stub.close()
+
+    # 2 listings and 20 comment pages; every post and comment mentions Bonk
+    assert len(stub.requests) == 22
+    assert len(rows) == 40
+
+    # Fetches overlap, but no window sees more than the bucket's burst plus its rate
+    assert stub.peak_in_flight > 1
+    capacity = scraper.rate_limiter.capacity
+    times = sorted(arrival for arrival, _, _ in stub.requests)
+    for i, start in enumerate(times):
+        for j in range(i + 1, len(times)):
+            assert j - i + 1 <= capacity + rate * (times[j] - start) + 1
+
+    # One pooled session: a handful of keep-alive connections, not one per request
+    connections = {port for _, port, _ in stub.requests}
+    assert len(connections) <= scraper.max_workers
+
+def test_cursor_only_advances_after_a_complete_page_walk(stub, state_paths):
+    now = time.time()
+    stub.listings['alpha'] = [
+        [make_post('alpha', i, now - i) for i in range(0, 3)],
+        [make_post('alpha', i, now - i) for i in range(3, 6)]
+    ]
+    cutoff = datetime.fromtimestamp(now) - timedelta(hours=1)
+    scraper = RedditScraper(base_url=stub.url, max_workers=2, requests_per_second=1000)
+
+    # The second page fails: the first page's posts come back, the cursor stays unset
+    stub.failing.add(('alpha', 1))
+    assert len(scraper.get_new_posts('alpha', cutoff)) == 3
+    scraper.cursors.commit()
+    assert scraper.cursors.get('alpha') is None
+
+    # The page cap stops the walk short of the cutoff: same outcome
+    scraper.max_pages = 1
+    stub.failing.clear()
+    assert len(scraper.get_new_posts('alpha', cutoff)) == 3
+    scraper.cursors.commit()
+    assert scraper.cursors.get('alpha') is None
+
+    # Walking every page to the end of the listing moves the cursor to the newest post
+    scraper.max_pages = 10
+    assert len(scraper.get_new_posts('alpha', cutoff)) == 6
+    scraper.cursors.commit()
+    assert scraper.cursors.get('alpha') == {'fullname': 't3_alpha0', 'created_utc': now}
+
+    # The next run stops at the cursor
+    assert scraper.get_new_posts('alpha', cutoff) == []
+
+def test_failed_analysis_stops_collection_promptly(state_paths):
+    # Forty slow comment pages over two workers would keep fetching for about ten seconds
+    stub = StubReddit(latency=0.5)
+    stub.listings['alpha'] = [[make_post('alpha', i, time.time() - i) for i in range(40)]]
+    scraper = RedditScraper(base_url=stub.url, max_workers=2, requests_per_second=1000)
+    scraper.subreddits = ['alpha']
+    collector = Collector(sources=[RedditSource(scraper=scraper, fixture_dir='')])
+
+    failed_at = []
+    def analyze_frame(batch):
+        failed_at.append(time.monotonic())
+        raise RuntimeError('model failed')
+
+    stop = threading.Event()
+    try:
+        with pytest.raises(RuntimeError):
+            stream_analyze(collector.stream(stop=stop), analyze_frame, batch_size=1, stop=stop)
+        stopped_after = time.monotonic() - failed_at[0]
+        requests_at_stop = len(stub.requests)
+        time.sleep(0.6)
+    finally:
+        stub.close()
+
+    # Only the fetches in flight at the failure finish; queued ones are dropped
+    assert stopped_after < 2
+    assert len(stub.requests) == requests_at_stop < 10
@@ -0,0 +1,42 @@
+import json
+from datetime import datetime, timedelta
+from src.pipeline.scheduler import JobScheduler
+
+class RecordingStage:
+    """Stage stand-in that keeps queued runs so the test decides how they finish"""
+
+    name = 'scrape'
+
+    def __init__(self):
+        self.runs = []
+
+    def put(self, item, on_done=None):
+        self.runs.append((item, on_done))
+
+def saved_slot(path):
+    with open(path) as f:
+        return json.load(f).get('scrape')
+
+def test_slot_is_saved_only_after_a_successful_run(tmp_path):
+    state_path = tmp_path / 'scheduler.json'
+    stage = RecordingStage()
+    scheduler = JobScheduler(state_path=str(state_path))
+    scheduler.add_job('scrape', stage, interval=timedelta(hours=1), run_on_start=True)
+
+    scheduler.tick(datetime(2024, 1, 1, 10, 5))
+    assert [item['scheduled_for'] for item, _ in stage.runs] == [datetime(2024, 1, 1, 10)]
+    assert not state_path.exists()
+
+    # Queued runs are not queued again while they run, nor after they fail
+    scheduler.tick(datetime(2024, 1, 1, 10, 6))
+    stage.runs[0][1](False)
+    scheduler.tick(datetime(2024, 1, 1, 10, 7))
+    assert len(stage.runs) == 1
+    assert not state_path.exists()
+
+    # The next slot catches up the failed one
+    scheduler.tick(datetime(2024, 1, 1, 11, 5))
+    item, on_done = stage.runs[1]
+    assert (item['scheduled_for'], item['missed']) == (datetime(2024, 1, 1, 11), 1)
+    on_done(True)
+    assert saved_slot(state_path) == '2024-01-01T11:00:00'
@@ -0,0 +1,44 @@
+import re
+import pandas as pd
+from src.analysis.themes import THEMES, tag_themes
+from src.benchmarks.corpus import CorpusGenerator
+
+# The matcher before keywords were anchored: every keyword as a case-insensitive substring
+OLD_PATTERNS = {
+    theme: re.compile('|'.join(re.escape(keyword) for keyword in keywords), re.IGNORECASE)
+    for theme, keywords in THEMES.items()
+}
+
+def only_mid_word_hits(theme, text):
+    """Whether every old match of the theme in text starts inside a word"""
+    return all(
+        match.start() > 0 and (text[match.start() - 1].isalnum() or text[match.start() - 1] == '_')
+        for match in OLD_PATTERNS[theme].finditer(text)
+    )
+
+def test_word_forms_of_keywords_still_match():
+    texts = pd.Series([
+        'BONK is trending', 'roadmap updated', 'strongly supported here', 'marketing push',
+        'drew a trendline', 'new holders', 'listings on exchanges', 'ATHs incoming'
+    ])
+    expected = ['technical', 'development', 'price', 'market', 'technical', 'community', 'market', 'price']
+    tagged = tag_themes(texts)
+    for row, theme in enumerate(expected):
+        assert tagged.loc[row, theme], texts[row]
+
+def test_mid_word_keywords_do_not_match():
+    tagged = tag_themes(pd.Series(['the path ahead', 'death spiral', 'math is hard']))
+    assert not tagged['price'].any()
+
+def test_parity_with_substring_matcher():
+    generator = CorpusGenerator(seed=0)
+    items = pd.concat(generator.items(2000), ignore_index=True)
+    texts = pd.concat([items['title'].fillna(''), items['text'].fillna('')], ignore_index=True).astype(str)
+    tagged = tag_themes(texts)
+
+    for theme in THEMES:
+        old_tagged = texts.map(lambda text: OLD_PATTERNS[theme].search(text) is not None)
+        # Anchoring only drops matches, and only those starting inside a word
+        assert not (tagged[theme] & ~old_tagged).any()
+        for text in texts[old_tagged & ~tagged[theme]]:
+            assert only_mid_word_hits(theme, text), text
@@ -0,0 +1,56 @@
+import numpy as np
+from src.analysis.token_store import TokenStore
+
+class CharTokenizer:
+    """Stand-in tokenizer: one id per character, so each text's ids are predictable"""
+
+    def __call__(self, texts, truncation=True, max_length=128):
+        return {'input_ids': [[ord(char) for char in text[:max_length]] for text in texts]}
+
+def expected_ids(text):
+    return [ord(char) for char in text]
+
+def test_two_instances_appending_to_one_store(tmp_path):
+    a = TokenStore(CharTokenizer(), 'test-model', path=str(tmp_path), workers=0)
+    b = TokenStore(CharTokenizer(), 'test-model', path=str(tmp_path), workers=0)
+
+    a.encode(['hello'])
+    b.encode(['world!!'])
+    a.encode(['bonk'])
+
+    # Each instance serves rows the other appended
+    assert list(a.encode(['world!!'])[0]) == expected_ids('world!!')
+    assert list(b.encode(['bonk'])[0]) == expected_ids('bonk')
+    a.close()
+    b.close()
+
+    fresh = TokenStore(CharTokenizer(), 'test-model', path=str(tmp_path), workers=0)
+    for text in ['hello', 'world!!', 'bonk']:
+        assert list(fresh.encode([text])[0]) == expected_ids(text)
+    assert fresh.stats()['rows'] == 3
+    assert fresh.stats()['misses'] == 0
+    fresh.close()
+
+def test_text_appended_by_both_instances_is_stored_once(tmp_path):
+    a = TokenStore(CharTokenizer(), 'test-model', path=str(tmp_path), workers=0)
+    b = TokenStore(CharTokenizer(), 'test-model', path=str(tmp_path), workers=0)
+
+    a.encode(['same text'])
+    ids = b.encode(['same text', 'other'])
+    assert [list(row) for row in ids] == [expected_ids('same text'), expected_ids('other')]
+    assert b.stats()['rows'] == 2
+    a.close()
+    b.close()
+
+def test_unindexed_tail_is_overwritten(tmp_path):
+    store = TokenStore(CharTokenizer(), 'test-model', path=str(tmp_path), workers=0)
+    store.encode(['first'])
+    # A writer that crashed after its ids but before their lengths
+    with open(store.ids_path, 'ab') as f:
+        f.write(np.array([7, 7, 7], dtype='<i4').tobytes())
+    store.encode(['second'])
+    store.close()
+
+    fresh = TokenStore(CharTokenizer(), 'test-model', path=str(tmp_path), workers=0)
+    assert [list(row) for row in fresh.encode(['first', 'second'])] == [expected_ids('first'), expected_ids('second')]
+    fresh.close()